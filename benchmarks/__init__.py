@@ -0,0 +1,11 @@
+"""
+Benchmarks for the repository hot paths.
+
+    python -m benchmarks --scale small --out results.json
+    python -m benchmarks --db /tmp/bench-large.db --scale large --compare baseline.json
+
+datagen builds a synthetic database at a given scale (reused when the file already
+exists), runner times each case and writes p50/p95/p99 latency and throughput as JSON.
+Benchmarks write to the database they run against (invoices, variants): never point
+them at a store's real inventory.db.
+"""
@@ -0,0 +1,159 @@
+"""
+Synthetic catalog and sales history for benchmarks.
+
+The schema comes from database.init_db (so migrations, the search index and the
+summary triggers are all in place); rows are then written with executemany in large
+transactions under the bulk-load profile. Everything is driven by a seeded Random, so
+the same scale and seed give the same database.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+from inventory_app import database
+
+# named presets; any key can be overridden (see runner --set)
+SCALES = {
+    "tiny": dict(colors=12, sizes=8, products=200, variants_per_product=6, customers=100,
+                 invoices=2_000, lines_per_invoice=3, days=90),
+    "small": dict(colors=30, sizes=12, products=2_000, variants_per_product=8, customers=2_000,
+                  invoices=50_000, lines_per_invoice=4, days=365),
+    "medium": dict(colors=60, sizes=20, products=10_000, variants_per_product=10, customers=20_000,
+                   invoices=250_000, lines_per_invoice=4, days=730),
+    "large": dict(colors=120, sizes=30, products=50_000, variants_per_product=12, customers=100_000,
+                  invoices=1_000_000, lines_per_invoice=4, days=1_095),
+}
+
+_ADJECTIVES = ("Classic", "Slim", "Relaxed", "Vintage", "Sport", "Premium", "Basic", "Summer",
+               "Winter", "Urban", "Cotton", "Linen", "Denim", "Knit", "Oversized", "Cropped")
+_NOUNS = ("T-Shirt", "Shirt", "Polo", "Hoodie", "Jacket", "Jeans", "Chinos", "Shorts", "Dress",
+          "Skirt", "Sweater", "Cardigan", "Blazer", "Coat", "Vest", "Joggers")
+_FIRST = ("Ali", "Sara", "John", "Maria", "Omar", "Fatima", "David", "Aisha", "Imran", "Zara",
+          "Usman", "Hina", "Peter", "Anna", "Bilal", "Noor")
+_LAST = ("Khan", "Shah", "Smith", "Ahmed", "Malik", "Brown", "Hussain", "Butt", "Jones", "Qureshi")
+
+_BATCH = 50_000
+
+
+def scale(name: str = "small", **overrides) -> dict:
+    if name not in SCALES:
+        raise ValueError(f"Unknown scale '{name}' (expected one of: {', '.join(SCALES)})")
+    unknown = set(overrides) - set(SCALES[name])
+    if unknown:
+        raise ValueError(f"Unknown scale setting(s): {', '.join(sorted(unknown))}")
+    return {**SCALES[name], **overrides}
+
+
+def product_names(rng: random.Random, count: int):
+    """count distinct (name, rack) pairs that read like the real catalog ('Slim Denim Jacket 0042', 'B7')."""
+    for i in range(count):
+        name = f"{rng.choice(_ADJECTIVES)} {rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} {i:05d}"
+        yield name, f"{chr(65 + i % 26)}{i // 26 % 50 + 1}"
+
+
+def _insert_batches(conn, sql: str, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= _BATCH:
+            conn.executemany(sql, batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+
+
+def generate(db_path, scale_name: str = "small", seed: int = 1, progress=print, **overrides) -> dict:
+    """
+    Create a synthetic database at db_path (which should not exist yet) and return
+    its settings plus the row counts and the time taken.
+    """
+    cfg = scale(scale_name, **overrides)
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    database.configure_pool(db_path=str(db_path), profile="bulk-load")
+    database.init_db("bulk-load")
+
+    def step(label):
+        if progress:
+            progress(f"[{time.perf_counter() - started:6.1f}s] {label}")
+
+    with database.transaction() as conn:
+        step("colors, sizes, products")
+        _insert_batches(conn, "INSERT OR IGNORE INTO colors(name) VALUES (?)",
+                        ((f"Color {i:03d}",) for i in range(cfg["colors"])))
+        _insert_batches(conn, "INSERT OR IGNORE INTO sizes(name) VALUES (?)",
+                        ((f"Size {i:03d}",) for i in range(cfg["sizes"])))
+        _insert_batches(conn, "INSERT INTO products(name, rack_number) VALUES (?, ?)",
+                        product_names(rng, cfg["products"]))
+        color_ids = [r[0] for r in conn.execute("SELECT id FROM colors")]
+        size_ids = [r[0] for r in conn.execute("SELECT id FROM sizes")]
+        product_ids = [r[0] for r in conn.execute("SELECT id FROM products")]
+
+    with database.transaction() as conn:
+        step("variants")
+        combos = [(c, s) for c in color_ids for s in size_ids]
+        per_product = min(cfg["variants_per_product"], len(combos))
+
+        def variants():
+            for pid in product_ids:
+                retail = round(rng.uniform(5, 120), 2)
+                for color_id, size_id in rng.sample(combos, per_product):
+                    # most stock is healthy, some low and some sold out, as in a real store
+                    qty = rng.choice((0, rng.randint(1, 5), rng.randint(6, 400), rng.randint(6, 400)))
+                    yield pid, color_id, size_id, qty, retail, round(retail * 0.7, 2)
+
+        _insert_batches(conn, """INSERT INTO product_variants(product_id, color_id, size_id, quantity, retail_price, wholesale_price)
+                                 VALUES (?, ?, ?, ?, ?, ?)""", variants())
+        prices = {vid: (retail, wholesale) for vid, retail, wholesale
+                  in conn.execute("SELECT id, retail_price, wholesale_price FROM product_variants")}
+        variant_ids = list(prices)
+
+    with database.transaction() as conn:
+        step("customers")
+        now = datetime.now().isoformat(timespec="seconds")
+        _insert_batches(conn, "INSERT INTO customers(name, phone, address, type, created_at) VALUES (?, ?, ?, ?, ?)",
+                        ((f"{rng.choice(_FIRST)} {rng.choice(_LAST)} {i}", f"03{rng.randint(0, 10**9 - 1):09d}",
+                          f"{rng.randint(1, 999)} Market Road", rng.choice(("retail", "wholesale")), now)
+                         for i in range(cfg["customers"])))
+        customers = conn.execute("SELECT id, name, phone, type FROM customers").fetchall()
+
+    step(f"{cfg['invoices']} invoices")
+    first_day = datetime.now() - timedelta(days=cfg["days"])
+    seconds = cfg["days"] * 86_400
+    # invoices and lines are generated in date order, one transaction per batch of invoices
+    offsets = sorted(rng.randrange(seconds) for _ in range(cfg["invoices"]))
+    per_chunk = max(1, _BATCH // max(1, cfg["lines_per_invoice"]))
+    lines_total = 0
+    for chunk_start in range(0, cfg["invoices"], per_chunk):
+        chunk = offsets[chunk_start:chunk_start + per_chunk]
+        with database.transaction() as conn:
+            next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM invoices").fetchone()[0]
+            invoices, lines = [], []
+            for offset in chunk:
+                created_at = (first_day + timedelta(seconds=offset)).isoformat(timespec="seconds")
+                if customers and rng.random() < 0.7:
+                    cid, name, phone, ctype = rng.choice(customers)
+                else:
+                    cid, name, phone, ctype = None, f"{rng.choice(_FIRST)} {rng.choice(_LAST)}", "", "retail"
+                invoices.append((next_id, name, phone, ctype, rng.choice((0.0, 0.0, 10.0, 17.0)), created_at, cid,
+                                 f"INV-{next_id:07d}"))
+                for vid in rng.sample(variant_ids, min(len(variant_ids), rng.randint(1, 2 * cfg["lines_per_invoice"] - 1))):
+                    qty = rng.randint(1, 4)
+                    unit = prices[vid][0] if ctype == "retail" else prices[vid][1]
+                    lines.append((next_id, vid, qty, unit, round(unit * qty, 2)))
+                next_id += 1
+            conn.executemany("""INSERT INTO invoices(id, customer_name, customer_phone, pricing_type, tax_rate, created_at,
+                                                    customer_id, invoice_no) VALUES (?, ?, ?, ?, ?, ?, ?, ?)""", invoices)
+            conn.executemany("""INSERT INTO invoice_items(invoice_id, variant_id, quantity, unit_price, line_total)
+                                VALUES (?, ?, ?, ?, ?)""", lines)
+            lines_total += len(lines)
+        step(f"  {min(chunk_start + len(chunk), cfg['invoices'])} invoices, {lines_total} lines")
+
+    step("analyze")
+    database.get_connection().execute("ANALYZE")
+    database.checkpoint("TRUNCATE")
+    database.set_profile(database.DEFAULT_PROFILE)
+    elapsed = time.perf_counter() - started
+    step("done")
+    return {"scale": scale_name, "seed": seed, **cfg, "variants": len(variant_ids),
+            "invoice_lines": lines_total, "generate_s": round(elapsed, 1)}
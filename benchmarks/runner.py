@@ -0,0 +1,266 @@
+"""
+Time the repository hot paths against a synthetic database and report JSON.
+
+Each case prepares its arguments up front (untimed) and then times one call per
+iteration with perf_counter; results are p50/p95/p99/mean/max in milliseconds plus
+calls per second. --compare fails (exit code 1) when a case's p95 is more than
+--tolerance slower than in an earlier results file.
+"""
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from inventory_app import database
+from inventory_app import repository as repo
+from inventory_app.utils import pdf_export
+
+from . import datagen
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples) -> dict:
+    """Latency statistics (ms) and throughput for a list of per-call durations in seconds."""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    ms = 1000.0
+    return {
+        "n": len(ordered),
+        "p50_ms": round(percentile(ordered, 50) * ms, 3),
+        "p95_ms": round(percentile(ordered, 95) * ms, 3),
+        "p99_ms": round(percentile(ordered, 99) * ms, 3),
+        "mean_ms": round(total / len(ordered) * ms, 3) if ordered else 0.0,
+        "max_ms": round(ordered[-1] * ms, 3) if ordered else 0.0,
+        "ops_per_s": round(len(ordered) / total, 1) if total else 0.0,
+    }
+
+
+# -- cases: case(ctx, n) -> (fn, [args tuple per call]); ctx holds the rng and sample ids
+
+def _search_products(ctx, n):
+    words = [w for name in ctx["product_names"] for w in name.split()[:3]]
+    queries = [" ".join(ctx["rng"].sample(words, ctx["rng"].choice((1, 2))))[:ctx["rng"].randint(3, 12)] for _ in range(n)]
+    return repo.search_products, [(q, "auto", 50) for q in queries]
+
+
+def _list_variants(ctx, n):
+    rng = ctx["rng"]
+    args = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.4:
+            # first page of the grid, no filter
+            args.append(({}, 500, None))
+        elif kind < 0.7:
+            # a later page: start after a random row
+            args.append(({}, 500, rng.choice(ctx["cursors"])))
+        else:
+            args.append(({"product": rng.choice(ctx["product_names"]).split()[1], "status": rng.choice(("", "Low Stock"))},
+                         500, None))
+    return repo.list_variants, args
+
+
+def _create_invoice(ctx, n):
+    rng = ctx["rng"]
+    args = []
+    for _ in range(n):
+        items = [{"variant_id": vid, "quantity": 1} for vid in rng.sample(ctx["stocked_ids"], rng.randint(1, 6))]
+        args.append(("Bench Customer", "0300", rng.choice(("retail", "wholesale")), 10.0, items))
+    return repo.create_invoice, args
+
+
+def _get_invoice(ctx, n):
+    return repo.get_invoice, [(ctx["rng"].randint(1, ctx["max_invoice_id"]),) for _ in range(n)]
+
+
+def _add_variant(ctx, n):
+    # fresh products so every call inserts a new variant instead of topping one up
+    pids = repo.get_or_create_products([(f"Bench Product {ctx['run_id']} {i}", "BENCH") for i in range(n)])
+    color, size = ctx["color_id"], ctx["size_id"]
+    return repo.add_variant, [(pid, color, size, 10, 9.99, 6.5) for pid in pids.values()]
+
+
+def _export_invoice(ctx, n):
+    fmt = ctx["export_format"]
+    out_dir = Path(ctx["tmp_dir"])
+    args = []
+    for _ in range(n):
+        inv, items = repo.get_invoice(ctx["rng"].randint(1, ctx["max_invoice_id"]))
+        args.append((inv, items, out_dir, ctx["branding"], fmt))
+    return pdf_export.export_invoice, args
+
+
+CASES = {
+    "search_products": _search_products,
+    "list_variants": _list_variants,
+    "create_invoice": _create_invoice,
+    "get_invoice": _get_invoice,
+    "add_variant": _add_variant,
+    "export_invoice": _export_invoice,
+}
+# fewer iterations for the slow cases
+_ITERATION_SCALE = {"export_invoice": 0.1}
+
+
+def _context(seed: int, tmp_dir: str, export_format: str) -> dict:
+    conn = database.get_connection()
+    rng = random.Random(seed)
+    names = [r[0] for r in conn.execute("SELECT name FROM products ORDER BY RANDOM() LIMIT 500")]
+    first_page = repo.list_variants({}, limit=5000)
+    try:
+        import reportlab  # noqa: F401
+        has_pdf = True
+    except ImportError:
+        has_pdf = False
+    return {
+        "rng": rng,
+        "run_id": int(time.time()),
+        "product_names": names or ["Sample"],
+        "cursors": [repo.variant_cursor(r) for r in first_page] or [None],
+        "stocked_ids": [r[0] for r in conn.execute(
+            "SELECT id FROM product_variants WHERE quantity >= 1000 ORDER BY RANDOM() LIMIT 2000")],
+        "max_invoice_id": conn.execute("SELECT COALESCE(MAX(id), 1) FROM invoices").fetchone()[0],
+        "color_id": conn.execute("SELECT MIN(id) FROM colors").fetchone()[0],
+        "size_id": conn.execute("SELECT MIN(id) FROM sizes").fetchone()[0],
+        "tmp_dir": tmp_dir,
+        "branding": repo.get_branding(),
+        "export_format": export_format if export_format != "auto" else ("pdf" if has_pdf else "html"),
+    }
+
+
+def _stock_up(count: int = 2000):
+    """Give some variants enough stock that create_invoice never fails for lack of it."""
+    with database.transaction() as conn:
+        conn.execute("""UPDATE product_variants SET quantity = quantity + 1000000
+                         WHERE quantity < 1000 AND id IN (SELECT id FROM product_variants ORDER BY id LIMIT ?)""",
+                     (count,))
+
+
+def run_case(name: str, ctx: dict, iterations: int, warmup: int) -> dict:
+    n = max(1, int(iterations * _ITERATION_SCALE.get(name, 1.0)))
+    w = max(0, int(warmup * _ITERATION_SCALE.get(name, 1.0)))
+    fn, args = CASES[name](ctx, n + w)
+    samples = []
+    clock = time.perf_counter
+    for i, a in enumerate(args):
+        t0 = clock()
+        fn(*a)
+        elapsed = clock() - t0
+        if i >= w:
+            samples.append(elapsed)
+    return summarize(samples)
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_ms: float = 0.1):
+    """
+    [(case, baseline p95, current p95)] for every case whose p95 is slower than the
+    baseline by more than tolerance (a fraction) and by more than min_ms, so timer
+    noise on sub-millisecond cases is not reported.
+    """
+    regressions = []
+    for name, stats in results["results"].items():
+        old = baseline.get("results", {}).get(name)
+        if old and old.get("p95_ms") and stats["p95_ms"] - old["p95_ms"] > max(old["p95_ms"] * tolerance, min_ms):
+            regressions.append((name, old["p95_ms"], stats["p95_ms"]))
+    return regressions
+
+
+def _parse_overrides(pairs):
+    out = {}
+    for pair in pairs or ():
+        key, _, value = pair.partition("=")
+        if not value:
+            raise ValueError(f"--set expects key=value, got '{pair}'")
+        out[key.strip().replace("-", "_")] = int(value.replace("_", ""))
+    return out
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="benchmarks", description="Benchmark the inventory repository hot paths.")
+    p.add_argument("--db", help="benchmark database; generated at this path if it does not exist "
+                                "(default: a fresh file in a temporary directory)")
+    p.add_argument("--scale", choices=list(datagen.SCALES), default="small", help="preset used when generating")
+    p.add_argument("--set", dest="overrides", action="append", metavar="KEY=N",
+                   help="override one scale setting, e.g. --set invoices=2000000 (repeatable)")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    p.add_argument("--iterations", type=int, default=500, help="timed calls per case")
+    p.add_argument("--warmup", type=int, default=20, help="untimed calls per case first")
+    p.add_argument("--export-format", choices=("auto", "pdf", "html"), default="auto")
+    p.add_argument("--out", help="write the JSON results here (default: stdout)")
+    p.add_argument("--compare", dest="baseline", help="earlier results JSON; exit 1 if any p95 regressed")
+    p.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown for --compare (0.2 = 20%%)")
+    p.add_argument("--min-ms", type=float, default=0.1, help="ignore p95 slowdowns smaller than this for --compare")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        overrides = _parse_overrides(args.overrides)
+        datagen.scale(args.scale, **overrides)
+    except ValueError as ex:
+        print(ex, file=sys.stderr)
+        return 2
+
+    with tempfile.TemporaryDirectory(prefix="inventory-bench-") as tmp:
+        db_path = Path(args.db) if args.db else Path(tmp) / "bench.db"
+        dataset = None
+        if not db_path.exists():
+            print(f"Generating {args.scale} dataset at {db_path} ...", file=sys.stderr)
+            dataset = datagen.generate(db_path, args.scale, seed=args.seed,
+                                       progress=lambda msg: print(msg, file=sys.stderr), **overrides)
+        database.configure_pool(db_path=str(db_path), profile=database.DEFAULT_PROFILE)
+        database.init_db()
+        try:
+            _stock_up()
+            ctx = _context(args.seed, tmp, args.export_format)
+            results = {
+                "meta": {
+                    "started": datetime.now().isoformat(timespec="seconds"),
+                    "db": str(db_path) if args.db else None,
+                    "dataset": dataset,
+                    "rows": {t: database.get_connection().execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                             for t in ("products", "product_variants", "customers", "invoices", "invoice_items")},
+                    "iterations": args.iterations,
+                    "seed": args.seed,
+                    "export_format": ctx["export_format"],
+                    "python": platform.python_version(),
+                    "sqlite": sqlite3.sqlite_version,
+                    "platform": platform.platform(),
+                },
+                "results": {},
+            }
+            for name in args.cases:
+                print(f"{name} ...", file=sys.stderr)
+                results["results"][name] = run_case(name, ctx, args.iterations, args.warmup)
+        finally:
+            database.close_pool()
+
+    text = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance, args.min_ms)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: p95 {old:.3f} ms -> {new:.3f} ms", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
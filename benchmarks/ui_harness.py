@@ -0,0 +1,526 @@
+"""
+Replay scripted UI sessions against a synthetic database and time the Tk handlers.
+
+    xvfb-run -a python -m benchmarks.ui_harness --scale small --out ui.json
+    python -m benchmarks.ui_harness --db /tmp/bench.db --repeat 5 --compare ui-baseline.json
+
+InventoryUI and InvoiceWindow are created for real (under the current DISPLAY, or an
+Xvfb started for the run when there is none) and driven step by step: typing goes
+through the same StringVar traces / <KeyRelease> bindings as a keyboard, prompts
+(askinteger, askyesno, ...) are answered from the script. Two things are recorded:
+
+ - handlers: every call of the instrumented methods (HANDLERS), inclusive time;
+ - steps: per scripted action, the time from dispatch until the last handler it
+   triggered returned (debounce delays, worker queries and result delivery included),
+   and the longest single turn of the Tk event loop meanwhile (a frozen frame).
+
+A window that fails to build is listed under "errors" (exit code 1) and the steps
+on it are skipped. Restock and price steps write to the database, so use a
+benchmark database only.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from inventory_app import database
+
+from . import datagen
+from .runner import compare, summarize
+
+# methods timed on every call, per class
+HANDLERS = {
+    "InventoryUI": ("_apply_filters", "_refresh_tree", "_on_page", "_on_view_changed", "_update_row",
+                    "_sync_row", "_remove_row", "_update_summary"),
+    "VirtualTreeview": ("set_rows", "refresh", "refresh_index"),
+    "InvoiceWindow": ("_on_prod_search_key", "_start_prod_search", "_show_prod_results", "_on_cust_search_key",
+                      "_start_cust_search", "_show_cust_results", "_add_selected_product", "_append_item",
+                      "_refresh_tree_rows", "_update_totals"),
+}
+
+# Scripts are lists of steps; "window" is "inventory" (the InventoryUI) or "invoice" (the
+# InvoiceWindow, opened on first use). The product words come from datagen's vocabulary.
+SCRIPTS = {
+    "inventory": [
+        {"window": "inventory", "action": "type", "target": "search_name", "text": "Slim"},
+        {"window": "inventory", "action": "type", "target": "search_name", "text": " Denim"},
+        {"window": "inventory", "action": "clear", "target": "search_name"},
+        {"window": "inventory", "action": "type", "target": "search_rack", "text": "B1"},
+        {"window": "inventory", "action": "clear", "target": "search_rack"},
+        {"window": "inventory", "action": "stock", "value": "low"},
+        {"window": "inventory", "action": "stock", "value": "out"},
+        {"window": "inventory", "action": "stock", "value": "all"},
+        {"window": "inventory", "action": "scroll", "rows": 400},
+        {"window": "inventory", "action": "scroll", "rows": -200},
+        {"window": "inventory", "action": "select", "index": 3},
+        {"window": "inventory", "action": "restock", "units": 12},
+        {"window": "inventory", "action": "price", "value": 19.99},
+    ],
+    "invoice": [
+        {"window": "invoice", "action": "type", "target": "cust_search_e", "text": "Sara"},
+        {"window": "invoice", "action": "type", "target": "prod_search_e", "text": "classic"},
+        {"window": "invoice", "action": "more"},
+        {"window": "invoice", "action": "pick", "index": 0, "qty": 2},
+        {"window": "invoice", "action": "type", "target": "prod_search_e", "text": "slim jea"},
+        {"window": "invoice", "action": "pick", "index": 1, "qty": 1},
+        {"window": "invoice", "action": "type", "target": "prod_search_e", "text": "hood"},
+        {"window": "invoice", "action": "pick", "index": 0, "qty": 3},
+    ],
+}
+
+KEY_INTERVAL_MS = 60     # pause between typed characters, roughly a fast typist
+QUIET_MS = 250           # a step has settled once nothing is pending and no handler ran for this long
+STEP_TIMEOUT_S = 60
+
+
+class Recorder:
+    """Per-handler durations plus the time the most recent instrumented call returned."""
+
+    def __init__(self):
+        self.samples = {}
+        self.last_return = 0.0
+        self._patched = []
+
+    def instrument(self, cls, names):
+        # a renamed handler must not silently drop out of the report
+        missing = [name for name in names if name not in cls.__dict__]
+        if missing:
+            raise AttributeError(f"ui_harness lists handlers {cls.__name__} does not define: {', '.join(missing)}")
+        for name in names:
+            original = cls.__dict__[name]
+            key = f"{cls.__name__}.{name}"
+            self._patched.append((cls, name, original))
+            setattr(cls, name, self._timed(key, original))
+
+    def _timed(self, key, original):
+        fn = original.__func__ if isinstance(original, staticmethod) else original
+        clock = time.perf_counter
+        samples = self.samples.setdefault(key, [])
+
+        def wrapper(*args, **kwargs):
+            t0 = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.last_return = clock()
+                samples.append(self.last_return - t0)
+
+        return staticmethod(wrapper) if isinstance(original, staticmethod) else wrapper
+
+    def restore(self):
+        for cls, name, original in reversed(self._patched):
+            setattr(cls, name, original)
+        self._patched = []
+
+
+class Prompts:
+    """Scripted answers for the simpledialog/messagebox calls a step triggers."""
+
+    PATCHED = {"simpledialog": ("askinteger", "askfloat", "askstring"),
+               "messagebox": ("askyesno", "askokcancel", "showinfo", "showwarning", "showerror")}
+
+    def __init__(self):
+        self.answers = []
+        self.shown = []
+
+    def _answer(self, kind):
+        def prompt(title=None, message=None, *args, **kwargs):
+            if kind.startswith("show"):
+                self.shown.append((kind, title, message))
+                return "ok"
+            return self.answers.pop(0) if self.answers else None
+        return prompt
+
+    @contextmanager
+    def installed(self):
+        import tkinter.messagebox
+        import tkinter.simpledialog
+        modules = {"simpledialog": tkinter.simpledialog, "messagebox": tkinter.messagebox}
+        saved = []
+        for mod_name, names in self.PATCHED.items():
+            mod = modules[mod_name]
+            for name in names:
+                saved.append((mod, name, getattr(mod, name)))
+                setattr(mod, name, self._answer(name))
+        try:
+            yield self
+        finally:
+            for mod, name, original in saved:
+                setattr(mod, name, original)
+
+
+def _start_xvfb():
+    """Start an Xvfb on a free display number and point DISPLAY at it; returns the process."""
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        raise RuntimeError("No DISPLAY and Xvfb is not installed; run under xvfb-run or on a desktop session")
+    for num in range(99, 140):
+        if os.path.exists(f"/tmp/.X{num}-lock"):
+            continue
+        proc = subprocess.Popen([xvfb, f":{num}", "-screen", "0", "1400x1000x24", "-nolisten", "tcp"],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(50):
+            if os.path.exists(f"/tmp/.X11-unix/X{num}") or proc.poll() is not None:
+                break
+            time.sleep(0.1)
+        if proc.poll() is None:
+            os.environ["DISPLAY"] = f":{num}"
+            return proc
+    raise RuntimeError("Could not start Xvfb")
+
+
+class Session:
+    """One InventoryUI (and on demand one InvoiceWindow) driven by script steps."""
+
+    def __init__(self, recorder: Recorder, prompts: Prompts, withdrawn: bool = False):
+        from inventory_app.ui.main_window import InventoryUI
+        self.recorder = recorder
+        self.prompts = prompts
+        self.withdrawn = withdrawn
+        started = time.perf_counter()
+        self.app = InventoryUI()
+        if withdrawn:
+            self.app.withdraw()
+        self.invoice = None
+        self.invoice_error = None
+        self.steps = {}
+        self._record("startup", self._settle(started))
+
+    # -- event loop
+    def _busy(self):
+        from inventory_app.ui.async_tasks import BackgroundRunner, Debouncer
+        for window in (self.app, self.invoice):
+            if window is None:
+                continue
+            for value in vars(window).values():
+                if isinstance(value, BackgroundRunner) and value._pending > 0:
+                    return True
+                if isinstance(value, Debouncer) and value._after_id is not None:
+                    return True
+        return False
+
+    def _pump(self, seconds: float) -> float:
+        """Run the Tk loop for about `seconds`; returns the longest single update()."""
+        worst = 0.0
+        end = time.perf_counter() + seconds
+        while True:
+            t0 = time.perf_counter()
+            self.app.update()
+            worst = max(worst, time.perf_counter() - t0)
+            if t0 >= end:
+                return worst
+            time.sleep(0.002)
+
+    def _settle(self, dispatched: float):
+        """Pump until idle; returns (latency to the last handler, longest frame)."""
+        worst = 0.0
+        deadline = dispatched + STEP_TIMEOUT_S
+        while time.perf_counter() < deadline:
+            worst = max(worst, self._pump(0.01))
+            quiet = time.perf_counter() - max(self.recorder.last_return, dispatched)
+            if not self._busy() and quiet * 1000 >= QUIET_MS:
+                break
+        return max(self.recorder.last_return - dispatched, 0.0), worst
+
+    def _record(self, name, result):
+        latency, frame = result
+        entry = self.steps.setdefault(name, {"latency": [], "frame": []})
+        entry["latency"].append(latency)
+        entry["frame"].append(frame)
+
+    # -- steps
+    def window(self, which):
+        if which == "inventory":
+            return self.app
+        if self.invoice_error is not None:
+            return None
+        if self.invoice is None or not self.invoice.winfo_exists():
+            from inventory_app.ui.invoice_window import InvoiceWindow
+            started = time.perf_counter()
+            try:
+                self.invoice = InvoiceWindow(self.app)
+            except Exception as ex:
+                # report it and skip the invoice steps rather than losing the whole run
+                self.invoice, self.invoice_error = None, f"InvoiceWindow could not be built: {ex!r}"
+                return None
+            if self.withdrawn:
+                self.invoice.withdraw()
+            self._record("open_invoice", self._settle(started))
+        return self.invoice
+
+    def run(self, step: dict):
+        import tkinter as tk
+        win = self.window(step.get("window", "inventory"))
+        if win is None:
+            return
+        action = step["action"]
+        name = f"{step.get('window', 'inventory')}.{action}"
+        if action == "type":
+            # one measurement per key, as the user feels it
+            target = getattr(win, step["target"])
+            for ch in step["text"]:
+                t0 = time.perf_counter()
+                if isinstance(target, tk.Variable):
+                    target.set(target.get() + ch)
+                else:
+                    target.insert(tk.END, ch)
+                    target.event_generate("<KeyRelease>", keysym=ch if ch.isalnum() else "space")
+                self._record(name, self._key_latency(t0))
+            return
+        t0 = time.perf_counter()
+        if action == "clear":
+            target = getattr(win, step["target"])
+            if isinstance(target, tk.Variable):
+                target.set("")
+            else:
+                target.delete(0, tk.END)
+                target.event_generate("<KeyRelease>", keysym="BackSpace")
+        elif action == "stock":
+            win.stock_filter.set(step["value"])
+            win._apply_filters()
+        elif action == "scroll":
+            win.grid_view._scroll_by(int(step["rows"]))
+        elif action == "select":
+            win.grid_view.select_index(min(int(step["index"]), max(len(win.filtered) - 1, 0)))
+        elif action == "restock":
+            self.prompts.answers = [int(step["units"])]
+            win._restock_prompt()
+        elif action == "price":
+            self.prompts.answers = [float(step["value"])]
+            win._update_price_prompt()
+        elif action == "pick":
+            box = win.prod_suggestions
+            if box.size() == 0:
+                return
+            box.selection_clear(0, tk.END)
+            box.selection_set(min(int(step["index"]), box.size() - 1))
+            self.prompts.answers = [int(step.get("qty", 1))]
+            win._add_selected_product()
+        elif action == "more":
+            # load the next page of product suggestions through the "… more" row
+            metas = win._last_prod_results
+            if not metas or metas[-1].get("action") != "more":
+                return
+            win.prod_suggestions.selection_clear(0, tk.END)
+            win.prod_suggestions.selection_set(len(metas) - 1)
+            win._add_selected_product()
+        else:
+            raise ValueError(f"Unknown script action '{action}'")
+        self._record(name, self._settle(t0))
+
+    def _key_latency(self, t0):
+        # between keys only pump for the typing interval; the last key of a word settles fully
+        before = self.recorder.last_return
+        frame = self._pump(KEY_INTERVAL_MS / 1000.0)
+        latency = self.recorder.last_return - t0 if self.recorder.last_return > before else 0.0
+        return latency, frame
+
+    def close(self):
+        if self.invoice is not None and self.invoice.winfo_exists():
+            self.invoice.destroy()
+        self.app.destroy()
+
+
+def run_scripts(scripts, repeat: int, withdrawn: bool):
+    from inventory_app.ui.main_window import InventoryUI
+    from inventory_app.ui.invoice_window import InvoiceWindow
+    from inventory_app.ui.virtual_tree import VirtualTreeview
+
+    recorder = Recorder()
+    for cls in (InventoryUI, VirtualTreeview, InvoiceWindow):
+        recorder.instrument(cls, HANDLERS[cls.__name__])
+    prompts = Prompts()
+    steps = {}
+    errors = []
+    try:
+        with prompts.installed():
+            for _ in range(repeat):
+                session = Session(recorder, prompts, withdrawn=withdrawn)
+                try:
+                    for script in scripts:
+                        for step in script:
+                            session.run(step)
+                        # let the last typed word's search finish before the next script
+                        session._settle(time.perf_counter())
+                finally:
+                    session.close()
+                if session.invoice_error and session.invoice_error not in errors:
+                    errors.append(session.invoice_error)
+                for name, entry in session.steps.items():
+                    merged = steps.setdefault(name, {"latency": [], "frame": []})
+                    merged["latency"] += entry["latency"]
+                    merged["frame"] += entry["frame"]
+    finally:
+        recorder.restore()
+    return {
+        "handlers": {name: summarize(s) for name, s in sorted(recorder.samples.items()) if s},
+        "steps": {name: {**summarize(e["latency"]), "max_frame_ms": round(max(e["frame"]) * 1000, 3)}
+                  for name, e in steps.items()},
+        "dialogs_shown": [list(s) for s in prompts.shown],
+        "errors": errors,
+    }
+
+
+def smoke() -> list:
+    """
+    Build both windows, put one invoice line through add/remove and run one product
+    search; returns the problems found (empty when the windows work).
+    """
+    from inventory_app.ui.main_window import InventoryUI
+    from inventory_app.ui.invoice_window import InvoiceWindow
+    problems = [f"{cls.__name__}.{name} does not exist"
+                for cls in (InventoryUI, InvoiceWindow) for name in HANDLERS[cls.__name__]
+                if not hasattr(cls, name)]
+    app = InventoryUI()
+    app.withdraw()
+    try:
+        try:
+            win = InvoiceWindow(app)
+        except Exception as ex:
+            return problems + [f"InvoiceWindow could not be built: {ex!r}"]
+        win.withdraw()
+        app.update()
+        row = database.get_connection().execute(
+            "SELECT id, retail_price FROM product_variants ORDER BY id LIMIT 1").fetchone()
+        if row is None:
+            return problems + ["the database has no variants"]
+        win._append_item({"pid": row[0], "item": "smoke", "size": "", "color": "", "qty": 2, "unit": row[1]})
+        if len(win.items) != 1 or len(win.tree.get_children()) != 1:
+            problems.append("_append_item did not add one line")
+        win.tree.selection_set(win.tree.get_children())
+        win._remove_selected()
+        if win.items or win.tree.get_children() or win.subtotal_var.get() != "0.00":
+            problems.append("_remove_selected left lines or a subtotal behind")
+        # product type-ahead: results come back from the search worker
+        name = database.get_connection().execute(
+            "SELECT p.name FROM product_variants v JOIN products p ON p.id = v.product_id WHERE v.id = ?",
+            (row[0],)).fetchone()[0]
+        win.prod_search_var.set(name.split()[0])
+        win._start_prod_search()
+        deadline = time.perf_counter() + 10
+        while win._prod_runner._pending and time.perf_counter() < deadline:
+            app.update()
+            time.sleep(0.01)
+        if not win._last_prod_results:
+            problems.append(f"product search for '{name.split()[0]}' showed no results")
+        win.destroy()
+    finally:
+        app.destroy()
+    return problems
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="benchmarks.ui_harness", description="Replay scripted UI sessions and time the handlers.")
+    p.add_argument("--db", help="benchmark database; generated at this path if it does not exist")
+    p.add_argument("--scale", choices=list(datagen.SCALES), default="small", help="preset used when generating")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--scripts", nargs="+", default=list(SCRIPTS),
+                   help=f"built-in scripts ({', '.join(SCRIPTS)}) or JSON files holding a list of steps")
+    p.add_argument("--repeat", type=int, default=3, help="run the whole session this many times")
+    p.add_argument("--withdrawn", action="store_true", help="keep the windows unmapped (faster, but no real drawing)")
+    p.add_argument("--smoke", action="store_true",
+                   help="only check that both windows build and an invoice line can be added and removed")
+    p.add_argument("--out", help="write the JSON results here (default: stdout)")
+    p.add_argument("--compare", dest="baseline", help="earlier results JSON; exit 1 if a handler's p95 regressed")
+    p.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown for --compare (0.2 = 20%%)")
+    p.add_argument("--min-ms", type=float, default=1.0, help="ignore p95 slowdowns smaller than this for --compare")
+    return p
+
+
+def _load_scripts(names):
+    scripts = []
+    for name in names:
+        if name in SCRIPTS:
+            scripts.append(SCRIPTS[name])
+        else:
+            scripts.append(json.loads(Path(name).read_text(encoding="utf-8")))
+    return scripts
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        scripts = _load_scripts(args.scripts)
+    except (OSError, ValueError) as ex:
+        print(f"Bad script: {ex}", file=sys.stderr)
+        return 2
+    xvfb = None
+    if not os.environ.get("DISPLAY"):
+        try:
+            xvfb = _start_xvfb()
+        except RuntimeError as ex:
+            print(ex, file=sys.stderr)
+            return 2
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="inventory-ui-") as tmp:
+            db_path = Path(args.db) if args.db else Path(tmp) / "bench.db"
+            if not db_path.exists():
+                print(f"Generating {args.scale} dataset at {db_path} ...", file=sys.stderr)
+                datagen.generate(db_path, args.scale, seed=args.seed, progress=lambda msg: print(msg, file=sys.stderr))
+            database.configure_pool(db_path=str(db_path), profile=database.DEFAULT_PROFILE)
+            database.init_db()
+            try:
+                if args.smoke:
+                    problems = smoke()
+                else:
+                    timings = run_scripts(scripts, max(1, args.repeat), args.withdrawn)
+            finally:
+                database.close_pool()
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+            xvfb.wait()
+
+    if args.smoke:
+        for problem in problems:
+            print(f"SMOKE {problem}", file=sys.stderr)
+        print("smoke: ok" if not problems else f"smoke: {len(problems)} problem(s)", file=sys.stderr)
+        return 1 if problems else 0
+
+    results = {
+        "meta": {
+            "started": datetime.now().isoformat(timespec="seconds"),
+            "db": str(args.db) if args.db else None,
+            "scale": args.scale,
+            "scripts": args.scripts,
+            "repeat": args.repeat,
+            "withdrawn": args.withdrawn,
+            "display": "xvfb" if xvfb is not None else os.environ.get("DISPLAY"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        # compare() looks at "results": the per-handler timings
+        "results": timings["handlers"],
+        "steps": timings["steps"],
+        "dialogs_shown": timings["dialogs_shown"],
+        "errors": timings["errors"],
+    }
+    text = json.dumps(results, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    for error in timings["errors"]:
+        print(f"ERROR {error}; its steps were skipped", file=sys.stderr)
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.tolerance, args.min_ms)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: p95 {old:.3f} ms -> {new:.3f} ms", file=sys.stderr)
+        if regressions:
+            return 1
+    return 1 if timings["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
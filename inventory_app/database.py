@@ -1,16 +1,357 @@
+import atexit
+import itertools
+import json
+import os
 import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
 
+from . import migrations
+
 DB_PATH = Path(__file__).resolve().parent / "inventory.db"
+CONFIG_PATH = Path(__file__).resolve().parent / "config.json"
+
+# Max idle connections kept around for reuse once a thread hands its connection back.
+DEFAULT_POOL_SIZE = 4
+# Per-connection LRU of compiled statements (sqlite3 default is 128).
+DEFAULT_CACHED_STATEMENTS = 256
+
+# INSERT ... ON CONFLICT DO UPDATE needs SQLite 3.24, RETURNING needs 3.35; older
+# builds (e.g. some distro Pythons) take the slower multi-statement paths.
+SUPPORTS_UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Performance/durability profiles. journal_mode is persistent in the database file and is
+# set once by init_db; the rest are per-connection and applied to every pooled connection.
+#  - safe:      fsync on every commit (synchronous=FULL), small cache, no mmap.
+#  - balanced:  WAL + synchronous=NORMAL: commits no longer fsync, readers never block the
+#               writer; a power cut can lose the last transactions but never corrupts the file.
+#  - bulk-load: for imports/benchmarks only: no fsync, big cache, auto-checkpoint disabled
+#               (call checkpoint() when the load is done).
+# cache_size is negative = KiB. wal_autocheckpoint is in pages. checkpoint_on_close is the
+# wal_checkpoint mode run when the pool shuts down (None = leave it to SQLite).
+PROFILES = {
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -8000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+        "wal_autocheckpoint": 1000,
+        "checkpoint_on_close": "TRUNCATE",
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "mmap_size": 128 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "wal_autocheckpoint": 1000,
+        "checkpoint_on_close": "PASSIVE",
+    },
+    "bulk-load": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -256000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+        "wal_autocheckpoint": 0,
+        "checkpoint_on_close": "TRUNCATE",
+    },
+}
+DEFAULT_PROFILE = "balanced"
+_CONNECTION_PRAGMAS = ("synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout", "wal_autocheckpoint")
+
+
+def resolve_profile(name: str = None) -> str:
+    """
+    Pick the profile name: explicit argument, then the INVENTORY_DB_PROFILE env var,
+    then "db_profile" in config.json, then DEFAULT_PROFILE.
+    """
+    if not name:
+        name = os.environ.get("INVENTORY_DB_PROFILE")
+    if not name:
+        try:
+            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+                cfg = json.load(f)
+            if isinstance(cfg, dict):
+                name = cfg.get("db_profile")
+        except (OSError, ValueError):
+            pass
+    name = (name or DEFAULT_PROFILE).strip().lower()
+    if name not in PROFILES:
+        raise ValueError(f"Unknown database profile '{name}' (expected one of: {', '.join(PROFILES)})")
+    return name
+
+
+def apply_pragmas(conn: sqlite3.Connection, profile: str):
+    settings = PROFILES[profile]
+    for key in _CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {key} = {settings[key]};")
+
+
+class ConnectionPool:
+    """
+    Long-lived SQLite connections shared by the repository layer.
+
+    Each thread gets its own connection on first use and keeps it until it calls
+    release() (worker threads), the thread ends or the pool is closed (application
+    exit). Released connections, and those of threads that ended without releasing
+    them (reclaimed whenever another thread needs one), go back to an idle list of at
+    most `size` entries so the next thread reuses them instead of paying
+    connect/PRAGMA cost again.
+    """
+
+    def __init__(self, db_path=DB_PATH, size: int = DEFAULT_POOL_SIZE,
+                 cached_statements: int = DEFAULT_CACHED_STATEMENTS, timeout: float = 5.0,
+                 profile: str = DEFAULT_PROFILE, factory=sqlite3.Connection):
+        self.db_path = Path(db_path)
+        # connection class, e.g. instrumentation.InstrumentedConnection
+        self.factory = factory
+        self.profile = profile
+        self.size = max(0, int(size))
+        self.cached_statements = int(cached_statements)
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self._all = set()
+        # thread using each handed-out connection, to reclaim those of finished threads
+        self._owners = {}
+        # profile last applied to each connection; re-applied lazily after set_profile()
+        self._applied = {}
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            # a connection may be handed to another thread via the idle list,
+            # but is only ever used by one thread at a time
+            check_same_thread=False,
+            factory=self.factory,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON;")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            if self._applied.get(conn) != self.profile:
+                self._apply_profile(conn)
+            return conn
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            finished = [c for c, thread in self._owners.items() if not thread.is_alive()]
+            for c in finished:
+                del self._owners[c]
+        for c in finished:
+            self._recycle(c)
+        with self._lock:
+            conn = self._idle.popleft() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+            with self._lock:
+                self._all.add(conn)
+        if self._applied.get(conn) != self.profile:
+            self._apply_profile(conn)
+        with self._lock:
+            self._owners[conn] = threading.current_thread()
+        self._local.conn = conn
+        return conn
+
+    def _apply_profile(self, conn: sqlite3.Connection):
+        profile = self.profile
+        apply_pragmas(conn, profile)
+        self._applied[conn] = profile
+
+    def checkpoint(self, mode: str = "PASSIVE"):
+        """Run a WAL checkpoint on the calling thread's connection; returns (busy, log_pages, checkpointed)."""
+        mode = mode.upper()
+        if mode not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+            raise ValueError(f"Invalid checkpoint mode '{mode}'")
+        return tuple(self.connection().execute(f"PRAGMA wal_checkpoint({mode});").fetchone())
+
+    def release(self):
+        """Hand the calling thread's connection back to the pool (call at the end of worker threads)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            self._owners.pop(conn, None)
+        self._recycle(conn)
+
+    def _recycle(self, conn: sqlite3.Connection):
+        """Put a connection no thread uses any more back on the idle list, or close it."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.ProgrammingError:
+            return  # closed along with the pool meanwhile
+        with self._lock:
+            if not self._closed and len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+            self._all.discard(conn)
+            self._applied.pop(conn, None)
+        conn.close()
+
+    def close(self):
+        mode = PROFILES[self.profile]["checkpoint_on_close"]
+        conn = getattr(self._local, "conn", None)
+        if mode and conn is not None and not self._closed:
+            try:
+                self.checkpoint(mode)
+            except sqlite3.Error:
+                pass
+        with self._lock:
+            self._closed = True
+            conns = list(self._all)
+            self._all.clear()
+            self._idle.clear()
+            self._owners.clear()
+            self._applied.clear()
+        self._local = threading.local()
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    @property
+    def open_connections(self) -> int:
+        with self._lock:
+            return len(self._all)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_settings = {}
+
+
+def configure_pool(db_path=None, size: int = None, cached_statements: int = None, timeout: float = None,
+                   profile: str = None, factory=None):
+    """
+    Change pool settings. Any existing pool is closed; the next get_connection()
+    opens connections with the new settings.
+    """
+    global _pool
+    if profile is not None:
+        profile = resolve_profile(profile)
+    for key, value in (("db_path", db_path), ("size", size), ("cached_statements", cached_statements),
+                       ("timeout", timeout), ("profile", profile), ("factory", factory)):
+        if value is not None:
+            _pool_settings[key] = value
+    with _pool_lock:
+        old, _pool = _pool, None
+    if old is not None:
+        old.close()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    pool = _pool
+    if pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(**{"db_path": DB_PATH, **_pool_settings})
+            pool = _pool
+    return pool
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Return the calling thread's pooled connection. Use it as before
+    (`with get_connection() as conn:` commits or rolls back) but do not close it.
+    """
+    return get_pool().connection()
+
+
+_savepoint_ids = itertools.count(1)
+
+
+@contextmanager
+def transaction(immediate: bool = True):
+    """
+    Explicit transaction on the calling thread's connection: commits on success, rolls
+    back on any exception. immediate=True takes the write lock up front (BEGIN IMMEDIATE),
+    so a check-then-write inside the block cannot race another writer. Nested use runs
+    inside a SAVEPOINT of the outer transaction.
+    """
+    conn = get_connection()
+    if conn.in_transaction:
+        name = f"sp_{next(_savepoint_ids)}"
+        conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute(f"ROLLBACK TO {name}")
+            conn.execute(f"RELEASE {name}")
+            raise
+        conn.execute(f"RELEASE {name}")
+        return
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def set_profile(profile: str = None) -> str:
+    """
+    Switch the per-connection PRAGMAs to another profile without closing the pool.
+    Each pooled connection picks the new settings up on its next get_connection().
+    """
+    profile = resolve_profile(profile)
+    _pool_settings["profile"] = profile
+    get_pool().profile = profile
+    return profile
+
+
+def checkpoint(mode: str = "PASSIVE"):
+    """Checkpoint the WAL into the main database file (e.g. after a bulk load)."""
+    return get_pool().checkpoint(mode)
+
+
+def release_connection():
+    """Return the calling thread's connection to the pool; for background threads that are finishing."""
+    pool = _pool
+    if pool is not None:
+        pool.release()
+
+
+def close_pool():
+    """Close every pooled connection. Registered with atexit; safe to call more than once."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+
+
+atexit.register(close_pool)
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
 
-def init_db():
+def init_db(profile: str = None):
+    """
+    Create the schema and switch the database to the requested performance profile
+    (see PROFILES / resolve_profile).
+    """
+    profile = set_profile(profile)
     conn = get_connection()
+    # journal_mode is stored in the file, so WAL sticks for every later connection
+    conn.execute(f"PRAGMA journal_mode = {PROFILES[profile]['journal_mode']};")
     cur = conn.cursor()
 
     cur.execute("""
@@ -85,4 +426,4 @@ def init_db():
         cur.executemany("INSERT INTO sizes(name) VALUES(?)", [("Small",),("Medium",),("Large",)])
 
     conn.commit()
-    conn.close()
+    migrations.upgrade(conn)
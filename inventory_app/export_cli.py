@@ -0,0 +1,138 @@
+"""
+Bulk invoice export / reprint.
+
+    python export_invoices.py --from 2025-08-01 --to 2025-08-31 --zip exports/2025-08.zip
+    python export_invoices.py --ids 12 15 20-40 --format html --out reprints
+
+Invoice ids are streamed from the database and handed to a pool of worker processes;
+each worker loads one invoice at a time with repository.get_invoice and renders it, so
+memory stays flat however many invoices are in the range.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import zipfile
+from datetime import date, timedelta
+from pathlib import Path
+
+from . import database
+from . import repository as repo
+from .utils import pdf_export
+
+# per-worker settings, filled in by _init_worker
+_worker = {}
+
+
+def _init_worker(db_path: str, out_dir: str, fmt: str, branding: dict):
+    database.configure_pool(db_path=db_path, size=1)
+    _worker.update(out_dir=Path(out_dir), fmt=fmt, branding=branding)
+
+
+def _export_one(invoice_id: int):
+    try:
+        invoice, items = repo.get_invoice(invoice_id)
+        if invoice is None:
+            return invoice_id, None, "not found"
+        path = pdf_export.export_invoice(invoice, items, _worker["out_dir"], _worker["branding"], fmt=_worker["fmt"])
+        return invoice_id, str(path), None
+    except Exception as ex:
+        return invoice_id, None, str(ex)
+
+
+def _parse_ids(values):
+    for value in values:
+        for part in str(value).split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if "-" in part:
+                lo, hi = part.split("-", 1)
+                yield from range(int(lo), int(hi) + 1)
+            else:
+                yield int(part)
+
+
+def _load_branding() -> dict:
+    try:
+        with open(database.CONFIG_PATH, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        return cfg if isinstance(cfg, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="export_invoices", description="Export or reprint invoices in bulk.")
+    sel = p.add_argument_group("selection (date range or ids)")
+    sel.add_argument("--from", dest="date_from", help="first day, YYYY-MM-DD (inclusive)")
+    sel.add_argument("--to", dest="date_to", help="last day, YYYY-MM-DD (inclusive)")
+    sel.add_argument("--ids", nargs="+", help="invoice ids, ranges allowed: 12 15 20-40")
+    p.add_argument("--format", choices=("pdf", "html"), default="pdf")
+    p.add_argument("--out", default=str(Path(__file__).resolve().parent / "exports"), help="output directory")
+    p.add_argument("--zip", dest="zip_path", help="also bundle the files into this zip (loose files are removed)")
+    p.add_argument("--keep-files", action="store_true", help="with --zip, keep the loose files too")
+    p.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    p.add_argument("--db", default=str(database.DB_PATH), help="database file (default: the app database)")
+    p.add_argument("--no-branding", action="store_true", help="omit the letterhead from config.json")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if not (args.ids or args.date_from or args.date_to):
+        print("Nothing selected: pass --from/--to and/or --ids", file=sys.stderr)
+        return 2
+
+    database.configure_pool(db_path=args.db)
+    database.init_db()
+    if args.ids:
+        invoice_ids = list(dict.fromkeys(_parse_ids(args.ids)))
+        total = len(invoice_ids)
+    else:
+        start = date.fromisoformat(args.date_from).isoformat() if args.date_from else None
+        end = (date.fromisoformat(args.date_to) + timedelta(days=1)).isoformat() if args.date_to else None
+        total = repo.count_invoices(start, end)
+        invoice_ids = repo.iter_invoice_ids(start, end)
+    if not total:
+        print("No invoices match.")
+        return 0
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    branding = {} if args.no_branding else _load_branding()
+    zf = zipfile.ZipFile(args.zip_path, "w", compression=zipfile.ZIP_DEFLATED) if args.zip_path else None
+
+    started = time.perf_counter()
+    done = failed = 0
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with ctx.Pool(max(1, args.workers), initializer=_init_worker,
+                      initargs=(args.db, str(out_dir), args.format, branding)) as pool:
+            for invoice_id, path, error in pool.imap_unordered(_export_one, invoice_ids, chunksize=16):
+                if error:
+                    failed += 1
+                    print(f"invoice {invoice_id}: {error}", file=sys.stderr)
+                else:
+                    done += 1
+                    if zf is not None:
+                        zf.write(path, arcname=Path(path).name)
+                        if not args.keep_files:
+                            os.remove(path)
+                if (done + failed) % 500 == 0:
+                    print(f"{done + failed}/{total} ...")
+    finally:
+        if zf is not None:
+            zf.close()
+        database.close_pool()
+
+    elapsed = time.perf_counter() - started
+    target = args.zip_path or out_dir
+    print(f"Exported {done} of {total} invoice(s) to {target} in {elapsed:.1f}s ({failed} failed)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
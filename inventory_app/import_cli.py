@@ -0,0 +1,65 @@
+"""
+Bulk stock import from the command line.
+
+    python import_stock.py delivery-2025-08-14.csv
+    python import_stock.py stocktake.csv --mode set --errors stocktake-errors.csv
+
+See importer.py for the CSV layout.
+"""
+import argparse
+import csv
+import sys
+
+from . import database
+from . import importer
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="import_stock", description="Import variant stock from a CSV file.")
+    p.add_argument("csv_path", help="CSV with product, rack, color, size, qty[, retail, wholesale]")
+    p.add_argument("--mode", choices=importer.MODES, default="restock",
+                   help="restock: add qty to stock (default); set: qty is the counted stock")
+    p.add_argument("--no-create", action="store_true", help="reject lines with unknown colors/sizes instead of adding them")
+    p.add_argument("--chunk-size", type=int, default=importer.DEFAULT_CHUNK_SIZE, help="rows per transaction")
+    p.add_argument("--errors", dest="errors_path", help="write rejected lines (line, error) to this CSV")
+    p.add_argument("--db", default=str(database.DB_PATH), help="database file (default: the app database)")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    database.configure_pool(db_path=args.db)
+    database.init_db()
+
+    shown = [0]
+
+    def progress(report, fraction):
+        # one line per 10% of the file
+        if fraction is not None and fraction < 1.0 and int(fraction * 10) > shown[0]:
+            shown[0] = int(fraction * 10)
+            print(f"{report.rows} rows read ({fraction:.0%}) ...")
+
+    try:
+        report = importer.import_stock_csv(args.csv_path, mode=args.mode, chunk_size=max(1, args.chunk_size),
+                                           create_missing=not args.no_create, progress=progress)
+    except (OSError, ValueError) as ex:
+        print(f"Import failed: {ex}", file=sys.stderr)
+        return 2
+    finally:
+        database.close_pool()
+
+    for line_no, message in report.errors[:20]:
+        print(f"line {line_no}: {message}", file=sys.stderr)
+    if len(report.errors) > 20:
+        print(f"... and {len(report.errors) - 20} more", file=sys.stderr)
+    if args.errors_path and report.errors:
+        with open(args.errors_path, "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["line", "error"])
+            w.writerows(report.errors)
+    print(report.summary())
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
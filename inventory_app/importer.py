@@ -0,0 +1,250 @@
+"""
+Bulk stock import from CSV (delivery notes, stock-takes).
+
+    product,rack,color,size,qty,retail,wholesale
+    Red T-Shirt,A1,Red,M,24,12.50,9.00
+
+The file is read as a stream and written in chunks: colors, sizes and products are
+resolved through in-memory maps loaded once, and each chunk of variant rows is one
+executemany upsert inside one transaction. Bad lines are collected with their line
+number instead of stopping the import. Header names are case-insensitive;
+quantity/retail_price/wholesale_price are accepted as aliases, and the price columns
+are optional (existing prices are kept, new variants get 0).
+"""
+import csv
+import io
+import os
+import time
+
+from . import database
+from . import lookups
+from . import repository as repo
+
+MODES = ("restock", "set")   # add qty to stock | stock-take: qty is the counted stock
+DEFAULT_CHUNK_SIZE = 1000
+
+_ALIASES = {
+    "quantity": "qty",
+    "retail_price": "retail",
+    "wholesale_price": "wholesale",
+    "rack_number": "rack",
+    "name": "product",
+}
+
+_UPSERT = {
+    "restock": """
+        INSERT INTO product_variants(product_id, color_id, size_id, quantity, retail_price, wholesale_price)
+        VALUES (?1, ?2, ?3, ?4, COALESCE(?5, 0), COALESCE(?6, 0))
+        ON CONFLICT(product_id, color_id, size_id) DO UPDATE SET
+            quantity = quantity + excluded.quantity,
+            retail_price = COALESCE(?5, retail_price),
+            wholesale_price = COALESCE(?6, wholesale_price)
+    """,
+    "set": """
+        INSERT INTO product_variants(product_id, color_id, size_id, quantity, retail_price, wholesale_price)
+        VALUES (?1, ?2, ?3, ?4, COALESCE(?5, 0), COALESCE(?6, 0))
+        ON CONFLICT(product_id, color_id, size_id) DO UPDATE SET
+            quantity = excluded.quantity,
+            retail_price = COALESCE(?5, retail_price),
+            wholesale_price = COALESCE(?6, wholesale_price)
+    """,
+}
+
+
+_UPDATE = {
+    mode: f"""
+        UPDATE product_variants
+           SET quantity = {expr},
+               retail_price = COALESCE(?2, retail_price),
+               wholesale_price = COALESCE(?3, wholesale_price)
+         WHERE product_id = ?4 AND color_id = ?5 AND size_id = ?6
+    """
+    for mode, expr in (("restock", "quantity + ?1"), ("set", "?1"))
+}
+
+
+class ImportReport:
+    """Outcome of an import: counts, per-line errors [(line_no, message)] and timing."""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.errors = []
+        self.created_products = 0
+        self.cancelled = False
+        self.elapsed = 0.0
+
+    def summary(self) -> str:
+        text = (f"{self.imported} of {self.rows} row(s) imported, {len(self.errors)} error(s), "
+                f"{self.created_products} new product(s) in {self.elapsed:.1f}s")
+        return text + " (cancelled)" if self.cancelled else text
+
+
+class _Resolver:
+    """name -> id maps for colors, sizes and (name, rack) -> id for products, filled on demand."""
+
+    def __init__(self, conn, create_missing: bool):
+        self.create_missing = create_missing
+        self.colors = lookups.name_map("colors")
+        self.sizes = lookups.name_map("sizes")
+        self.products = {(name, rack or ""): pid
+                         for pid, name, rack in conn.execute("SELECT id, name, rack_number FROM products")}
+        self.max_product_id = max(self.products.values(), default=0)
+        self.created_products = 0
+        self.created_dimensions = set()   # tables to drop from the lookup cache afterwards
+
+    def _dimension(self, conn, table: str, cache: dict, name: str) -> int:
+        dim_id = cache.get(name)
+        if dim_id is None:
+            if not self.create_missing:
+                raise ValueError(f"unknown {table[:-1]} '{name}'")
+            conn.execute(f"INSERT OR IGNORE INTO {table}(name) VALUES (?)", (name,))
+            dim_id = cache[name] = conn.execute(f"SELECT id FROM {table} WHERE name=?", (name,)).fetchone()[0]
+            self.created_dimensions.add(table)
+        return dim_id
+
+    def color(self, conn, name: str) -> int:
+        return self._dimension(conn, "colors", self.colors, name)
+
+    def size(self, conn, name: str) -> int:
+        return self._dimension(conn, "sizes", self.sizes, name)
+
+    def product(self, conn, name: str, rack: str) -> int:
+        pid = self.products.get((name, rack))
+        if pid is None:
+            # upsert: another writer may have created it since the maps were loaded
+            pid = self.products[(name, rack)] = repo.upsert_product(conn, name, rack)
+            if pid > self.max_product_id:
+                self.created_products += 1
+        return pid
+
+
+def _parse(row: dict, mode: str):
+    """(product, rack, color, size, qty, retail, wholesale) from one CSV record; raises ValueError."""
+    product = (row.get("product") or "").strip()
+    color = (row.get("color") or "").strip()
+    size = (row.get("size") or "").strip()
+    if not (product and color and size):
+        raise ValueError("product, color and size are required")
+    try:
+        qty = int((row.get("qty") or "").strip())
+    except ValueError:
+        raise ValueError(f"quantity '{row.get('qty')}' is not a whole number") from None
+    if qty < 0 or (qty == 0 and mode == "restock"):
+        raise ValueError(f"quantity must be {'positive' if mode == 'restock' else 'zero or more'}")
+    prices = []
+    for key in ("retail", "wholesale"):
+        raw = (row.get(key) or "").strip()
+        if not raw:
+            prices.append(None)
+            continue
+        try:
+            price = float(raw)
+        except ValueError:
+            raise ValueError(f"{key} price '{raw}' is not a number") from None
+        if price < 0:
+            raise ValueError(f"{key} price cannot be negative")
+        prices.append(price)
+    return product, (row.get("rack") or "").strip(), color, size, qty, prices[0], prices[1]
+
+
+def _normalise_header(fields):
+    names = []
+    for f in fields or ():
+        key = (f or "").strip().lower()
+        names.append(_ALIASES.get(key, key))
+    missing = {"product", "color", "size", "qty"} - set(names)
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(sorted(missing))}")
+    return names
+
+
+def import_stock_csv(source, mode: str = "restock", chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     create_missing: bool = True, progress=None, cancel=None) -> ImportReport:
+    """
+    Import variant stock from `source` (a path or an open text file).
+
+    mode="restock" adds each qty to the variant's stock, mode="set" replaces it (stock-take).
+    Unknown products are created; unknown colors/sizes are created too unless
+    create_missing=False, in which case those lines are reported as errors.
+    progress(report, fraction) is called after every committed chunk (fraction is None
+    when the size of the input is unknown). Setting the threading.Event `cancel` stops
+    after the current chunk; chunks already committed stay.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown import mode '{mode}'")
+    report = ImportReport()
+    started = time.perf_counter()
+    own = isinstance(source, (str, os.PathLike))
+    resolver = None
+    f = open(source, "r", encoding="utf-8-sig", newline="") if own else source
+    try:
+        size = os.fstat(f.fileno()).st_size if own else None
+        reader = csv.reader(f)
+        fields = _normalise_header(next(reader, None))
+        with database.get_connection() as conn:
+            resolver = _Resolver(conn, create_missing)
+        chunk = []
+        for values in reader:
+            line_no = reader.line_num
+            if not any(v.strip() for v in values):
+                continue
+            report.rows += 1
+            try:
+                chunk.append((line_no, _parse(dict(zip(fields, values)), mode)))
+            except ValueError as ex:
+                report.errors.append((line_no, str(ex)))
+            if len(chunk) >= chunk_size:
+                _write_chunk(chunk, resolver, mode, report)
+                chunk = []
+                if progress:
+                    progress(report, _fraction(f, size))
+                if cancel is not None and cancel.is_set():
+                    report.cancelled = True
+                    break
+        if chunk and not report.cancelled:
+            _write_chunk(chunk, resolver, mode, report)
+        report.created_products = resolver.created_products
+    finally:
+        if resolver is not None:
+            for table in resolver.created_dimensions:
+                lookups.invalidate(table)
+        if own:
+            f.close()
+    report.errors.sort()
+    report.elapsed = time.perf_counter() - started
+    if progress:
+        progress(report, 1.0)
+    return report
+
+
+def _fraction(f, size):
+    if not size:
+        return None
+    try:
+        return min(1.0, f.buffer.tell() / size)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+
+
+def _write_chunk(chunk, resolver: _Resolver, mode: str, report: ImportReport):
+    params = []
+    with database.transaction() as conn:
+        for line_no, (product, rack, color, size, qty, retail, wholesale) in chunk:
+            try:
+                color_id = resolver.color(conn, color)
+                size_id = resolver.size(conn, size)
+            except ValueError as ex:
+                report.errors.append((line_no, str(ex)))
+                continue
+            params.append((resolver.product(conn, product, rack), color_id, size_id, qty, retail, wholesale))
+        if database.SUPPORTS_UPSERT:
+            conn.executemany(_UPSERT[mode], params)
+        else:
+            # SQLite < 3.24: make sure every variant exists, then apply the quantities and prices
+            conn.executemany(
+                """INSERT OR IGNORE INTO product_variants(product_id, color_id, size_id, quantity, retail_price, wholesale_price)
+                   VALUES (?, ?, ?, 0, COALESCE(?, 0), COALESCE(?, 0))""",
+                [(p, c, s, r, w) for p, c, s, _, r, w in params])
+            conn.executemany(_UPDATE[mode], [(q, r, w, p, c, s) for p, c, s, q, r, w in params])
+    report.imported += len(params)
@@ -0,0 +1,404 @@
+"""
+Query instrumentation for the repository layer.
+
+When enabled, the connection pool opens InstrumentedConnection objects: every
+statement that goes through execute/executemany/executescript, a cursor, commit or
+rollback is timed (execution plus fetching), its rows are counted and it is
+attributed to the first calling function outside this module and database.py
+(usually a repository function). A trace callback adds the statement text with its
+bound values and the number of trigger statements it set off.
+
+Per-statement totals are kept in memory (see stats(); the app shows them with
+Ctrl+Shift+Q). Statements slower than the threshold are also written as JSON lines
+to a rotating log file.
+
+Enable it before the pool is first used, either by calling enable() or through
+settings: the INVENTORY_SLOW_QUERY_MS environment variable (the threshold in ms), or
+"query_stats": {"enabled": true, "slow_ms": 100, "log": "...", "max_bytes": ...,
+"backups": ...} in config.json. When it is off, connections are plain sqlite3
+connections and nothing is measured.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Optional
+
+from . import database
+
+DEFAULT_SLOW_MS = 100.0
+LOG_PATH = Path(__file__).resolve().parent / "logs" / "slow_queries.log"
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUPS = 3
+RECENT_SLOW = 200   # slow statements kept in memory for the stats view
+
+_enabled = False
+_slow_s = DEFAULT_SLOW_MS / 1000.0
+_log_path = None
+_lock = threading.Lock()
+_stats = {}
+_recent_slow = deque(maxlen=RECENT_SLOW)
+_local = threading.local()
+_logger = logging.getLogger(__name__ + ".slow")
+_logger.propagate = False
+
+_SKIP_MODULES = {__name__, database.__name__, "contextlib"}
+_SPACES = re.compile(r"\s+")
+_PARAM_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def normalize(sql: str) -> str:
+    """Statement key: whitespace collapsed and placeholder lists (IN (?, ?, ...)) folded."""
+    return _PARAM_LIST.sub("?, ...", _SPACES.sub(" ", sql).strip())
+
+
+def _caller() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module not in _SKIP_MODULES:
+            return f"{module.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+class _Record:
+    __slots__ = ("sql", "caller", "elapsed", "rows", "expanded", "trigger_steps", "error")
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.caller = _caller()
+        self.elapsed = 0.0
+        self.rows = 0
+        self.expanded = None
+        self.trigger_steps = 0
+        self.error = None
+
+
+class _Stat:
+    __slots__ = ("calls", "total", "max", "rows", "errors", "callers")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.errors = 0
+        self.callers = Counter()
+
+
+def _trace(statement: str):
+    # runs inside execute on the same thread; statements from triggers start with "--"
+    rec = getattr(_local, "current", None)
+    if rec is None:
+        return
+    if statement.startswith("--"):
+        rec.trigger_steps += 1
+    elif rec.expanded is None and not (statement.startswith("BEGIN") and not rec.sql.lstrip().upper().startswith("BEGIN")):
+        # (sqlite3 may issue an implicit BEGIN before the statement itself)
+        rec.expanded = statement
+
+
+def _finish(rec: _Record):
+    _local.db_time = getattr(_local, "db_time", 0.0) + rec.elapsed
+    key = normalize(rec.sql)
+    with _lock:
+        st = _stats.get(key)
+        if st is None:
+            st = _stats[key] = _Stat()
+        st.calls += 1
+        st.total += rec.elapsed
+        st.max = max(st.max, rec.elapsed)
+        st.rows += max(rec.rows, 0)
+        st.errors += rec.error is not None
+        st.callers[rec.caller] += 1
+    if rec.elapsed >= _slow_s:
+        entry = {
+            "ms": round(rec.elapsed * 1000, 3),
+            "rows": rec.rows,
+            "caller": rec.caller,
+            "thread": threading.current_thread().name,
+            "sql": rec.expanded or _SPACES.sub(" ", rec.sql).strip(),
+        }
+        if rec.trigger_steps:
+            entry["trigger_steps"] = rec.trigger_steps
+        if rec.error is not None:
+            entry["error"] = rec.error
+        _recent_slow.append({"at": time.strftime("%Y-%m-%d %H:%M:%S"), **entry})
+        if _logger.handlers:
+            _logger.warning(json.dumps(entry, ensure_ascii=False))
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times execution and fetching of each statement and counts its rows."""
+
+    _record = None
+
+    def _run(self, method, sql, args):
+        self._done()
+        if not _enabled:
+            return method(self, sql, *args)
+        rec = _Record(sql)
+        _local.current = rec
+        t0 = time.perf_counter()
+        try:
+            return method(self, sql, *args)
+        except sqlite3.Error as ex:
+            rec.error = str(ex)
+            raise
+        finally:
+            rec.elapsed += time.perf_counter() - t0
+            _local.current = None
+            self._record = rec
+            if rec.error is not None or self.description is None:
+                rec.rows = max(self.rowcount, 0)
+                self._done()
+
+    def execute(self, sql, parameters=()):
+        return self._run(sqlite3.Cursor.execute, sql, (parameters,))
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(sqlite3.Cursor.executemany, sql, (seq_of_parameters,))
+
+    def executescript(self, sql_script):
+        return self._run(sqlite3.Cursor.executescript, sql_script, ())
+
+    def _done(self):
+        rec = self._record
+        if rec is not None:
+            self._record = None
+            _finish(rec)
+
+    def fetchone(self):
+        rec = self._record
+        if rec is None:
+            return super().fetchone()
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        rec.elapsed += time.perf_counter() - t0
+        if row is None:
+            self._done()
+        else:
+            rec.rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rec = self._record
+        if rec is None:
+            return super().fetchmany(size)
+        t0 = time.perf_counter()
+        rows = super().fetchmany(size)
+        rec.elapsed += time.perf_counter() - t0
+        rec.rows += len(rows)
+        if len(rows) < size:
+            self._done()
+        return rows
+
+    def fetchall(self):
+        rec = self._record
+        if rec is None:
+            return super().fetchall()
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        rec.elapsed += time.perf_counter() - t0
+        rec.rows += len(rows)
+        self._done()
+        return rows
+
+    def __next__(self):
+        rec = self._record
+        if rec is None:
+            return super().__next__()
+        t0 = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            rec.elapsed += time.perf_counter() - t0
+            self._done()
+            raise
+        rec.elapsed += time.perf_counter() - t0
+        rec.rows += 1
+        return row
+
+    def close(self):
+        self._done()
+        super().close()
+
+    def __del__(self):
+        # conn.execute(...).fetchone() drops the cursor with rows left: count what was read
+        try:
+            self._done()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose statements, commits and rollbacks are recorded (see module docstring)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.set_trace_callback(_trace)
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def _timed(self, label, method):
+        if not _enabled or not self.in_transaction:
+            return method(self)
+        rec = _Record(label)
+        t0 = time.perf_counter()
+        try:
+            return method(self)
+        except sqlite3.Error as ex:
+            rec.error = str(ex)
+            raise
+        finally:
+            rec.elapsed = time.perf_counter() - t0
+            _finish(rec)
+
+    def commit(self):
+        return self._timed("COMMIT", sqlite3.Connection.commit)
+
+    def rollback(self):
+        return self._timed("ROLLBACK", sqlite3.Connection.rollback)
+
+    # the C implementation of `with conn:` commits without going through commit()
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+
+def resolve_settings() -> Optional[dict]:
+    """
+    Settings from INVENTORY_SLOW_QUERY_MS (enables with that threshold), else from
+    "query_stats" in config.json; None when instrumentation is not switched on.
+    A relative "log" path is taken relative to the directory of config.json.
+    """
+    env = os.environ.get("INVENTORY_SLOW_QUERY_MS")
+    if env:
+        try:
+            return {"slow_ms": float(env)}
+        except ValueError:
+            raise ValueError(f"INVENTORY_SLOW_QUERY_MS must be a number of milliseconds, got '{env}'") from None
+    try:
+        with open(database.CONFIG_PATH, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+    except (OSError, ValueError):
+        return None
+    section = cfg.get("query_stats") if isinstance(cfg, dict) else None
+    if not isinstance(section, dict) or not section.get("enabled"):
+        return None
+    settings = {k: section[k] for k in ("slow_ms", "log", "max_bytes", "backups") if k in section}
+    if settings.get("log"):
+        # relative to config.json, not to wherever the app was started from
+        settings["log"] = database.CONFIG_PATH.parent / settings["log"]
+    return settings
+
+
+def enable(slow_ms: float = DEFAULT_SLOW_MS, log=LOG_PATH, max_bytes: int = LOG_MAX_BYTES,
+           backups: int = LOG_BACKUPS):
+    """
+    Start recording. The pool is reconfigured to open instrumented connections (its
+    current connections are closed), so call this at startup, before other threads
+    use the database. log=None keeps slow statements in memory only.
+    """
+    global _enabled, _slow_s, _log_path
+    _slow_s = float(slow_ms) / 1000.0
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+    _log_path = None
+    if log:
+        _log_path = Path(log)
+        _log_path.parent.mkdir(parents=True, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(_log_path, maxBytes=int(max_bytes),
+                                                       backupCount=int(backups), encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        _logger.addHandler(handler)
+        _logger.setLevel(logging.WARNING)
+    if not _enabled:
+        database.configure_pool(factory=InstrumentedConnection)
+    _enabled = True
+
+
+def enable_from_settings() -> bool:
+    """enable() with resolve_settings(); returns whether instrumentation is now on."""
+    settings = resolve_settings()
+    if settings is None:
+        return False
+    enable(**settings)
+    return True
+
+
+def disable():
+    """Stop recording; open connections stay instrumented but skip all measuring."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def settings() -> dict:
+    return {"enabled": _enabled, "slow_ms": _slow_s * 1000.0, "log": str(_log_path) if _log_path else None}
+
+
+def stats(sort: str = "total", limit: Optional[int] = None) -> list:
+    """
+    Per-statement totals, largest first by `sort` (total, calls, max, avg, rows):
+    [{sql, calls, total_ms, avg_ms, max_ms, rows, errors, callers: [(caller, calls)]}]
+    """
+    with _lock:
+        items = [(sql, st.calls, st.total, st.max, st.rows, st.errors, st.callers.most_common(5))
+                 for sql, st in _stats.items()]
+    rows = [{
+        "sql": sql,
+        "calls": calls,
+        "total_ms": round(total * 1000, 3),
+        "avg_ms": round(total * 1000 / calls, 3) if calls else 0.0,
+        "max_ms": round(mx * 1000, 3),
+        "rows": nrows,
+        "errors": errors,
+        "callers": callers,
+    } for sql, calls, total, mx, nrows, errors, callers in items]
+    key = {"total": "total_ms", "calls": "calls", "max": "max_ms", "avg": "avg_ms", "rows": "rows"}[sort]
+    rows.sort(key=lambda r: r[key], reverse=True)
+    return rows[:limit] if limit else rows
+
+
+def thread_db_time() -> float:
+    """Seconds the calling thread has spent in recorded statements so far (for per-action deltas)."""
+    return getattr(_local, "db_time", 0.0)
+
+
+def recent_slow() -> list:
+    """The latest slow statements (newest last), as written to the log."""
+    with _lock:
+        return list(_recent_slow)
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _recent_slow.clear()
@@ -0,0 +1,368 @@
+"""
+In-memory columnar index behind the inventory grid's client-side filters.
+
+Rows are stored column by column: text columns are dictionary-encoded (each distinct
+value once, plus a small integer code per row), stock and price live in typed arrays.
+A filter is answered with byte masks (one byte per row, 1 = keep):
+
+ - a text filter scans the distinct values once (not the rows) and turns the matching
+   codes into a mask, either with bytes.translate() over the low/high byte planes of
+   the codes (one pass per 256 codes) or by filling the row runs of each matching
+   value (rows arrive sorted by product, so each product is one run), whichever is
+   cheaper for the query; typing a longer query only re-checks the previous matches;
+ - stock status uses masks kept up to date on every change;
+ - masks are intersected as big integers, and the result is wrapped in a FilteredView
+   that finds the n-th kept row on demand, so only the rows the grid shows are built.
+
+All of this runs in C-level bytes/int operations; Python only loops over distinct
+values and visible rows.
+"""
+from array import array
+from bisect import bisect_right
+
+
+def _as_int(mask) -> int:
+    return int.from_bytes(mask, "little")
+
+
+class _TextColumn:
+    PLANE_LIMIT = 1 << 16
+    # rough cost of filling one row run vs. one translate+convert pass over a code plane
+    RUNS_PER_PASS = 600
+
+    def __init__(self):
+        self.values = []          # code -> original string
+        self.lowered = []         # code -> lower-cased string
+        self.lookup = {}          # original string -> code
+        self.codes = array("I")   # row -> code
+        self.runs = []            # code -> [start, end, start, end, ...] row ranges
+        self.live = array("i")    # code -> number of live rows
+        # row -> low / high byte of the code, while codes fit in two bytes
+        self.lo = bytearray()
+        self.hi = bytearray()
+        self._cache = ("", None, 0)  # (query, matching codes, len(values) when computed)
+
+    def _code(self, value: str) -> int:
+        code = self.lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self.lookup[value] = code
+            self.values.append(value)
+            self.lowered.append(value.lower())
+            self.runs.append([])
+            self.live.append(0)
+            if code >= self.PLANE_LIMIT:
+                self.lo = self.hi = None
+        return code
+
+    def append(self, value: str):
+        row = len(self.codes)
+        code = self._code(value)
+        self.codes.append(code)
+        if self.lo is not None:
+            self.lo.append(code & 0xFF)
+            self.hi.append(code >> 8)
+        runs = self.runs[code]
+        if runs and runs[-1] == row:
+            runs[-1] = row + 1
+        else:
+            runs.extend((row, row + 1))
+        self.live[code] += 1
+
+    def value(self, row: int) -> str:
+        return self.values[self.codes[row]]
+
+    def matching_codes(self, q: str) -> list:
+        last_q, last_codes, seen = self._cache
+        if last_codes is not None and last_q and last_q in q:
+            # typing narrows the query: only values that matched before (or are new) can match now
+            candidates = last_codes + list(range(seen, len(self.values)))
+        else:
+            candidates = range(len(self.values))
+        lowered = self.lowered
+        if isinstance(candidates, range):
+            codes = [c for c, v in enumerate(lowered) if q in v]
+        else:
+            codes = [c for c in candidates if q in lowered[c]]
+        self._cache = (q, codes, len(self.values))
+        return codes
+
+    def mask(self, q: str, ones: int) -> int:
+        """Rows whose value contains q, as a byte-per-row integer mask (`ones` is the all-rows mask)."""
+        codes = self.matching_codes(q)
+        invert = len(codes) * 2 > len(self.values)
+        if invert:
+            wanted = set(codes)
+            codes = [c for c in range(len(self.values)) if c not in wanted]
+        all_runs = self.runs
+        runs = sum([len(all_runs[c]) for c in codes]) // 2
+        groups = {}
+        if self.lo is not None and runs > self.RUNS_PER_PASS:
+            for c in codes:
+                groups.setdefault(c >> 8, bytearray(256))[c & 0xFF] = 1
+        if groups and len(groups) * self.RUNS_PER_PASS < runs:
+            mask = self._plane_mask(groups)
+        else:
+            mask = self._runs_mask(codes)
+        return ones ^ mask if invert else mask
+
+    def _plane_mask(self, groups) -> int:
+        mask = 0
+        for h, table in groups.items():
+            part = _as_int(self.lo.translate(table))
+            if len(self.values) > 256:
+                same_hi = bytearray(256)
+                same_hi[h] = 1
+                part &= _as_int(self.hi.translate(same_hi))
+            mask |= part
+        return mask
+
+    def _runs_mask(self, codes) -> int:
+        n = len(self.codes)
+        mask = bytearray(n)
+        ones = memoryview(b"\x01" * n)
+        start = end = 0
+        for c in codes:
+            runs = self.runs[c]
+            for i in range(0, len(runs), 2):
+                s, e = runs[i], runs[i + 1]
+                if s == end:
+                    # neighbouring products are neighbouring runs: fill them in one go
+                    end = e
+                    continue
+                mask[start:end] = ones[:end - start]
+                start, end = s, e
+        mask[start:end] = ones[:end - start]
+        return _as_int(mask)
+
+    def matches(self, row: int, q: str) -> bool:
+        return q in self.lowered[self.codes[row]]
+
+
+class FilteredView:
+    """
+    The rows kept by a filter, in index order, as a lazy sequence: len(), view[i]
+    (the i-th kept row as a dict) and O(blocks) add/discard when a single row's
+    membership changes.
+    """
+    BLOCK = 512
+
+    def __init__(self, index, mask):
+        self.index = index
+        self.mask = bytearray(mask)
+        block = self.BLOCK
+        self._counts = [self.mask.count(1, i, i + block) for i in range(0, len(self.mask), block)]
+        self._rebuild_prefix()
+        self._cursor = (-1, -1)  # (i, row) of the last lookup, for sequential access
+
+    def _rebuild_prefix(self):
+        prefix = [0]
+        for c in self._counts:
+            prefix.append(prefix[-1] + c)
+        self._prefix = prefix
+        self._cursor = (-1, -1)
+
+    def __len__(self):
+        return self._prefix[-1]
+
+    def position(self, i: int) -> int:
+        """Index row of the i-th kept row."""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        last_i, last_row = self._cursor
+        if last_i >= 0 and 0 < i - last_i <= 8:
+            row = last_row
+            for _ in range(i - last_i):
+                row = self.mask.index(1, row + 1)
+        else:
+            block = bisect_right(self._prefix, i) - 1
+            row = block * self.BLOCK - 1
+            for _ in range(i - self._prefix[block] + 1):
+                row = self.mask.index(1, row + 1)
+        self._cursor = (i, row)
+        return row
+
+    def __getitem__(self, i: int) -> dict:
+        return self.index.row(self.position(i))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __contains__(self, row: int) -> bool:
+        return 0 <= row < len(self.mask) and self.mask[row] == 1
+
+    def rank(self, row: int) -> int:
+        """Position in this view of index row `row` (which must be kept)."""
+        block = row // self.BLOCK
+        return self._prefix[block] + self.mask.count(1, block * self.BLOCK, row)
+
+    def _set(self, row: int, keep: int):
+        if row >= len(self.mask):
+            self.mask.extend(bytes(row + 1 - len(self.mask)))
+            self._counts.extend([0] * (len(self.mask) // self.BLOCK + 1 - len(self._counts)))
+        if self.mask[row] == keep:
+            return
+        self.mask[row] = keep
+        self._counts[row // self.BLOCK] += 1 if keep else -1
+        self._rebuild_prefix()
+
+    def add(self, row: int):
+        self._set(row, 1)
+
+    def discard(self, row: int):
+        self._set(row, 0)
+
+
+class InventoryIndex:
+    TEXT_COLUMNS = ("product", "rack", "color", "size")
+
+    def __init__(self, rows=(), low_limit: int = 5):
+        self.low_limit = low_limit
+        self.ids = []
+        self.text = {name: _TextColumn() for name in self.TEXT_COLUMNS}
+        self.stock = array("q")
+        self.price = array("d")
+        self.alive = bytearray()
+        self.low = bytearray()
+        self.out = bytearray()
+        self._positions = {}
+        self._counts = {"variants": 0, "low": 0, "out": 0, "products": 0}
+        self._masks = {}   # integer forms of alive/low/out (and all-ones), dropped on any change
+        self.extend(rows)
+
+    # ---- loading
+    def extend(self, rows):
+        for r in rows:
+            self.append(r)
+
+    def append(self, row: dict) -> int:
+        """Add a variant dict (variant_id, product, color, size, rack, stock, price); returns its row."""
+        pos = len(self.ids)
+        self._masks.clear()
+        self.ids.append(row["variant_id"])
+        self._positions[row["variant_id"]] = pos
+        products = self.text["product"]
+        for name, col in self.text.items():
+            col.append(row.get(name) or "")
+        if products.live[products.codes[pos]] == 1:
+            self._counts["products"] += 1
+        stock = int(row.get("stock") or 0)
+        self.stock.append(stock)
+        self.price.append(float(row.get("price") or 0.0))
+        self.alive.append(1)
+        self.low.append(0)
+        self.out.append(0)
+        self._set_stock_flags(pos, stock)
+        self._counts["variants"] += 1
+        return pos
+
+    def __len__(self):
+        """Number of rows ever added (deleted rows keep their slot)."""
+        return len(self.ids)
+
+    # ---- single-row access and updates
+    def position(self, variant_id):
+        return self._positions.get(variant_id)
+
+    def row(self, pos: int) -> dict:
+        return {
+            "variant_id": self.ids[pos],
+            "product": self.text["product"].value(pos),
+            "color": self.text["color"].value(pos),
+            "size": self.text["size"].value(pos),
+            "rack": self.text["rack"].value(pos),
+            "stock": self.stock[pos],
+            "price": self.price[pos],
+            "_pos": pos,
+        }
+
+    def _set_stock_flags(self, pos: int, stock: int):
+        low = 1 if 0 < stock < self.low_limit else 0
+        out = 1 if stock == 0 else 0
+        if low != self.low[pos] or out != self.out[pos]:
+            self._masks.clear()
+        self._counts["low"] += low - self.low[pos]
+        self._counts["out"] += out - self.out[pos]
+        self.low[pos] = low
+        self.out[pos] = out
+
+    def update(self, pos: int, stock: int = None, price: float = None):
+        if not self.alive[pos]:
+            raise KeyError(self.ids[pos])
+        if stock is not None:
+            self.stock[pos] = int(stock)
+            self._set_stock_flags(pos, int(stock))
+        if price is not None:
+            self.price[pos] = float(price)
+
+    def remove(self, pos: int):
+        if not self.alive[pos]:
+            return
+        self._counts["low"] -= self.low[pos]
+        self._counts["out"] -= self.out[pos]
+        self.low[pos] = self.out[pos] = 0
+        self.alive[pos] = 0
+        self._masks.clear()
+        self._counts["variants"] -= 1
+        products = self.text["product"]
+        for col in self.text.values():
+            col.live[col.codes[pos]] -= 1
+        if products.live[products.codes[pos]] == 0:
+            self._counts["products"] -= 1
+        del self._positions[self.ids[pos]]
+
+    def restore(self, pos: int):
+        """Undo remove(pos) (e.g. when the delete could not be persisted)."""
+        if self.alive[pos]:
+            return
+        self.alive[pos] = 1
+        self._masks.clear()
+        self._counts["variants"] += 1
+        products = self.text["product"]
+        for col in self.text.values():
+            col.live[col.codes[pos]] += 1
+        if products.live[products.codes[pos]] == 1:
+            self._counts["products"] += 1
+        self._positions[self.ids[pos]] = pos
+        self._set_stock_flags(pos, self.stock[pos])
+
+    # ---- filtering
+    def filter(self, product: str = "", rack: str = "", color: str = "", size: str = "", stock: str = "all") -> FilteredView:
+        """
+        Rows whose product/rack/color/size contain the given (case-insensitive) text and
+        whose stock matches 'all' | 'low' | 'out', in load order.
+        """
+        mask = self._mask(stock if stock in ("low", "out") else "alive")
+        for name, q in (("product", product), ("rack", rack), ("color", color), ("size", size)):
+            q = (q or "").strip().lower()
+            if q:
+                mask &= self.text[name].mask(q, self._mask("ones"))
+        return FilteredView(self, mask.to_bytes(len(self.ids), "little"))
+
+    def _mask(self, name: str) -> int:
+        mask = self._masks.get(name)
+        if mask is None:
+            source = b"\x01" * len(self.ids) if name == "ones" else getattr(self, name)
+            mask = self._masks[name] = _as_int(source)
+        return mask
+
+    def matches(self, pos: int, product: str = "", rack: str = "", color: str = "", size: str = "", stock: str = "all") -> bool:
+        if not self.alive[pos]:
+            return False
+        if stock == "low" and not self.low[pos]:
+            return False
+        if stock == "out" and not self.out[pos]:
+            return False
+        for name, q in (("product", product), ("rack", rack), ("color", color), ("size", size)):
+            q = (q or "").strip().lower()
+            if q and not self.text[name].matches(pos, q):
+                return False
+        return True
+
+    # ---- counters
+    def summary(self) -> dict:
+        """{'products', 'variants', 'low', 'out'} over live rows, maintained incrementally."""
+        return dict(self._counts)
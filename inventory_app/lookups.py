@@ -0,0 +1,91 @@
+"""
+Process-wide cache of the small dimension tables (colors, sizes).
+
+Every dialog open and save used to query these tables, though they change rarely.
+The cache keeps name -> id, id -> name and the sorted name list per table, and is
+checked for staleness cheaply on each use:
+
+ - add_color/add_size (and the CSV importer) call invalidate() after their own writes;
+ - PRAGMA data_version on the calling thread's connection changes whenever another
+   connection (another thread's pooled connection or another process) commits, and
+   only then is a fingerprint of the table (row count, max id) compared, so invoices
+   and stock changes don't throw the cache away.
+"""
+import threading
+from typing import Dict, List, Optional
+
+from . import database
+
+TABLES = ("colors", "sizes")
+
+
+class _Dimension:
+    def __init__(self, table: str):
+        self.table = table
+        self.by_name: Dict[str, int] = {}
+        self.by_id: Dict[int, str] = {}
+        self.names: List[str] = []
+        self.fingerprint = None   # None = not loaded / invalidated
+
+    def _fingerprint(self, conn):
+        return tuple(conn.execute(f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {self.table}").fetchone())
+
+    def load(self, conn):
+        rows = conn.execute(f"SELECT id, name FROM {self.table} ORDER BY name").fetchall()
+        self.by_name = {name: did for did, name in rows}
+        self.by_id = {did: name for did, name in rows}
+        self.names = [name for _, name in rows]
+        self.fingerprint = self._fingerprint(conn)
+
+    def stale(self, conn) -> bool:
+        return self.fingerprint is None or self._fingerprint(conn) != self.fingerprint
+
+
+_lock = threading.Lock()
+_dimensions = {t: _Dimension(t) for t in TABLES}
+# id(connection) -> (connection, last PRAGMA data_version read on it); the connection is
+# kept so a new connection that reuses a closed one's id() is not mistaken for it
+_seen_versions: Dict[int, tuple] = {}
+
+
+def _get(table: str) -> _Dimension:
+    dim = _dimensions[table]
+    # no `with conn:` here: callers may be inside a transaction on this same connection
+    conn = database.get_connection()
+    with _lock:
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        changed_elsewhere = _seen_versions.get(id(conn)) != (conn, version)
+        _seen_versions[id(conn)] = (conn, version)
+        if dim.fingerprint is None or (changed_elsewhere and dim.stale(conn)):
+            dim.load(conn)
+        return dim
+
+
+def invalidate(table: Optional[str] = None):
+    """Drop one table's cached maps (or all of them); the next lookup reloads."""
+    with _lock:
+        for t in ([table] if table else TABLES):
+            _dimensions[t].fingerprint = None
+
+
+def warm():
+    """Load every table now (at startup), so the first dialog doesn't pay for it."""
+    for t in TABLES:
+        _get(t)
+
+
+def names(table: str) -> List[str]:
+    return list(_get(table).names)
+
+
+def id_for(table: str, name: str) -> Optional[int]:
+    return _get(table).by_name.get(name)
+
+
+def name_for(table: str, dim_id: int) -> Optional[str]:
+    return _get(table).by_id.get(dim_id)
+
+
+def name_map(table: str) -> Dict[str, int]:
+    """Copy of the name -> id map (for bulk resolution without a call per row)."""
+    return dict(_get(table).by_name)
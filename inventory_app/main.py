@@ -1,54 +1,101 @@
+import time
+_T0 = time.perf_counter()
+
 import sys
 import os
+import argparse
 import importlib
 
-def _import_modules():
-    # Try relative (package) import first
-    try:
-        from . import database  # type: ignore
-        from .ui import main_window as main_window_mod  # type: ignore
-        return database, main_window_mod
-    except Exception:
-        pass
-
-    # Fallback: adjust sys.path so imports work when run as a script
-    this_dir = os.path.dirname(__file__)                # .../inventory_app
-    project_root = os.path.dirname(this_dir)            # .../inventory_app_modular
-    # prefer project_root on sys.path so 'inventory_app' package imports work
-    if project_root not in sys.path:
-        sys.path.insert(0, project_root)
-    if this_dir not in sys.path:
-        sys.path.insert(0, this_dir)
-
-    # Try importing as package first
-    for pkg_prefix in ("inventory_app.", ""):
-        try:
-            database = importlib.import_module(f"{pkg_prefix}database")
-            main_window_mod = importlib.import_module(f"{pkg_prefix}ui.main_window")
-            return database, main_window_mod
-        except Exception:
-            continue
-
-    raise ImportError("Could not import database and ui.main_window modules (tried relative and script modes)")
-
-database, main_window_mod = _import_modules()
-
-# main_window module may define either MainWindow (older) or InventoryUI (beta). Pick what's available.
-MainClass = getattr(main_window_mod, "MainWindow", None) or getattr(main_window_mod, "InventoryUI", None)
-if MainClass is None:
-    raise ImportError("ui.main_window does not expose MainWindow or InventoryUI class. Check ui/main_window.py")
-
-def main():
-    # ensure DB is initialised if the function exists
+# part of the package: start it with run_app.py or python -m inventory_app.main
+from . import database
+from .ui import main_window as main_window_mod
+
+MainClass = main_window_mod.InventoryUI
+
+def _shutdown_background_work():
+    # let queued invoice exports finish; the module is only loaded once an invoice was saved
+    export_queue = sys.modules.get(f"{__package__}.utils.export_queue")
+    if export_queue is not None:
+        export_queue.shutdown_export_queue(wait=True)
+    database.close_pool()
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="Inventory management app")
+    parser.add_argument("--profile", action="store_true",
+                        help="profile UI actions and write the profiles to inventory_app/logs/profiles "
+                             "on exit (also INVENTORY_PROFILE=1, or INVENTORY_PROFILE=<dir> to write elsewhere)")
+    parser.add_argument("--startup-time", action="store_true",
+                        default=os.environ.get("INVENTORY_STARTUP_TIME", "0") not in ("", "0"),
+                        help="print how long each startup phase took and quit once the inventory "
+                             "has loaded (also INVENTORY_STARTUP_TIME=1)")
+    return parser.parse_args(argv)
+
+def _start_profiling(requested):
+    # instruments the window classes, so it has to run before the first window is created
+    profiling = importlib.import_module(".profiling", __package__)
+    out_dir = profiling.resolve_dir(requested)
+    if out_dir is None:
+        return None
+    invoice_window = importlib.import_module(".ui.invoice_window", __package__)
+    profiling.enable(MainClass, invoice_window.InvoiceWindow, out_dir=out_dir)
+    return profiling
+
+def _prepare_database():
+    # runs on a worker while the window paints
+    database.init_db()
+    # colors/sizes feed every product dialog; load them before the first one opens
+    importlib.import_module(".lookups", __package__).warm()
+
+class _StartupTimer:
+    """Milestones since main.py started importing, printed by --startup-time."""
+
+    def __init__(self):
+        self.marks = [("imports", time.perf_counter())]
+
+    def mark(self, name):
+        if all(name != n for n, _ in self.marks):
+            self.marks.append((name, time.perf_counter()))
+
+    def attach(self, app):
+        self.mark("window built")
+        app.bind("<Map>", lambda e: e.widget is app and app.after_idle(self.mark, "window painted"), add="+")
+        app.bind("<<InventoryShown>>", lambda e: self.mark("first page shown"), add="+")
+        app.bind("<<InventoryLoaded>>", lambda e: self._finish(app), add="+")
+
+    def _finish(self, app):
+        self.mark("inventory loaded")
+        self.report()
+        app.after_idle(app.destroy)
+
+    def report(self):
+        print("startup phase            since start   step", file=sys.stderr)
+        prev = _T0
+        for name, t in self.marks:
+            print(f"{name:24} {(t - _T0) * 1000:>8.0f} ms {(t - prev) * 1000:>7.0f} ms", file=sys.stderr)
+            prev = t
+
+def main(argv=None):
+    args = _parse_args(argv)
+    timer = _StartupTimer() if args.startup_time else None
+    profiling = None
     try:
-        if hasattr(database, "init_db"):
-            database.init_db()
-    except Exception:
-        # non-fatal: continue to allow UI to run in development
-        pass
+        # query instrumentation has to be on before the first connection is opened
+        importlib.import_module(".instrumentation", __package__).enable_from_settings()
+        profiling = _start_profiling(args.profile)
+    except Exception as ex:
+        # non-fatal: run without the diagnostics
+        print(f"Diagnostics not enabled: {ex}", file=sys.stderr)
 
-    app = MainClass()
-    app.mainloop()
+    # the window paints first; the database is prepared on a worker and the inventory loads after it
+    app = MainClass(prepare=_prepare_database)
+    if timer is not None:
+        timer.attach(app)
+    try:
+        app.mainloop()
+    finally:
+        _shutdown_background_work()
+        if profiling is not None:
+            print(f"Profiles written to {profiling.disable()}", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
@@ -57,4 +104,3 @@ else:
     __all__ = ["MainClass"]
     # Also expose database module for external use
     __all__.append("database")
-
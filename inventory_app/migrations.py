@@ -0,0 +1,381 @@
+"""
+Versioned schema migrations, applied in order by database.init_db().
+
+Each entry in MIGRATIONS is (version, description, steps). A step is either an SQL
+string or a callable taking the connection. Every migration runs in its own
+BEGIN IMMEDIATE transaction together with its schema_version row, so a crash or a
+second terminal starting at the same time can never apply one twice or half-way.
+Never edit a migration that has shipped; append a new one instead.
+"""
+import sqlite3
+from datetime import datetime
+from typing import List
+
+
+def has_fts5(conn: sqlite3.Connection) -> bool:
+    opts = {r[0] for r in conn.execute("PRAGMA compile_options").fetchall()}
+    return "ENABLE_FTS5" in opts
+
+
+_VARIANT_SEARCH_ROWS = """
+    SELECT v.id, p.name, p.rack_number, s.name, c.name
+      FROM product_variants v
+      JOIN products p ON p.id = v.product_id
+      JOIN sizes s ON s.id = v.size_id
+      JOIN colors c ON c.id = v.color_id
+"""
+
+
+def _create_variant_search(conn: sqlite3.Connection):
+    """
+    FTS5 index over product name, rack, size and color, one row per variant (rowid = variant id).
+    The text lives in four tables, so the index keeps its own copy and triggers keep it in sync.
+    Skipped when SQLite was built without FTS5; repository.search_products then falls back to LIKE.
+    """
+    if not has_fts5(conn):
+        return
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS variant_search USING fts5(
+            name, rack, size, color,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    refresh_variant = "INSERT INTO variant_search(rowid, name, rack, size, color)" + _VARIANT_SEARCH_ROWS
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_variant_search_ins AFTER INSERT ON product_variants BEGIN
+            {refresh_variant} WHERE v.id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_variant_search_del AFTER DELETE ON product_variants BEGIN
+            DELETE FROM variant_search WHERE rowid = OLD.id;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_variant_search_upd AFTER UPDATE OF product_id, color_id, size_id ON product_variants BEGIN
+            DELETE FROM variant_search WHERE rowid = OLD.id;
+            {refresh_variant} WHERE v.id = NEW.id;
+        END
+    """)
+    for table, fk, cols in (("products", "product_id", "name, rack_number"),
+                            ("sizes", "size_id", "name"),
+                            ("colors", "color_id", "name")):
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_variant_search_{table} AFTER UPDATE OF {cols} ON {table} BEGIN
+                DELETE FROM variant_search WHERE rowid IN (SELECT id FROM product_variants WHERE {fk} = NEW.id);
+                {refresh_variant} WHERE v.{fk} = NEW.id;
+            END
+        """)
+    conn.execute("DELETE FROM variant_search")
+    conn.execute(refresh_variant)
+
+
+def _merge_duplicate_products(conn: sqlite3.Connection):
+    """
+    Fold products sharing (name, rack) into the oldest one so the unique index can go on.
+    Their variants move over; where the surviving product already has that color/size the
+    stock is added up and invoice lines are pointed at the surviving variant. NULL racks
+    become '' first, because a unique index treats every NULL as distinct.
+    """
+    conn.execute("UPDATE products SET rack_number = '' WHERE rack_number IS NULL")
+    dups = conn.execute("""
+        SELECT p.id, k.keep_id
+          FROM products p
+          JOIN (SELECT name, rack_number, MIN(id) AS keep_id
+                  FROM products GROUP BY name, rack_number HAVING COUNT(*) > 1) k
+            ON k.name = p.name AND k.rack_number = p.rack_number
+         WHERE p.id <> k.keep_id
+    """).fetchall()
+    for dup_id, keep_id in dups:
+        variants = conn.execute(
+            "SELECT id, color_id, size_id, quantity FROM product_variants WHERE product_id=?", (dup_id,)
+        ).fetchall()
+        for vid, color_id, size_id, qty in variants:
+            target = conn.execute(
+                "SELECT id FROM product_variants WHERE product_id=? AND color_id=? AND size_id=?",
+                (keep_id, color_id, size_id)
+            ).fetchone()
+            if target is None:
+                conn.execute("UPDATE product_variants SET product_id=? WHERE id=?", (keep_id, vid))
+            else:
+                conn.execute("UPDATE product_variants SET quantity = quantity + ? WHERE id=?", (qty, target[0]))
+                conn.execute("UPDATE invoice_items SET variant_id=? WHERE variant_id=?", (target[0], vid))
+                conn.execute("DELETE FROM product_variants WHERE id=?", (vid,))
+        conn.execute("DELETE FROM products WHERE id=?", (dup_id,))
+
+
+def _guard_product_search_trigger(conn: sqlite3.Connection):
+    """
+    The get-or-create upsert rewrites name with its own value; only re-index the product's
+    variants when the name or rack really changed.
+    """
+    if not has_fts5(conn) or not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='trigger' AND name='trg_variant_search_products'").fetchone():
+        return
+    refresh_variant = "INSERT INTO variant_search(rowid, name, rack, size, color)" + _VARIANT_SEARCH_ROWS
+    conn.execute("DROP TRIGGER trg_variant_search_products")
+    conn.execute(f"""
+        CREATE TRIGGER trg_variant_search_products AFTER UPDATE OF name, rack_number ON products
+        WHEN OLD.name IS NOT NEW.name OR OLD.rack_number IS NOT NEW.rack_number BEGIN
+            DELETE FROM variant_search WHERE rowid IN (SELECT id FROM product_variants WHERE product_id = NEW.id);
+            {refresh_variant} WHERE v.product_id = NEW.id;
+        END
+    """)
+
+
+# summary key of an invoice's customer: linked customers by id, walk-ins by the typed name
+def _customer_key(inv: str) -> str:
+    return f"COALESCE('#' || {inv}.customer_id, 'n:' || LOWER(TRIM(COALESCE({inv}.customer_name, ''))))"
+
+
+def _line_delta(item: str, sign: str) -> str:
+    """Trigger statements adding (sign '+') or taking back ('-') one invoice line."""
+    inv = f"(SELECT id, substr(created_at, 1, 10) AS day, tax_rate, {_customer_key('invoices')} AS ckey, " \
+          f"customer_id, customer_name, customer_phone FROM invoices WHERE id = {item}.invoice_id)"
+    sql = ""
+    if sign == "+":
+        sql += f"""
+            INSERT OR IGNORE INTO sales_daily_variant(day, variant_id) SELECT day, {item}.variant_id FROM {inv};
+            INSERT OR IGNORE INTO sales_daily_customer(day, customer_key, customer_id, customer_name, customer_phone)
+                SELECT day, ckey, customer_id, customer_name, customer_phone FROM {inv};
+        """
+    sql += f"""
+        UPDATE sales_daily_variant
+           SET units = units {sign} {item}.quantity, revenue = revenue {sign} {item}.line_total
+         WHERE variant_id = {item}.variant_id AND day = (SELECT day FROM {inv});
+        UPDATE sales_daily_customer
+           SET units = units {sign} {item}.quantity,
+               subtotal = subtotal {sign} {item}.line_total,
+               tax = tax {sign} {item}.line_total * (SELECT tax_rate FROM {inv}) / 100.0
+         WHERE (day, customer_key) = (SELECT day, ckey FROM {inv});
+    """
+    if sign == "-":
+        sql += f"""
+            DELETE FROM sales_daily_variant
+             WHERE variant_id = {item}.variant_id AND day = (SELECT day FROM {inv}) AND units = 0;
+        """
+    return sql
+
+
+def _invoice_delta(inv: str, sign: str) -> str:
+    """Trigger statements adding or taking back a whole invoice (the invoice count and all its lines)."""
+    day = f"substr({inv}.created_at, 1, 10)"
+    lines = f"FROM invoice_items WHERE invoice_id = {inv}.id"
+    sql = ""
+    if sign == "+":
+        sql += f"""
+            INSERT OR IGNORE INTO sales_daily_variant(day, variant_id) SELECT DISTINCT {day}, variant_id {lines};
+            INSERT OR IGNORE INTO sales_daily_customer(day, customer_key, customer_id, customer_name, customer_phone)
+                VALUES ({day}, {_customer_key(inv)}, {inv}.customer_id, {inv}.customer_name, {inv}.customer_phone);
+        """
+    sql += f"""
+        UPDATE sales_daily_variant
+           SET units = units {sign} (SELECT SUM(quantity) {lines} AND variant_id = sales_daily_variant.variant_id),
+               revenue = revenue {sign} (SELECT SUM(line_total) {lines} AND variant_id = sales_daily_variant.variant_id)
+         WHERE day = {day} AND variant_id IN (SELECT variant_id {lines});
+        UPDATE sales_daily_customer
+           SET invoices = invoices {sign} 1,
+               units = units {sign} COALESCE((SELECT SUM(quantity) {lines}), 0),
+               subtotal = subtotal {sign} COALESCE((SELECT SUM(line_total) {lines}), 0),
+               tax = tax {sign} COALESCE((SELECT SUM(line_total) {lines}), 0) * {inv}.tax_rate / 100.0
+         WHERE day = {day} AND customer_key = {_customer_key(inv)};
+    """
+    if sign == "-":
+        sql += f"""
+            DELETE FROM sales_daily_variant WHERE day = {day} AND units = 0;
+            DELETE FROM sales_daily_customer WHERE day = {day} AND invoices = 0;
+        """
+    return sql
+
+
+def _create_sales_summaries(conn: sqlite3.Connection):
+    """
+    Daily sales per variant and per customer, so reports read pre-aggregated days instead
+    of every invoice line. Triggers on invoices and invoice_items keep them current for
+    any writer (create_invoice, deletes cascading from invoices, line edits); only the
+    invoice columns that place it (date, tax rate, customer) are re-applied on update.
+    Days are the first 10 characters of invoices.created_at.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily_variant (
+            day TEXT NOT NULL,
+            variant_id INTEGER NOT NULL,
+            units INTEGER NOT NULL DEFAULT 0,
+            revenue REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, variant_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sales_daily_customer (
+            day TEXT NOT NULL,
+            customer_key TEXT NOT NULL,
+            customer_id INTEGER,
+            customer_name TEXT,
+            customer_phone TEXT,
+            invoices INTEGER NOT NULL DEFAULT 0,
+            units INTEGER NOT NULL DEFAULT 0,
+            subtotal REAL NOT NULL DEFAULT 0,
+            tax REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, customer_key)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sales_daily_variant_variant ON sales_daily_variant(variant_id)")
+    triggers = {
+        "trg_sales_invoice_ins": ("AFTER INSERT ON invoices", _invoice_delta("NEW", "+")),
+        # BEFORE: the lines are still there to subtract; the cascade then finds no invoice
+        "trg_sales_invoice_del": ("BEFORE DELETE ON invoices", _invoice_delta("OLD", "-")),
+        "trg_sales_invoice_upd": ("AFTER UPDATE OF created_at, tax_rate, customer_id, customer_name ON invoices",
+                                  _invoice_delta("OLD", "-") + _invoice_delta("NEW", "+")),
+        "trg_sales_item_ins": ("AFTER INSERT ON invoice_items", _line_delta("NEW", "+")),
+        "trg_sales_item_del": ("AFTER DELETE ON invoice_items", _line_delta("OLD", "-")),
+        "trg_sales_item_upd": ("AFTER UPDATE OF invoice_id, variant_id, quantity, line_total ON invoice_items",
+                               _line_delta("OLD", "-") + _line_delta("NEW", "+")),
+    }
+    for name, (event, body) in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END")
+    rebuild_sales_summaries(conn)
+
+
+def rebuild_sales_summaries(conn: sqlite3.Connection, start: str = None, end: str = None):
+    """
+    Recompute the daily summaries for days in [start, end) (YYYY-MM-DD, either may be
+    None) from the invoices. Run inside a transaction; returns (variant rows, customer rows).
+    """
+    def day_range(col):
+        sql, params = "", []
+        if start:
+            sql += f" AND {col} >= ?"
+            params.append(start)
+        if end:
+            sql += f" AND {col} < ?"
+            params.append(end)
+        return sql, params
+
+    where, params = day_range("day")
+    conn.execute("DELETE FROM sales_daily_variant WHERE 1=1" + where, params)
+    conn.execute("DELETE FROM sales_daily_customer WHERE 1=1" + where, params)
+    # same days, but on created_at so idx_invoices_created_at narrows the scan
+    where, params = day_range("i.created_at")
+    variants = conn.execute(f"""
+        INSERT INTO sales_daily_variant(day, variant_id, units, revenue)
+        SELECT substr(i.created_at, 1, 10), ii.variant_id, SUM(ii.quantity), SUM(ii.line_total)
+          FROM invoices i
+          JOIN invoice_items ii ON ii.invoice_id = i.id
+         WHERE 1=1 {where}
+         GROUP BY 1, 2
+    """, params).rowcount
+    # invoices without lines still count as invoices, as they do in the triggers
+    customers = conn.execute(f"""
+        INSERT INTO sales_daily_customer(day, customer_key, customer_id, customer_name, customer_phone,
+                                         invoices, units, subtotal, tax)
+        SELECT substr(i.created_at, 1, 10), {_customer_key("i")}, i.customer_id,
+               MIN(i.customer_name), MIN(i.customer_phone), COUNT(DISTINCT i.id),
+               COALESCE(SUM(ii.quantity), 0), COALESCE(SUM(ii.line_total), 0),
+               COALESCE(SUM(ii.line_total * i.tax_rate / 100.0), 0)
+          FROM invoices i
+          LEFT JOIN invoice_items ii ON ii.invoice_id = i.id
+         WHERE 1=1 {where}
+         GROUP BY 1, 2
+    """, params).rowcount
+    return variants, customers
+
+
+MIGRATIONS = [
+    (1, "customers table and indexes for invoice, product and customer lookups", [
+        """
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            phone TEXT,
+            address TEXT,
+            type TEXT NOT NULL DEFAULT 'retail',
+            created_at TEXT NOT NULL
+        )
+        """,
+        # get_invoice / invoice reprints
+        "CREATE INDEX IF NOT EXISTS idx_invoice_items_invoice ON invoice_items(invoice_id)",
+        # stock history per variant and the FK check when a variant is deleted
+        "CREATE INDEX IF NOT EXISTS idx_invoice_items_variant ON invoice_items(variant_id)",
+        # get_or_create_product; also serves name-only lookups and ORDER BY name
+        "CREATE INDEX IF NOT EXISTS idx_products_name_rack ON products(name, rack_number)",
+        # list_variants size/color filters join sizes/colors by name, then variants by id
+        "CREATE INDEX IF NOT EXISTS idx_product_variants_size ON product_variants(size_id)",
+        "CREATE INDEX IF NOT EXISTS idx_product_variants_color ON product_variants(color_id)",
+        "CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name)",
+    ]),
+    (2, "FTS5 product search index kept in sync by triggers", [
+        _create_variant_search,
+    ]),
+    (3, "link invoices to customers and keep the UI invoice number", [
+        "ALTER TABLE invoices ADD COLUMN customer_id INTEGER REFERENCES customers(id)",
+        "ALTER TABLE invoices ADD COLUMN invoice_no TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_invoices_customer ON invoices(customer_id)",
+    ]),
+    (4, "index invoices by date for reprints and reports", [
+        "CREATE INDEX IF NOT EXISTS idx_invoices_created_at ON invoices(created_at)",
+    ]),
+    (5, "one product per (name, rack): merge duplicates, unique index for upserts", [
+        _guard_product_search_trigger,
+        _merge_duplicate_products,
+        "DROP INDEX IF EXISTS idx_products_name_rack",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_products_name_rack ON products(name, rack_number)",
+    ]),
+    (6, "daily sales summaries per variant and per customer, kept current by triggers", [
+        _create_sales_summaries,
+    ]),
+]
+
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def upgrade(conn: sqlite3.Connection, target: int = None) -> List[int]:
+    """
+    Apply every migration newer than the database's schema_version (up to `target`).
+    Returns the versions applied by this call; an up-to-date database is a no-op.
+    """
+    if conn.in_transaction:
+        conn.commit()
+    _ensure_version_table(conn)
+    applied = []
+    for version, description, steps in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if target is not None and version > target:
+            break
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # re-check under the write lock: another process may have just applied it
+            done = conn.execute("SELECT 1 FROM schema_version WHERE version=?", (version,)).fetchone()
+            if done:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(
+                "INSERT INTO schema_version(version, description, applied_at) VALUES(?,?,?)",
+                (version, description, datetime.now().isoformat(timespec="seconds"))
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+    if applied:
+        conn.execute("PRAGMA optimize;")
+    return applied
@@ -0,0 +1,46 @@
+"""
+Price resolution: which unit price a customer pays for a variant.
+
+Today that is the variant's retail or wholesale list price. PriceResolver is the one
+place the invoice UI (and later customer-specific price lists or promotions) asks,
+so callers never loop over get_product_price per row.
+"""
+from typing import Dict, Iterable, Optional
+
+from . import repository as repo
+
+PRICING_TYPES = ("retail", "wholesale")
+_PRICE_COLUMNS = {"retail": "retail_price", "wholesale": "wholesale_price"}
+
+
+class PriceResolver:
+    def __init__(self, pricing_type: str = "retail", customer_id: Optional[int] = None):
+        self.pricing_type = pricing_type if pricing_type in PRICING_TYPES else "retail"
+        self.customer_id = customer_id or None
+
+    def price_from_row(self, row: dict) -> Optional[float]:
+        """List price taken from a row that already carries retail_price/wholesale_price, else None."""
+        value = row.get(_PRICE_COLUMNS[self.pricing_type])
+        return None if value is None else float(value)
+
+    def resolve(self, variant_ids: Iterable[int]) -> Dict[int, float]:
+        """{variant_id: unit price} with a single bulk query."""
+        return repo.get_product_prices(variant_ids, self.pricing_type)
+
+    def resolve_rows(self, rows: Iterable[dict], id_key: str = "id") -> Dict[int, float]:
+        """
+        {variant_id: unit price} for search/list rows. Prices already present in the rows
+        are used as-is; only rows without them cost a (single, bulk) query.
+        """
+        prices = {}
+        missing = []
+        for row in rows:
+            vid = int(row[id_key])
+            price = self.price_from_row(row)
+            if price is None:
+                missing.append(vid)
+            else:
+                prices[vid] = price
+        if missing:
+            prices.update(self.resolve(missing))
+        return prices
@@ -0,0 +1,280 @@
+"""
+Opt-in profiling of UI actions, for sending in profiles from a slow terminal.
+
+Switch it on with `run_app.py --profile` or the INVENTORY_PROFILE environment
+variable ("1", or the directory to write to instead of PROFILE_DIR). The handlers in ACTIONS of InventoryUI
+and InvoiceWindow are then wrapped: each outermost call runs under a cProfile
+profiler kept per action (profilers accumulate over calls) and tracemalloc, and is
+recorded with
+
+ - ms: from the call until Tk is next idle, so the redraw it caused is included;
+ - db_ms / tk_ms: time in database statements on the UI thread (query
+   instrumentation is switched on for this) and the rest;
+ - mem_kb / peak_kb: traced memory kept by the action and its peak above the start.
+
+Handlers that wait on a prompt are not listed; the work after the prompt is
+(_update_row, _append_item, ...). Worker threads are not profiled; their statements
+show up in the query statistics (Ctrl+Shift+Q).
+
+Each window gets a small overlay (top right) with the last action; clicking it
+writes the profiles right away, right-clicking hides it. On exit dump() writes a
+directory under PROFILE_DIR with profile.pstats (all actions),
+actions/<action>.pstats, actions.jsonl and summary.txt.
+The .pstats files load in pstats, snakeviz, gprof2dot or flameprof (flame graphs).
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+import tkinter as tk
+import tracemalloc
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+from . import instrumentation
+
+PROFILE_DIR = Path(__file__).resolve().parent / "logs" / "profiles"
+HISTORY = 2000   # action records kept for actions.jsonl
+TRACE_FRAMES = 1
+
+# handlers recorded as actions, per class
+ACTIONS = {
+    "InventoryUI": ("_apply_filters", "_on_view_changed", "_on_page", "_reload_from_repo", "_update_row",
+                    "_remove_row", "_open_invoices", "_open_reports"),
+    "InvoiceWindow": ("_on_prod_search_key", "_show_prod_results", "_on_cust_search_key", "_show_cust_results",
+                      "_append_item", "_remove_selected", "_on_tax_change", "_save_invoice"),
+}
+
+_session = None
+
+
+class _Session:
+    def __init__(self, out_dir: Path):
+        self.out_dir = out_dir
+        self.started = time.strftime("%Y%m%d-%H%M%S")
+        self.profilers = {}
+        self.records = deque(maxlen=HISTORY)
+        self.counts = {}
+        self.depth = 0
+        self.listeners = []
+        self.patched = []
+        self.baseline = None
+
+    def run(self, name, fn, window, args, kwargs):
+        if self.depth:
+            return fn(window, *args, **kwargs)
+        profiler = self.profilers.get(name)
+        if profiler is None:
+            profiler = self.profilers[name] = cProfile.Profile()
+        mem_before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        db_before = instrumentation.thread_db_time()
+        self.depth += 1
+        t0 = time.perf_counter()
+        profiler.enable()
+        try:
+            return fn(window, *args, **kwargs)
+        finally:
+            profiler.disable()
+            self.depth -= 1
+            handler_s = time.perf_counter() - t0
+            current, peak = tracemalloc.get_traced_memory()
+            rec = {
+                "action": name,
+                "at": time.strftime("%H:%M:%S"),
+                "handler_ms": handler_s * 1000,
+                "db_ms": (instrumentation.thread_db_time() - db_before) * 1000,
+                "mem_kb": (current - mem_before) / 1024,
+                "peak_kb": (peak - mem_before) / 1024,
+                "traced_mb": current / 1048576,
+            }
+            try:
+                window.after_idle(self._settled, rec, t0)
+            except tk.TclError:
+                self._settled(rec, t0)   # the action destroyed its window
+
+    def _settled(self, rec, t0):
+        rec["ms"] = (time.perf_counter() - t0) * 1000
+        rec["tk_ms"] = max(rec["ms"] - rec["db_ms"], 0.0)
+        self.records.append(rec)
+        self.counts[rec["action"]] = self.counts.get(rec["action"], 0) + 1
+        for listener in list(self.listeners):
+            listener(rec)
+
+    def instrument(self, cls):
+        # a renamed handler must not silently drop out of the profiles
+        missing = [name for name in ACTIONS.get(cls.__name__, ()) if name not in cls.__dict__]
+        if missing:
+            raise AttributeError(f"profiling.ACTIONS lists methods {cls.__name__} does not define: {', '.join(missing)}")
+        for name in ACTIONS.get(cls.__name__, ()):
+            original = cls.__dict__[name]
+            self.patched.append((cls, name, original))
+            setattr(cls, name, self._wrap(f"{cls.__name__}.{name}", original))
+        init = cls.__dict__.get("__init__")
+        if init is not None:
+            self.patched.append((cls, "__init__", init))
+
+            def __init__(window, *args, **kwargs):
+                init(window, *args, **kwargs)
+                _Overlay(window, self)
+
+            setattr(cls, "__init__", __init__)
+
+    def _wrap(self, name, fn):
+        def wrapper(window, *args, **kwargs):
+            return self.run(name, fn, window, args, kwargs)
+
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        return wrapper
+
+    def restore(self):
+        for cls, name, original in reversed(self.patched):
+            setattr(cls, name, original)
+        self.patched = []
+
+
+class _Overlay:
+    """Last-action line in the window's top right corner; a click dumps the profiles, a right click hides it."""
+
+    def __init__(self, window, session):
+        self.session = session
+        self.label = tk.Label(window, text="profiling: no actions yet", font=("Consolas", 8),
+                              bg="#222222", fg="#e0e0e0", padx=6, pady=1, cursor="hand2")
+        self.label.place(relx=1.0, rely=0.0, x=-2, y=2, anchor="ne")
+        self.label.lift()
+        self.label.bind("<Button-1>", lambda e: self._dump())
+        self.label.bind("<Button-3>", lambda e: self.label.place_forget())
+        session.listeners.append(self._show)
+        self.label.bind("<Destroy>", lambda e: self._detach(), add="+")
+
+    def _detach(self):
+        if self._show in self.session.listeners:
+            self.session.listeners.remove(self._show)
+
+    def _show(self, rec):
+        self.label.config(text=f"{rec['action'].split('.', 1)[1]} {rec['ms']:.0f} ms"
+                               f" · db {rec['db_ms']:.0f} · tk {rec['tk_ms']:.0f}"
+                               f" · mem {rec['mem_kb']:+.0f} KB ({rec['traced_mb']:.1f} MB)")
+        self.label.lift()
+
+    def _dump(self):
+        try:
+            path = dump()
+        except OSError as ex:
+            self.label.config(text=f"profile dump failed: {ex}")
+            return
+        self.label.config(text=f"profiles written to {path}")
+
+
+def resolve_dir(requested: bool = False) -> Optional[Path]:
+    """
+    Output directory when profiling is on (--profile, or INVENTORY_PROFILE set to a
+    true value or a directory), else None. A directory in INVENTORY_PROFILE wins.
+    """
+    value = os.environ.get("INVENTORY_PROFILE", "").strip()
+    if value.lower() in ("", "0", "false", "no", "off"):
+        return PROFILE_DIR if requested else None
+    if value.lower() in ("1", "true", "yes", "on"):
+        return PROFILE_DIR
+    return Path(value)
+
+
+def enable(*classes, out_dir=PROFILE_DIR):
+    """
+    Profile the ACTIONS of the given window classes from now on. Call it at startup,
+    before the windows are created and before the database is first used.
+    """
+    global _session
+    if _session is None:
+        _session = _Session(Path(out_dir))
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+        _session.baseline = tracemalloc.take_snapshot()
+        if not instrumentation.is_enabled():
+            instrumentation.enable(log=None)
+    for cls in classes:
+        if cls is not None:
+            _session.instrument(cls)
+
+
+def is_enabled() -> bool:
+    return _session is not None
+
+
+def records() -> list:
+    return list(_session.records) if _session else []
+
+
+def _percentile(ordered, pct):
+    return ordered[max(0, -(-len(ordered) * pct // 100) - 1)] if ordered else 0.0
+
+
+def _summary(session, stats) -> str:
+    lines = [f"Profiling session started {session.started}, {len(session.records)} actions recorded", "",
+             f"{'action':45} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'db %':>5}"]
+    by_action = {}
+    for rec in session.records:
+        by_action.setdefault(rec["action"], []).append(rec)
+    for name, recs in sorted(by_action.items(), key=lambda kv: -sum(r["ms"] for r in kv[1])):
+        ms = sorted(r["ms"] for r in recs)
+        total = sum(ms)
+        db = sum(r["db_ms"] for r in recs)
+        lines.append(f"{name:45} {session.counts[name]:>6} {_percentile(ms, 50):>8.1f} {_percentile(ms, 95):>8.1f}"
+                     f" {ms[-1]:>8.1f} {db * 100 / total if total else 0:>5.0f}")
+    lines += ["", "Memory growth since profiling started (top 25 lines):"]
+    snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+    if snapshot is not None and session.baseline is not None:
+        # leave out what the profiling itself allocates
+        own = [tracemalloc.Filter(False, module.__file__) for module in (cProfile, pstats, tracemalloc)]
+        own.append(tracemalloc.Filter(False, __file__))
+        growth = snapshot.filter_traces(own).compare_to(session.baseline.filter_traces(own), "lineno")
+        lines += [f"  {stat}" for stat in growth[:25]]
+    if stats is not None:
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(40)
+        lines += ["", "Functions by cumulative time, all actions:", out.getvalue()]
+    return "\n".join(lines) + "\n"
+
+
+def dump() -> Optional[Path]:
+    """Write the profiles collected so far; returns the directory, or None when profiling is off."""
+    session = _session
+    if session is None:
+        return None
+    out = session.out_dir / session.started
+    (out / "actions").mkdir(parents=True, exist_ok=True)
+    stats = None
+    for name, profiler in session.profilers.items():
+        profiler.create_stats()
+        if not profiler.stats:
+            continue
+        profiler.dump_stats(str(out / "actions" / f"{name}.pstats"))
+        if stats is None:
+            stats = pstats.Stats(profiler)
+        else:
+            stats.add(profiler)
+    if stats is not None:
+        stats.dump_stats(str(out / "profile.pstats"))
+    with open(out / "actions.jsonl", "w", encoding="utf-8") as f:
+        for rec in session.records:
+            f.write(json.dumps({k: round(v, 3) if isinstance(v, float) else v for k, v in rec.items()}) + "\n")
+    (out / "summary.txt").write_text(_summary(session, stats), encoding="utf-8")
+    return out
+
+
+def disable():
+    """Write the profiles, then unwrap the handlers and stop tracing memory."""
+    global _session
+    if _session is None:
+        return None
+    try:
+        return dump()
+    finally:
+        _session.restore()
+        _session = None
+        tracemalloc.stop()
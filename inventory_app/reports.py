@@ -0,0 +1,221 @@
+"""
+Sales and stock reports computed by SQLite.
+
+Every report is one aggregate query; Python only receives the (small) result, read
+in batches from the cursor, so it can be shown in the UI or streamed to CSV. Sales
+reports read the daily summary tables (sales_daily_variant, sales_daily_customer; see
+migration 6) rather than invoice_items, so a month costs a few thousand rows whatever
+the number of lines. Date ranges are [start, end) in whole days ("2025-08-01").
+
+    columns, rows = reports.run("sales_by_day", start="2025-08-01", end="2025-09-01")
+    reports.export_csv("stock_valuation", "valuation.csv")
+"""
+import csv
+from typing import Optional
+
+from . import database
+from . import migrations
+
+_FETCH_BATCH = 500
+
+
+def _day_range(alias: str, start: Optional[str], end: Optional[str]):
+    # summaries are per day: a timestamp start counts from the start of its day, and an
+    # end inside a day includes that whole day
+    sql, params = "", []
+    if start:
+        sql += f" AND {alias}.day >= ?"
+        params.append(start[:10])
+    if end:
+        sql += f" AND {alias}.day < ?"
+        params.append(end)
+    return sql, params
+
+
+def _sales_by_day(start, end, limit):
+    where, params = _day_range("d", start, end)
+    sql = f"""
+        SELECT d.day,
+               SUM(d.invoices) AS invoices,
+               SUM(d.units) AS units,
+               ROUND(SUM(d.subtotal), 2) AS subtotal,
+               ROUND(SUM(d.tax), 2) AS tax,
+               ROUND(SUM(d.subtotal + d.tax), 2) AS total
+          FROM sales_daily_customer d
+         WHERE 1=1 {where}
+         GROUP BY d.day
+         ORDER BY d.day
+    """
+    return ["Day", "Invoices", "Units", "Subtotal", "Tax", "Total"], sql, params
+
+
+def _sales_by_product(start, end, limit):
+    where, params = _day_range("d", start, end)
+    sql = f"""
+        SELECT p.name, p.rack_number,
+               COUNT(DISTINCT d.variant_id) AS variants,
+               SUM(d.units) AS units,
+               ROUND(SUM(d.revenue), 2) AS revenue
+          FROM sales_daily_variant d
+          JOIN product_variants v ON v.id = d.variant_id
+          JOIN products p ON p.id = v.product_id
+         WHERE 1=1 {where}
+         GROUP BY p.id
+         ORDER BY revenue DESC
+    """
+    return ["Product", "Rack", "Variants sold", "Units", "Revenue"], sql, params
+
+
+def _sales_by_customer(start, end, limit):
+    where, params = _day_range("d", start, end)
+    # linked customers group by id, walk-ins by the name typed on the invoice
+    sql = f"""
+        SELECT COALESCE(cu.name, NULLIF(TRIM(MIN(d.customer_name)), ''), '(walk-in)') AS customer,
+               COALESCE(cu.phone, MIN(d.customer_phone), '') AS phone,
+               SUM(d.invoices) AS invoices,
+               SUM(d.units) AS units,
+               ROUND(SUM(d.subtotal), 2) AS subtotal,
+               ROUND(SUM(d.subtotal + d.tax), 2) AS total
+          FROM sales_daily_customer d
+          LEFT JOIN customers cu ON cu.id = d.customer_id
+         WHERE 1=1 {where}
+         GROUP BY d.customer_key
+         ORDER BY total DESC
+    """
+    return ["Customer", "Phone", "Invoices", "Units", "Subtotal", "Total"], sql, params
+
+
+def _top_sellers(start, end, limit):
+    where, params = _day_range("d", start, end)
+    sql = f"""
+        SELECT p.name, s.name, c.name,
+               SUM(d.units) AS units,
+               ROUND(SUM(d.revenue), 2) AS revenue
+          FROM sales_daily_variant d
+          JOIN product_variants v ON v.id = d.variant_id
+          JOIN products p ON p.id = v.product_id
+          JOIN sizes s ON s.id = v.size_id
+          JOIN colors c ON c.id = v.color_id
+         WHERE 1=1 {where}
+         GROUP BY d.variant_id
+         ORDER BY units DESC, revenue DESC
+         LIMIT ?
+    """
+    return ["Product", "Size", "Color", "Units", "Revenue"], sql, params + [int(limit or 20)]
+
+
+def _stock_valuation(start, end, limit):
+    # current stock; the date range does not apply
+    sql = """
+        SELECT p.name, p.rack_number,
+               COUNT(*) AS variants,
+               SUM(v.quantity) AS units,
+               ROUND(SUM(v.quantity * v.retail_price), 2) AS retail_value,
+               ROUND(SUM(v.quantity * v.wholesale_price), 2) AS wholesale_value
+          FROM product_variants v
+          JOIN products p ON p.id = v.product_id
+         GROUP BY p.id
+        HAVING units > 0
+         ORDER BY retail_value DESC
+    """
+    return ["Product", "Rack", "Variants", "Units", "Retail value", "Wholesale value"], sql, []
+
+
+def _sell_through(start, end, limit):
+    where, params = _day_range("d", start, end)
+    # sold / (sold + still on hand) over the period, per product
+    sql = f"""
+        SELECT p.name, p.rack_number,
+               COALESCE(sold.units, 0) AS sold,
+               stock.on_hand,
+               ROUND(100.0 * COALESCE(sold.units, 0) / NULLIF(COALESCE(sold.units, 0) + stock.on_hand, 0), 1) AS pct
+          FROM products p
+          JOIN (SELECT product_id, SUM(quantity) AS on_hand FROM product_variants GROUP BY product_id) stock
+            ON stock.product_id = p.id
+          LEFT JOIN (SELECT v.product_id, SUM(d.units) AS units
+                       FROM sales_daily_variant d
+                       JOIN product_variants v ON v.id = d.variant_id
+                      WHERE 1=1 {where}
+                      GROUP BY v.product_id) sold
+            ON sold.product_id = p.id
+         ORDER BY pct DESC, sold DESC
+    """
+    return ["Product", "Rack", "Sold", "On hand", "Sell-through %"], sql, params
+
+
+# name -> (title, query builder, uses the date range)
+REPORTS = {
+    "sales_by_day": ("Sales by day", _sales_by_day, True),
+    "sales_by_product": ("Sales by product", _sales_by_product, True),
+    "sales_by_customer": ("Sales by customer", _sales_by_customer, True),
+    "top_sellers": ("Top sellers", _top_sellers, True),
+    "stock_valuation": ("Stock valuation", _stock_valuation, False),
+    "sell_through": ("Sell-through", _sell_through, True),
+}
+
+
+def run(name: str, start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None):
+    """
+    (columns, rows) for report `name`; rows is a generator of tuples read from the
+    cursor in batches. limit applies to top_sellers only.
+    """
+    if name not in REPORTS:
+        raise ValueError(f"Unknown report '{name}'")
+    columns, sql, params = REPORTS[name][1](start, end, limit)
+
+    def rows():
+        conn = database.get_connection()
+        cur = conn.execute(sql, params)
+        try:
+            while True:
+                batch = cur.fetchmany(_FETCH_BATCH)
+                if not batch:
+                    return
+                for r in batch:
+                    yield tuple(r)
+        finally:
+            cur.close()
+
+    return columns, rows()
+
+
+def fetch(name: str, start: Optional[str] = None, end: Optional[str] = None, limit: Optional[int] = None,
+          max_rows: int = 5000):
+    """(columns, rows list, truncated) with at most max_rows rows, for showing on screen."""
+    columns, rows = run(name, start, end, limit)
+    out = []
+    for r in rows:
+        if len(out) == max_rows:
+            rows.close()
+            return columns, out, True
+        out.append(r)
+    return columns, out, False
+
+
+def export_csv(name: str, out, start: Optional[str] = None, end: Optional[str] = None,
+               limit: Optional[int] = None) -> int:
+    """Stream report `name` to `out` (a path or a text file); returns the number of rows written."""
+    columns, rows = run(name, start, end, limit)
+    own = not hasattr(out, "write")
+    f = open(out, "w", encoding="utf-8", newline="") if own else out
+    try:
+        w = csv.writer(f)
+        w.writerow(columns)
+        count = 0
+        for r in rows:
+            w.writerow(r)
+            count += 1
+        return count
+    finally:
+        if own:
+            f.close()
+
+
+def rebuild_summaries(start: Optional[str] = None, end: Optional[str] = None):
+    """
+    Recompute the daily sales summaries for days in [start, end) from the invoices
+    (backfill, or repair after editing the database by hand). Returns (variant rows,
+    customer rows) written.
+    """
+    with database.transaction() as conn:
+        return migrations.rebuild_sales_summaries(conn, start, end)
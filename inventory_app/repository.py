@@ -1,70 +1,116 @@
+import re
+import sqlite3
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from . import database
+from . import lookups
 
 def add_color(name: str):
     with database.get_connection() as conn:
         conn.execute("INSERT OR IGNORE INTO colors(name) VALUES(?)", (name.strip(),))
+    lookups.invalidate("colors")
 
 def add_size(name: str):
     with database.get_connection() as conn:
         conn.execute("INSERT OR IGNORE INTO sizes(name) VALUES(?)", (name.strip(),))
+    lookups.invalidate("sizes")
 
 def list_colors() -> List[str]:
-    with database.get_connection() as conn:
-        rows = conn.execute("SELECT name FROM colors ORDER BY name").fetchall()
-    return [r[0] for r in rows]
+    return lookups.names("colors")
 
 def list_sizes() -> List[str]:
-    with database.get_connection() as conn:
-        rows = conn.execute("SELECT name FROM sizes ORDER BY name").fetchall()
-    return [r[0] for r in rows]
+    return lookups.names("sizes")
 
 def get_color_id(name: str) -> Optional[int]:
-    with database.get_connection() as conn:
-        row = conn.execute("SELECT id FROM colors WHERE name=?", (name,)).fetchone()
-        return row["id"] if row else None
+    return lookups.id_for("colors", name)
 
 def get_size_id(name: str) -> Optional[int]:
-    with database.get_connection() as conn:
-        row = conn.execute("SELECT id FROM sizes WHERE name=?", (name,)).fetchone()
-        return row["id"] if row else None
+    return lookups.id_for("sizes", name)
 
 def add_product(name: str, rack: str) -> int:
     with database.get_connection() as conn:
         cur = conn.execute("INSERT INTO products(name, rack_number) VALUES(?,?)", (name.strip(), rack.strip()))
         return cur.lastrowid
 
+# products(name, rack_number) is unique (migration 5). The no-op DO UPDATE makes RETURNING
+# hand back the existing row's id, so get-or-create is one statement and race-free.
+# RETURNING results are read with fetchall() so the statement is finished before commit.
+_PRODUCT_UPSERT = """
+    INSERT INTO products(name, rack_number) VALUES(?, ?)
+    ON CONFLICT(name, rack_number) DO UPDATE SET name = excluded.name
+    RETURNING id
+"""
+
+_VARIANT_UPSERT = """
+    INSERT INTO product_variants(product_id, color_id, size_id, quantity, retail_price, wholesale_price)
+    VALUES(?,?,?,?,?,?)
+    ON CONFLICT(product_id, color_id, size_id) DO UPDATE SET
+        quantity = quantity + excluded.quantity,
+        retail_price = excluded.retail_price,
+        wholesale_price = excluded.wholesale_price
+    RETURNING id
+"""
+
+def upsert_product(conn: sqlite3.Connection, name: str, rack: str) -> int:
+    """get_or_create_product on the caller's connection/transaction."""
+    name, rack = name.strip(), (rack or "").strip()
+    if database.SUPPORTS_RETURNING:
+        return conn.execute(_PRODUCT_UPSERT, (name, rack)).fetchall()[0][0]
+    conn.execute("INSERT OR IGNORE INTO products(name, rack_number) VALUES(?,?)", (name, rack))
+    return conn.execute("SELECT id FROM products WHERE name=? AND rack_number=?", (name, rack)).fetchone()[0]
+
+def upsert_variant(conn: sqlite3.Connection, product_id: int, color_id: int, size_id: int,
+                    qty: int, retail: float, wholesale: float) -> int:
+    """add_variant on the caller's connection/transaction."""
+    if database.SUPPORTS_RETURNING:
+        return conn.execute(_VARIANT_UPSERT, (product_id, color_id, size_id, qty, retail, wholesale)).fetchall()[0][0]
+    cur = conn.execute(
+        """INSERT OR IGNORE INTO product_variants(product_id, color_id, size_id, quantity, retail_price, wholesale_price)
+             VALUES(?,?,?,?,?,?)""",
+        (product_id, color_id, size_id, qty, retail, wholesale)
+    )
+    if cur.rowcount:
+        return cur.lastrowid
+    conn.execute(
+        """UPDATE product_variants
+               SET quantity = quantity + ?,
+                   retail_price = ?,
+                   wholesale_price = ?
+             WHERE product_id=? AND color_id=? AND size_id=?""",
+        (qty, retail, wholesale, product_id, color_id, size_id)
+    )
+    row = conn.execute(
+        "SELECT id FROM product_variants WHERE product_id=? AND color_id=? AND size_id=?",
+        (product_id, color_id, size_id)
+    ).fetchone()
+    return row["id"]
+
 def get_or_create_product(name: str, rack: str) -> int:
     with database.get_connection() as conn:
-        row = conn.execute("SELECT id FROM products WHERE name=? AND rack_number=?", (name.strip(), rack.strip())).fetchone()
-        if row:
-            return row["id"]
-        cur = conn.execute("INSERT INTO products(name, rack_number) VALUES(?,?)", (name.strip(), rack.strip()))
-        return cur.lastrowid
+        return upsert_product(conn, name, rack)
+
+def get_or_create_products(pairs) -> Dict[tuple, int]:
+    """Batched get_or_create_product: {(name, rack): id} for an iterable of (name, rack), in one transaction."""
+    ids = {}
+    with database.transaction() as conn:
+        for name, rack in pairs:
+            key = (name.strip(), (rack or "").strip())
+            if key not in ids:
+                ids[key] = upsert_product(conn, *key)
+    return ids
 
 def add_variant(product_id: int, color_id: int, size_id: int, qty: int, retail: float, wholesale: float) -> int:
+    """Insert a variant, or add qty to an existing one and overwrite its prices; returns the variant id."""
     with database.get_connection() as conn:
-        cur = conn.execute(
-            """INSERT OR IGNORE INTO product_variants(product_id, color_id, size_id, quantity, retail_price, wholesale_price)
-                 VALUES(?,?,?,?,?,?)""",
-            (product_id, color_id, size_id, qty, retail, wholesale)
-        )
-        if cur.rowcount == 0:
-            conn.execute(
-                """UPDATE product_variants
-                       SET quantity = quantity + ?,
-                           retail_price = ?,
-                           wholesale_price = ?
-                     WHERE product_id=? AND color_id=? AND size_id=?""",
-                (qty, retail, wholesale, product_id, color_id, size_id)
-            )
-            row = conn.execute(
-                "SELECT id FROM product_variants WHERE product_id=? AND color_id=? AND size_id=?",
-                (product_id, color_id, size_id)
-            ).fetchone()
-            return row["id"]
-        return cur.lastrowid
+        return upsert_variant(conn, product_id, color_id, size_id, qty, retail, wholesale)
+
+def add_variants(rows) -> List[int]:
+    """
+    Batched add_variant for an iterable of (product_id, color_id, size_id, qty, retail, wholesale)
+    in one transaction; returns the variant ids in input order.
+    """
+    with database.transaction() as conn:
+        return [upsert_variant(conn, *r) for r in rows]
 # _____________________________
 # ...existing code...
 def add_customer(customer: dict) -> int:
@@ -84,30 +130,30 @@ def add_customer(customer: dict) -> int:
         )
         return cur.lastrowid
 
-def get_customer_by_name_or_id(q: str) -> list:
+def _page_clause(limit: Optional[int], offset: int = 0):
+    """LIMIT/OFFSET suffix and params for a page of results; no limit returns everything."""
+    if limit is None:
+        return "", ()
+    return " LIMIT ? OFFSET ?", (int(limit), max(0, int(offset)))
+
+def get_customer_by_name_or_id(q: str, limit: Optional[int] = None, offset: int = 0) -> list:
     """
     Return list of customer dicts matching name LIKE q or id == q (if numeric).
+    Pass limit/offset to fetch one page at a time.
     """
     q = (q or "").strip()
     if not q:
         return []
+    page, page_params = _page_clause(limit, offset)
     with database.get_connection() as conn:
         if q.isdigit():
             rows = conn.execute("SELECT id, name, phone, address, type FROM customers WHERE id = ?", (int(q),)).fetchall()
         else:
-            rows = conn.execute("SELECT id, name, phone, address, type FROM customers WHERE name LIKE ? ORDER BY name", (f"%{q}%",)).fetchall()
+            rows = conn.execute("SELECT id, name, phone, address, type FROM customers WHERE name LIKE ? ORDER BY name" + page,
+                                (f"%{q}%",) + page_params).fetchall()
     return [dict(r) for r in rows]
 
-def search_products(q: str) -> list:
-    """
-    Search product_variants (joined with products/sizes/colors) and return list of dicts:
-    {id: variant_id, name, size, color, retail_price, wholesale_price, rack, quantity}
-    """
-    q = (q or "").strip()
-    if not q:
-        return []
-    like = f"%{q}%"
-    sql = """
+_SEARCH_COLUMNS = """
         SELECT v.id as id, p.name as name, s.name as size, c.name as color,
                v.retail_price as retail_price, v.wholesale_price as wholesale_price,
                p.rack_number as rack, v.quantity as quantity
@@ -115,22 +161,114 @@ def search_products(q: str) -> list:
           JOIN products p ON p.id = v.product_id
           JOIN sizes s ON s.id = v.size_id
           JOIN colors c ON c.id = v.color_id
+"""
+
+# hits ranked per search; a broad prefix can match most of the index, and ranking all of them
+# before the page is cut costs tens of ms per keystroke
+FTS_CANDIDATES = 1000
+
+def fts_query(q: str) -> str:
+    """
+    Turn free text into an FTS5 MATCH expression: every word must match as a prefix
+    in any column, e.g. 'red shi' -> '"red"* "shi"*'. Returns '' if q has no words.
+    One-letter words are dropped when longer ones are present ('red s' -> '"red"*'):
+    the index keeps no 1-character prefixes, so they would scan most of it.
+    """
+    words = re.findall(r"\w+", q.lower())
+    return " ".join(f'"{tok}"*' for tok in ([w for w in words if len(w) > 1] or words))
+
+def _search_products_fts(conn, q: str, page: str = "", page_params: tuple = ()) -> Optional[list]:
+    match = fts_query(q)
+    if not match:
+        return None
+    # name matches outrank rack/size/color matches; only the first FTS_CANDIDATES hits
+    # (in index order) are ranked and joined, so a broad prefix stays cheap
+    sql = """
+        WITH hits AS (
+            SELECT rowid AS vid, bm25(variant_search, 10.0, 4.0, 1.0, 1.0) AS rank
+              FROM variant_search
+             WHERE variant_search MATCH ?
+             LIMIT ?
+        )
+    """ + _SEARCH_COLUMNS + """
+          JOIN hits h ON h.vid = v.id
+         ORDER BY h.rank, p.name, s.name, c.name
+    """ + page
+    try:
+        return conn.execute(sql, (match, FTS_CANDIDATES) + page_params).fetchall()
+    except sqlite3.OperationalError as e:
+        # index not built (SQLite without FTS5): let the caller fall back to LIKE
+        if "no such table" in str(e):
+            return None
+        raise
+
+def _search_products_like(conn, q: str, page: str = "", page_params: tuple = ()) -> list:
+    like = f"%{q}%"
+    sql = _SEARCH_COLUMNS + """
          WHERE p.name LIKE ? OR p.rack_number LIKE ? OR s.name LIKE ? OR c.name LIKE ?
          ORDER BY p.name, s.name, c.name
+    """ + page
+    return conn.execute(sql, (like, like, like, like) + page_params).fetchall()
+
+def search_products(q: str, mode: str = "auto", limit: Optional[int] = None, offset: int = 0) -> list:
+    """
+    Search product_variants (joined with products/sizes/colors) and return list of dicts:
+    {id: variant_id, name, size, color, retail_price, wholesale_price, rack, quantity}
+
+    mode: 'fts' uses the variant_search full-text index (word-prefix match on every
+    word, best matches first), 'like' does the old substring scan, 'auto' (default)
+    uses the index when it exists and LIKE otherwise. Pass limit/offset to page through results.
+    FTS ranks at most FTS_CANDIDATES hits, so a very broad query ends after that many;
+    'auto' sends a query of one-letter words only (e.g. 's') to LIKE, which pages it faster.
     """
+    q = (q or "").strip()
+    if not q:
+        return []
+    if mode not in ("auto", "fts", "like"):
+        raise ValueError(f"Unknown search mode '{mode}'")
+    page, page_params = _page_clause(limit, offset)
     with database.get_connection() as conn:
-        rows = conn.execute(sql, (like, like, like, like)).fetchall()
+        rows = None
+        if mode == "fts" or (mode == "auto" and any(len(w) > 1 for w in re.findall(r"\w+", q))):
+            rows = _search_products_fts(conn, q, page, page_params)
+            if rows is None and mode == "fts":
+                rows = []
+        if rows is None:
+            rows = _search_products_like(conn, q, page, page_params)
     return [dict(r) for r in rows]
 
 def get_product_price(variant_id: int, pricing_type: str = "retail") -> float:
     """
     Return unit price for a variant id according to pricing_type ('retail'|'wholesale').
     """
+    return get_product_prices([variant_id], pricing_type).get(int(variant_id), 0.0)
+
+# SQLite caps bound parameters per statement (999 on older builds)
+_IN_CHUNK = 500
+
+def _chunks(seq: list, size: int = _IN_CHUNK):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+def _fetch_prices(conn, variant_ids: List[int], pricing_type: str) -> Dict[int, float]:
+    column = "retail_price" if pricing_type == "retail" else "wholesale_price"
+    prices = {}
+    for chunk in _chunks(variant_ids):
+        marks = ",".join("?" * len(chunk))
+        rows = conn.execute(f"SELECT id, {column} FROM product_variants WHERE id IN ({marks})", chunk).fetchall()
+        prices.update((r[0], float(r[1])) for r in rows)
+    return prices
+
+def get_product_prices(variant_ids, pricing_type: str = "retail") -> Dict[int, float]:
+    """
+    Bulk version of get_product_price: {variant_id: unit price} for every id that exists,
+    in one query per 500 ids. Unknown ids are simply missing from the result.
+    """
+    ids = list(dict.fromkeys(int(v) for v in variant_ids))
+    if not ids:
+        return {}
     with database.get_connection() as conn:
-        row = conn.execute("SELECT retail_price, wholesale_price FROM product_variants WHERE id = ?", (int(variant_id),)).fetchone()
-        if not row:
-            return 0.0
-        return float(row["retail_price"] if pricing_type == "retail" else row["wholesale_price"])
+        return _fetch_prices(conn, ids, pricing_type)
 
 def get_branding() -> dict:
     """
@@ -149,57 +287,110 @@ def get_branding() -> dict:
     return
 # ____________________________
 
-def list_variants(filters: Dict[str, Any]) -> list:
-    sql = """
-        SELECT p.name as product, p.rack_number as rack,
-               s.name as size, c.name as color,
-               v.quantity as qty, v.retail_price as retail, v.wholesale_price as wholesale,
-               v.id as vid
-          FROM product_variants v
-          JOIN products p ON p.id = v.product_id
-          JOIN sizes s ON s.id = v.size_id
-          JOIN colors c ON c.id = v.color_id
-         WHERE 1=1
-    """
-    params = []
+_VARIANT_SELECT = """
+    SELECT p.name as product, COALESCE(p.rack_number, '') as rack,
+           s.name as size, c.name as color,
+           v.quantity as qty, v.retail_price as retail, v.wholesale_price as wholesale,
+           v.id as vid
+      FROM products p
+      -- CROSS JOIN pins products as the outer loop, so rows come off ux_products_name_rack
+      -- already in name order and a page only sorts the variants of the products it touches
+      CROSS JOIN product_variants v ON v.product_id = p.id
+      JOIN sizes s ON s.id = v.size_id
+      JOIN colors c ON c.id = v.color_id
+     WHERE 1=1
+"""
+# sort key of list_variants rows; (product, rack, size, color, vid) of the last row is the page cursor
+_VARIANT_ORDER = "p.name, COALESCE(p.rack_number, ''), s.name, c.name, v.id"
+
+def _variant_filters(filters: Dict[str, Any]):
+    where, params = "", []
     if filters.get("product"):
-        sql += " AND p.name LIKE ?"
+        where += " AND p.name LIKE ?"
         params.append(f"%{filters['product'].strip()}%")
     if filters.get("rack"):
-        sql += " AND p.rack_number LIKE ?"
+        where += " AND p.rack_number LIKE ?"
         params.append(f"%{filters['rack'].strip()}%")
     if filters.get("size"):
-        sql += " AND s.name = ?"
+        where += " AND s.name = ?"
         params.append(filters["size"])
     if filters.get("color"):
-        sql += " AND c.name = ?"
+        where += " AND c.name = ?"
         params.append(filters["color"])
     status = filters.get("status")
     if status == "Low Stock":
-        sql += " AND v.quantity BETWEEN 1 AND ?"
+        where += " AND v.quantity BETWEEN 1 AND ?"
         params.append(int(filters.get("low_threshold", 5)))
     elif status == "Out of Stock":
-        sql += " AND v.quantity = 0"
+        where += " AND v.quantity = 0"
+    return where, params
+
+def variant_cursor(row) -> tuple:
+    """Keyset cursor for the page after `row` (a list_variants tuple)."""
+    return (row[0], row[1], row[2], row[3], row[7])
 
-    sql += " ORDER BY p.name, rack, size, color"
+def list_variants(filters: Dict[str, Any], limit: Optional[int] = None, after: Optional[tuple] = None) -> list:
+    """
+    Variant rows (product, rack, size, color, qty, retail, wholesale, vid) ordered by
+    product, rack, size, color. Pass limit for one page and after=variant_cursor(last row)
+    for the next one; keyset pagination keeps every page as cheap as the first.
+    """
+    where, params = _variant_filters(filters or {})
+    if after is not None:
+        # the redundant p.name bound lets SQLite start from the name index instead of the top
+        where += " AND p.name >= ? AND (p.name, COALESCE(p.rack_number, ''), s.name, c.name, v.id) > (?, ?, ?, ?, ?)"
+        params.append(after[0])
+        params.extend(after)
+    sql = _VARIANT_SELECT + where + " ORDER BY " + _VARIANT_ORDER
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
     with database.get_connection() as conn:
         rows = conn.execute(sql, params).fetchall()
     return [tuple(r) for r in rows]
 
-def restock_units(variant_id: int, units: int):
+def iter_variants(filters: Optional[Dict[str, Any]] = None, page_size: int = 1000):
+    """Yield list_variants rows one page-query at a time, so no cursor or read transaction stays open."""
+    after = None
+    while True:
+        rows = list_variants(filters or {}, limit=page_size, after=after)
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after = variant_cursor(rows[-1])
+
+def count_variants(filters: Optional[Dict[str, Any]] = None) -> int:
+    where, params = _variant_filters(filters or {})
+    sql = """
+        SELECT COUNT(*)
+          FROM product_variants v
+          JOIN products p ON p.id = v.product_id
+          JOIN sizes s ON s.id = v.size_id
+          JOIN colors c ON c.id = v.color_id
+         WHERE 1=1
+    """ + where
+    with database.get_connection() as conn:
+        return conn.execute(sql, params).fetchone()[0]
+
+def restock_units(variant_id: int, units: int) -> int:
+    """Add units to a variant's stock; returns the number of rows changed (0 if the variant is gone)."""
     with database.get_connection() as conn:
-        conn.execute("UPDATE product_variants SET quantity = quantity + ? WHERE id=?", (units, variant_id))
+        return conn.execute("UPDATE product_variants SET quantity = quantity + ? WHERE id=?", (units, variant_id)).rowcount
 
-def restock_boxes(variant_id: int, per_box: int, boxes: int):
-    restock_units(variant_id, per_box * boxes)
+def restock_boxes(variant_id: int, per_box: int, boxes: int) -> int:
+    return restock_units(variant_id, per_box * boxes)
 
-def update_prices(variant_id: int, retail: float, wholesale: float):
+def update_prices(variant_id: int, retail: float, wholesale: Optional[float] = None) -> int:
+    """Set the retail (and, if given, wholesale) price; returns the number of rows changed."""
     with database.get_connection() as conn:
-        conn.execute("UPDATE product_variants SET retail_price=?, wholesale_price=? WHERE id=?", (retail, wholesale, variant_id))
+        if wholesale is None:
+            return conn.execute("UPDATE product_variants SET retail_price=? WHERE id=?", (retail, variant_id)).rowcount
+        return conn.execute("UPDATE product_variants SET retail_price=?, wholesale_price=? WHERE id=?", (retail, wholesale, variant_id)).rowcount
 
-def delete_variant(variant_id: int):
+def delete_variant(variant_id: int) -> int:
+    """Delete a variant; returns the number of rows removed. Raises sqlite3.IntegrityError if invoices reference it."""
     with database.get_connection() as conn:
-        conn.execute("DELETE FROM product_variants WHERE id=?", (variant_id,))
+        return conn.execute("DELETE FROM product_variants WHERE id=?", (variant_id,)).rowcount
 
 def get_variant(variant_id: int):
     with database.get_connection() as conn:
@@ -226,38 +417,116 @@ def list_products() -> list:
     with database.get_connection() as conn:
         return conn.execute("SELECT id, name, rack_number FROM products ORDER BY name").fetchall()
 
-def create_invoice(customer_name: str, customer_phone: str, pricing_type: str, tax_rate: float, items: list) -> int:
-    from datetime import datetime
+class InsufficientStockError(ValueError):
+    """
+    Raised by create_invoice when one or more lines ask for more than is in stock.
+    `shortages` lists every short line as {variant_id, label, requested, available}.
+    """
+    def __init__(self, shortages: List[Dict[str, Any]]):
+        self.shortages = shortages
+        detail = "; ".join(f"{s['label']} (variant {s['variant_id']}): requested {s['requested']}, available {s['available']}"
+                           for s in shortages)
+        super().__init__(f"Not enough stock for {len(shortages)} line(s): {detail}")
+
+def _load_stock(conn, variant_ids: List[int]) -> Dict[int, sqlite3.Row]:
+    stock = {}
+    for chunk in _chunks(variant_ids):
+        marks = ",".join("?" * len(chunk))
+        rows = conn.execute(
+            f"""SELECT v.id, v.quantity, v.retail_price, v.wholesale_price,
+                       p.name || ' ' || s.name || '/' || c.name as label
+                  FROM product_variants v
+                  JOIN products p ON p.id = v.product_id
+                  JOIN sizes s ON s.id = v.size_id
+                  JOIN colors c ON c.id = v.color_id
+                 WHERE v.id IN ({marks})""",
+            chunk
+        ).fetchall()
+        stock.update((r["id"], r) for r in rows)
+    return stock
+
+def _shortages(stock: Dict[int, sqlite3.Row], wanted: Dict[int, int]) -> List[Dict[str, Any]]:
+    return [
+        {"variant_id": vid, "label": stock[vid]["label"], "requested": qty, "available": stock[vid]["quantity"]}
+        for vid, qty in wanted.items() if qty > stock[vid]["quantity"]
+    ]
+
+def create_invoice(customer_name: str, customer_phone: str, pricing_type: str, tax_rate: float, items: list,
+                   customer_id: Optional[int] = None, invoice_no: Optional[str] = None) -> int:
+    """
+    Persist an invoice and take its lines out of stock atomically.
+
+    Runs in one BEGIN IMMEDIATE transaction: stock for all lines is read in a single
+    query, lines are inserted with executemany and stock is decremented with a
+    conditional UPDATE (quantity >= requested) whose row count is verified. Repeated
+    variants are summed before the stock check. Raises InsufficientStockError listing
+    every short line, or ValueError for unknown variants; nothing is written then.
+
+    Each item is {variant_id, quantity} plus an optional unit_price (a price edited on
+    the invoice); without it the variant's retail/wholesale price is used.
+    """
     created_at = datetime.now().isoformat(timespec="seconds")
-    with database.get_connection() as conn:
+    lines = []
+    wanted = {}
+    for it in items:
+        vid = int(it["variant_id"])
+        qty = int(it["quantity"])
+        if qty <= 0:
+            raise ValueError(f"Quantity for variant {vid} must be positive")
+        unit = it.get("unit_price")
+        if unit is not None:
+            unit = float(unit)
+            if unit < 0:
+                raise ValueError(f"Unit price for variant {vid} cannot be negative")
+        lines.append((vid, qty, unit))
+        wanted[vid] = wanted.get(vid, 0) + qty
+
+    with database.transaction() as conn:
+        stock = _load_stock(conn, list(wanted))
+        missing = [vid for vid in wanted if vid not in stock]
+        if missing:
+            raise ValueError(f"Variant {', '.join(map(str, missing))} not found")
+        short = _shortages(stock, wanted)
+        if short:
+            raise InsufficientStockError(short)
+
         cur = conn.execute(
-            """INSERT INTO invoices(customer_name, customer_phone, pricing_type, tax_rate, created_at)
-                 VALUES(?,?,?,?,?)""",
-            (customer_name.strip(), customer_phone.strip(), pricing_type, float(tax_rate), created_at)
+            """INSERT INTO invoices(customer_name, customer_phone, pricing_type, tax_rate, created_at, customer_id, invoice_no)
+                 VALUES(?,?,?,?,?,?,?)""",
+            (customer_name.strip(), customer_phone.strip(), pricing_type, float(tax_rate), created_at,
+             int(customer_id) if customer_id else None, invoice_no)
         )
         invoice_id = cur.lastrowid
 
-        for it in items:
-            vid = int(it["variant_id"])
-            qty = int(it["quantity"])
-            vr = conn.execute("SELECT retail_price, wholesale_price, quantity FROM product_variants WHERE id=?", (vid,)).fetchone()
-            if not vr:
-                raise ValueError(f"Variant {vid} not found")
-            unit = vr["retail_price"] if pricing_type == "retail" else vr["wholesale_price"]
-            if qty > vr["quantity"]:
-                raise ValueError(f"Not enough stock for variant id {vid}")
-            line_total = unit * qty
-            conn.execute(
-                """INSERT INTO invoice_items(invoice_id, variant_id, quantity, unit_price, line_total)
-                     VALUES(?,?,?,?,?)""",
-                (invoice_id, vid, qty, unit, line_total)
-            )
-            conn.execute("UPDATE product_variants SET quantity = quantity - ? WHERE id=?", (qty, vid))
+        price_col = "retail_price" if pricing_type == "retail" else "wholesale_price"
+        rows = []
+        for vid, qty, unit in lines:
+            if unit is None:
+                unit = stock[vid][price_col]
+            rows.append((invoice_id, vid, qty, unit, unit * qty))
+        conn.executemany(
+            """INSERT INTO invoice_items(invoice_id, variant_id, quantity, unit_price, line_total)
+                 VALUES(?,?,?,?,?)""",
+            rows
+        )
+        cur = conn.executemany(
+            "UPDATE product_variants SET quantity = quantity - ? WHERE id=? AND quantity >= ?",
+            [(qty, vid, qty) for vid, qty in wanted.items()]
+        )
+        if cur.rowcount != len(wanted):
+            # cannot happen while we hold the write lock, but never commit a partial decrement
+            raise InsufficientStockError(_shortages(_load_stock(conn, list(wanted)), wanted))
     return invoice_id
 
 def get_invoice(invoice_id: int):
     with database.get_connection() as conn:
-        inv = conn.execute("SELECT * FROM invoices WHERE id=?", (invoice_id,)).fetchone()
+        inv = conn.execute(
+            """SELECT i.*, cu.address as customer_address
+                   FROM invoices i
+                   LEFT JOIN customers cu ON cu.id=i.customer_id
+                  WHERE i.id=?""",
+            (invoice_id,)
+        ).fetchone()
         items = conn.execute(
             """SELECT ii.*, p.name as product, s.name as size, c.name as color, pr.rack_number as rack
                    FROM invoice_items ii
@@ -266,7 +535,47 @@ def get_invoice(invoice_id: int):
                    JOIN sizes s ON s.id=v.size_id
                    JOIN colors c ON c.id=v.color_id
                    JOIN products p ON p.id=v.product_id
-                  WHERE ii.invoice_id=?""",
+                  WHERE ii.invoice_id=?
+                  ORDER BY ii.id""",
             (invoice_id,)
         ).fetchall()
     return inv, items
+
+def _invoice_range(start: Optional[str], end: Optional[str]):
+    """WHERE fragment for created_at in [start, end); dates or ISO timestamps."""
+    sql, params = "", []
+    if start:
+        sql += " AND created_at >= ?"
+        params.append(start)
+    if end:
+        sql += " AND created_at < ?"
+        params.append(end)
+    return sql, params
+
+def count_invoices(start: Optional[str] = None, end: Optional[str] = None) -> int:
+    where, params = _invoice_range(start, end)
+    with database.get_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM invoices WHERE 1=1" + where, params).fetchone()[0]
+
+def iter_invoice_ids(start: Optional[str] = None, end: Optional[str] = None, batch_size: int = 1000):
+    """
+    Yield ids of invoices created in [start, end), oldest first, fetching batch_size ids
+    per query (keyset on created_at, id) so no cursor or read transaction stays open.
+    """
+    where, params = _invoice_range(start, end)
+    last = None
+    while True:
+        sql = "SELECT created_at, id FROM invoices WHERE 1=1" + where
+        args = list(params)
+        if last is not None:
+            sql += " AND (created_at, id) > (?, ?)"
+            args.extend(last)
+        sql += " ORDER BY created_at, id LIMIT ?"
+        args.append(int(batch_size))
+        with database.get_connection() as conn:
+            rows = conn.execute(sql, args).fetchall()
+        if not rows:
+            return
+        for r in rows:
+            yield r["id"]
+        last = (rows[-1]["created_at"], rows[-1]["id"])
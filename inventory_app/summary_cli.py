@@ -0,0 +1,48 @@
+"""
+Rebuild the daily sales summaries from the invoices.
+
+    python rebuild_summaries.py                              # everything (backfill)
+    python rebuild_summaries.py --from 2025-08-01 --to 2025-08-31
+
+The summaries are kept current by triggers; this is for backfilling or repairing them
+after invoices were changed outside the app.
+"""
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+
+from . import database
+from . import reports
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="rebuild_summaries", description="Recompute the daily sales summary tables.")
+    p.add_argument("--from", dest="date_from", help="first day, YYYY-MM-DD (inclusive)")
+    p.add_argument("--to", dest="date_to", help="last day, YYYY-MM-DD (inclusive)")
+    p.add_argument("--db", default=str(database.DB_PATH), help="database file (default: the app database)")
+    return p
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        start = date.fromisoformat(args.date_from).isoformat() if args.date_from else None
+        end = (date.fromisoformat(args.date_to) + timedelta(days=1)).isoformat() if args.date_to else None
+    except ValueError as ex:
+        print(f"Bad date: {ex}", file=sys.stderr)
+        return 2
+
+    database.configure_pool(db_path=args.db)
+    database.init_db()
+    started = time.perf_counter()
+    try:
+        variants, customers = reports.rebuild_summaries(start, end)
+    finally:
+        database.close_pool()
+    print(f"Rebuilt {variants} variant-day and {customers} customer-day row(s) in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Helpers for keeping slow work (database queries, exports) off the Tk main thread.
+
+Tk is not thread-safe, so workers never touch widgets: results are queued and a
+short after() poll on the Tk thread hands them to the on_done/on_error callbacks.
+"""
+import queue
+import tkinter as tk
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+
+class BackgroundRunner:
+    """Run callables on worker threads (or watch any Future) and deliver results on the Tk thread."""
+
+    def __init__(self, widget, max_workers: int = 1, poll_ms: int = 25, name: str = "bg"):
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._results = queue.Queue()
+        self._pending = 0
+        self._poll_id = None
+        self._closed = False
+
+    def submit(self, fn, *args, on_done=None, on_error=None, **kwargs):
+        """Run fn(*args, **kwargs) on a worker; returns the Future (cancel() drops it if not started)."""
+        future = self._executor.submit(fn, *args, **kwargs)
+        return self.watch(future, on_done=on_done, on_error=on_error)
+
+    def watch(self, future, on_done=None, on_error=None):
+        """Deliver the outcome of an existing Future (e.g. from a process pool) on the Tk thread."""
+        self._pending += 1
+        future.add_done_callback(lambda f: self._results.put((f, on_done, on_error)))
+        self._schedule_poll()
+        return future
+
+    def _schedule_poll(self):
+        if self._poll_id is None and not self._closed:
+            try:
+                self._poll_id = self.widget.after(self.poll_ms, self._poll)
+            except tk.TclError:
+                self._poll_id = None
+
+    def _poll(self):
+        self._poll_id = None
+        while True:
+            try:
+                future, on_done, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if self._closed:
+                continue
+            try:
+                result = future.result()
+            except CancelledError:
+                continue
+            except Exception as ex:
+                if on_error:
+                    on_error(ex)
+                continue
+            if on_done:
+                on_done(result)
+        if self._pending > 0:
+            self._schedule_poll()
+
+    def shutdown(self, wait: bool = False):
+        """Stop delivering results; queued work is cancelled unless wait=True, which runs it to the end."""
+        self._closed = True
+        if self._poll_id is not None:
+            try:
+                self.widget.after_cancel(self._poll_id)
+            except tk.TclError:
+                pass
+            self._poll_id = None
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+class Debouncer:
+    """Call callback(*args) once the calls have stopped for delay_ms; each new call restarts the timer."""
+
+    def __init__(self, widget, delay_ms: int, callback):
+        self.widget = widget
+        self.delay_ms = delay_ms
+        self.callback = callback
+        self._after_id = None
+
+    def __call__(self, *args):
+        self.cancel()
+        self._after_id = self.widget.after(self.delay_ms, self._fire, args)
+
+    def _fire(self, args):
+        self._after_id = None
+        self.callback(*args)
+
+    def cancel(self):
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
@@ -1,6 +1,9 @@
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from .. import repository as repo
+from .. import importer
+from .async_tasks import BackgroundRunner
 
 class AddColorDialog(tk.Toplevel):
     def __init__(self, master):
@@ -148,3 +151,120 @@ class AddVariantDialog(tk.Toplevel):
         repo.add_variant(self.product_id, color_id, size_id, qty, retail, wholesale)
         messagebox.showinfo("Saved", "Variant added/updated")
         self.destroy()
+
+class StockImportDialog(tk.Toplevel):
+    """Pick a CSV, import it on a worker thread with a progress bar; on_finished(report) runs after a successful import."""
+    POLL_MS = 100
+
+    def __init__(self, master, on_finished=None):
+        super().__init__(master)
+        self.title("Import Stock from CSV")
+        self.resizable(False, False)
+        self.on_finished = on_finished
+        self._runner = BackgroundRunner(self, name="stock-import")
+        self._cancel = threading.Event()
+        self._progress = None   # (rows, imported, errors, fraction), written by the worker
+        self._poll_id = None
+
+        self.path = tk.StringVar()
+        tk.Label(self, text="CSV file").grid(row=0, column=0, padx=8, pady=6, sticky="e")
+        tk.Entry(self, textvariable=self.path, width=40).grid(row=0, column=1, padx=8, pady=6)
+        ttk.Button(self, text="Browse…", command=self._browse).grid(row=0, column=2, padx=8, pady=6)
+
+        self.mode = tk.StringVar(value="restock")
+        modes = ttk.Frame(self)
+        modes.grid(row=1, column=1, columnspan=2, sticky="w", padx=8)
+        ttk.Radiobutton(modes, text="Add to stock (delivery)", variable=self.mode, value="restock").pack(anchor="w")
+        ttk.Radiobutton(modes, text="Replace stock (stock-take)", variable=self.mode, value="set").pack(anchor="w")
+
+        self.bar = ttk.Progressbar(self, length=380, mode="determinate", maximum=1.0)
+        self.bar.grid(row=2, column=0, columnspan=3, padx=8, pady=6)
+        self.status = tk.Label(self, text="Columns: product, rack, color, size, qty[, retail, wholesale]", anchor="w")
+        self.status.grid(row=3, column=0, columnspan=3, padx=8, sticky="ew")
+        self.errors = tk.Text(self, height=8, width=60, state="disabled")
+        self.errors.grid(row=4, column=0, columnspan=3, padx=8, pady=6)
+
+        btns = ttk.Frame(self)
+        btns.grid(row=5, column=0, columnspan=3, pady=8)
+        self.start_btn = ttk.Button(btns, text="Import", command=self._start)
+        self.start_btn.pack(side="left", padx=6)
+        self.cancel_btn = ttk.Button(btns, text="Close", command=self._close)
+        self.cancel_btn.pack(side="left", padx=6)
+        self.protocol("WM_DELETE_WINDOW", self._close)
+
+    def _browse(self):
+        path = filedialog.askopenfilename(parent=self, title="Stock CSV", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if path:
+            self.path.set(path)
+
+    def _start(self):
+        path = self.path.get().strip()
+        if not path:
+            messagebox.showerror("Error", "Choose a CSV file first", parent=self)
+            return
+        if self.mode.get() == "set" and not messagebox.askyesno(
+                "Stock-take", "Quantities in the file will REPLACE current stock. Continue?", parent=self):
+            return
+        self.start_btn.config(state="disabled")
+        self.cancel_btn.config(text="Cancel")
+        self.status.config(text="Importing…")
+        self._runner.submit(importer.import_stock_csv, path, mode=self.mode.get(),
+                            progress=self._on_progress, cancel=self._cancel,
+                            on_done=self._on_done, on_error=self._on_error)
+        self._poll()
+
+    def _on_progress(self, report, fraction):
+        # worker thread: only hand the numbers over, _poll paints them
+        self._progress = (report.rows, report.imported, len(report.errors), fraction)
+
+    def _poll(self):
+        progress = self._progress
+        if progress is not None:
+            rows, imported, errors, fraction = progress
+            if fraction is None:
+                self.bar.config(mode="indeterminate")
+                self.bar.step(0.05)
+            else:
+                self.bar["value"] = fraction
+            self.status.config(text=f"{rows} rows read, {imported} imported, {errors} error(s)…")
+        self._poll_id = self.after(self.POLL_MS, self._poll)
+
+    def _stop_polling(self):
+        if self._poll_id is not None:
+            self.after_cancel(self._poll_id)
+            self._poll_id = None
+
+    def _on_done(self, report):
+        self._stop_polling()
+        self.bar["value"] = 1.0
+        self.status.config(text=report.summary())
+        self.start_btn.config(state="normal")
+        self.cancel_btn.config(text="Close")
+        self.errors.config(state="normal")
+        self.errors.delete("1.0", "end")
+        for line_no, message in report.errors[:500]:
+            self.errors.insert("end", f"line {line_no}: {message}\n")
+        if len(report.errors) > 500:
+            self.errors.insert("end", f"... and {len(report.errors) - 500} more\n")
+        self.errors.config(state="disabled")
+        if self.on_finished:
+            self.on_finished(report)
+
+    def _on_error(self, ex):
+        self._stop_polling()
+        self.status.config(text=f"Import failed: {ex}")
+        self.start_btn.config(state="normal")
+        self.cancel_btn.config(text="Close")
+        if self.on_finished:
+            # earlier chunks may have been committed
+            self.on_finished(None)
+
+    def _close(self):
+        if self.cancel_btn.cget("text") == "Cancel":
+            # stop after the current chunk; _on_done reports what was committed
+            self._cancel.set()
+            self.status.config(text="Cancelling…")
+            return
+        self._stop_polling()
+        self._runner.shutdown()
+        self.destroy()
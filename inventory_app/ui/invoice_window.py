@@ -3,10 +3,11 @@
 Rewritten invoice_window with:
  - Customer search + Add Customer option (uses dialogs.AddCustomerDialog)
  - Product search with dropdown (uses repository.search_products)
- - Pricing respects customer type via repository.get_product_price
+ - Pricing respects customer type via pricing.PriceResolver (bulk, no per-row lookups)
  - Editable Qty & Unit Price in invoice table (double-click to edit)
  - Remove selected row button
- - Save exports to exports/ (reportlab if available; otherwise txt)
+ - Save commits the invoice via repository.create_invoice (stock is taken out) and
+   queues the persisted invoice for export to exports/ (utils.export_queue, off the UI thread)
 """
 import os
 import json
@@ -14,28 +15,17 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from datetime import datetime
 
-try:
-    from PIL import Image, ImageTk
-    _HAS_PIL = True
-except Exception:
-    _HAS_PIL = False
-
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.units import mm
-    from reportlab.pdfgen import canvas
-    _HAS_RL = True
-except Exception:
-    _HAS_RL = False
-
 # local modules
 try:
     from .. import repository as repo
+    from .. import pricing
 except Exception:
     try:
         import repository as repo
+        import pricing
     except Exception:
         repo = None
+        pricing = None
 
 try:
     from .dialogs import AddCustomerDialog
@@ -43,6 +33,19 @@ except Exception:
     # fallback simple dialog class if module import fails
     AddCustomerDialog = None
 
+try:
+    from .async_tasks import BackgroundRunner, Debouncer
+except Exception:
+    from ui.async_tasks import BackgroundRunner, Debouncer
+
+def _get_export_queue():
+    # the export queue (multiprocessing, pdf_export) is loaded with the first saved invoice
+    try:
+        from ..utils.export_queue import get_export_queue
+    except ImportError:
+        from utils.export_queue import get_export_queue
+    return get_export_queue()
+
 _DEFAULT_BRAND = {
     "business_name": "My Warehouse Ltd.",
     "address": "123 Main Street, City, Country",
@@ -52,6 +55,10 @@ _DEFAULT_BRAND = {
 }
 
 class InvoiceWindow(tk.Toplevel):
+    # type-ahead: wait this long after the last key before querying, and show this many rows per page
+    SEARCH_DELAY_MS = 180
+    SEARCH_PAGE_SIZE = 50
+
     def __init__(self, parent, invoice=None):
         super().__init__(parent)
         self.transient(parent)
@@ -67,21 +74,34 @@ class InvoiceWindow(tk.Toplevel):
         self.items = []  # each: dict {pid, item, size, color, qty, unit}
         self.tax_percent = float(self.invoice.get("tax_percent", 10.0))
 
-        # Build UI under defensive try/except was added before; keep normal build here
+        # type-ahead searches run on one worker each; only the newest query's results are shown
+        self._prod_runner = BackgroundRunner(self, name="product-search")
+        self._cust_runner = BackgroundRunner(self, name="customer-search")
+        # PDFs render in the export process pool; this only relays completion to the window
+        self._export_runner = BackgroundRunner(self, name="export-watch")
+        self._prod_debounce = Debouncer(self, self.SEARCH_DELAY_MS, self._start_prod_search)
+        self._cust_debounce = Debouncer(self, self.SEARCH_DELAY_MS, self._start_cust_search)
+        self._prod_search_seq = 0
+        self._cust_search_seq = 0
+        self._prod_future = None
+        self._cust_future = None
+        self._prod_query = None
+        self._cust_query = None
+        self.bind("<Destroy>", self._on_destroy, add="+")
+
         self._build_ui()
         # preload invoice items if present
         for it in self.invoice.get("items", []):
             self._append_item(it)
         self._update_totals()
 
-        self.tax_percent = float(self.invoice.get("tax_percent", 10.0))
-
-        # ensure total-related TK vars exist before any UI actions that may call _update_totals
-        self.subtotal_var = tk.StringVar("0.00")
-        self.tax_var = tk.StringVar("0.00")
-        self.grand_var = tk.StringVar("0.00")
-
-        self._build_ui()
+    def _on_destroy(self, evt):
+        if evt.widget is not self:
+            return
+        for deb in (self._prod_debounce, self._cust_debounce):
+            deb.cancel()
+        for runner in (self._prod_runner, self._cust_runner, self._export_runner):
+            runner.shutdown()
 
     def _branding_path(self):
         return os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "config.json"))
@@ -109,7 +129,12 @@ class InvoiceWindow(tk.Toplevel):
         path = self.branding.get("logo")
         if path and os.path.exists(path):
             try:
-                if _HAS_PIL:
+                # PIL is only needed here (to scale the logo), so it's imported on first use
+                try:
+                    from PIL import Image, ImageTk
+                except Exception:
+                    Image = None
+                if Image is not None:
                     img = Image.open(path)
                     img.thumbnail((120,120), Image.LANCZOS)
                     self.logo_img = ImageTk.PhotoImage(img)
@@ -218,8 +243,10 @@ class InvoiceWindow(tk.Toplevel):
         bottom = ttk.Frame(self, padding=(pad,6)); bottom.pack(fill="x")
         left_actions = ttk.Frame(bottom); left_actions.pack(side="left")
         ttk.Button(left_actions, text="Remove Selected", command=self._remove_selected).pack(side="left", padx=6)
+        self.export_status = tk.StringVar(value="")
+        ttk.Label(left_actions, textvariable=self.export_status, foreground="#555555").pack(side="left", padx=6)
         right_tot = ttk.Frame(bottom); right_tot.pack(side="right")
-        self.subtotal_var = tk.StringVar("0.00"); self.tax_var = tk.StringVar("0.00"); self.grand_var = tk.StringVar("0.00")
+        self.subtotal_var = tk.StringVar(value="0.00"); self.tax_var = tk.StringVar(value="0.00"); self.grand_var = tk.StringVar(value="0.00")
         ttk.Label(right_tot, text="Subtotal:").grid(row=0,column=0, sticky="e")
         ttk.Label(right_tot, textvariable=self.subtotal_var, width=12, anchor="e").grid(row=0,column=1, padx=8)
         ttk.Label(right_tot, text="Tax %").grid(row=1,column=0, sticky="e")
@@ -240,17 +267,45 @@ class InvoiceWindow(tk.Toplevel):
 
     # --------- customer handlers ----------
     def _on_cust_search_key(self, _evt):
+        self._cust_debounce()
+
+    def _start_cust_search(self, offset=0):
         q = (self.cust_search_var.get() or "").strip()
-        self.cust_suggestions.delete(0, tk.END)
-        self._last_cust_results = []
+        if offset == 0:
+            if q == self._cust_query:
+                return
+            self._cust_query = q
+        self._cust_search_seq += 1
+        seq = self._cust_search_seq
+        if self._cust_future is not None:
+            self._cust_future.cancel()
+            self._cust_future = None
+        if offset == 0:
+            self.cust_suggestions.delete(0, tk.END)
+            self._last_cust_results = []
         if not q:
             return
-        try:
-            results = repo.get_customer_by_name_or_id(q) if repo and hasattr(repo, "get_customer_by_name_or_id") else []
-        except Exception:
-            results = []
+        self._cust_future = self._cust_runner.submit(
+            self._fetch_customers, q, offset, self.SEARCH_PAGE_SIZE,
+            on_done=lambda res: self._show_cust_results(seq, q, offset, res),
+            on_error=lambda _ex: self._show_cust_results(seq, q, offset, ([], False)),
+        )
+
+    @staticmethod
+    def _fetch_customers(q, offset, limit):
+        # runs on the search worker: no widget access here
+        if not (repo and hasattr(repo, "get_customer_by_name_or_id")):
+            return [], False
+        results = repo.get_customer_by_name_or_id(q, limit=limit + 1, offset=offset)
+        return results[:limit], len(results) > limit
+
+    def _show_cust_results(self, seq, q, offset, res):
+        if seq != self._cust_search_seq:
+            return  # a newer query has been started since
+        results, more = res
+        self._drop_more_row(self.cust_suggestions, self._last_cust_results)
         # if none found show "Add Customer" option
-        if not results:
+        if not results and offset == 0:
             self.cust_suggestions.insert(tk.END, f"Add new customer: \"{q}\"")
             self._last_cust_results.append({"action":"add","label":q})
             return
@@ -258,6 +313,15 @@ class InvoiceWindow(tk.Toplevel):
             label = f"{c.get('name')}  —  {c.get('phone') or ''}  ({c.get('type') or 'retail'})"
             self.cust_suggestions.insert(tk.END, label)
             self._last_cust_results.append(c)
+        if more:
+            self.cust_suggestions.insert(tk.END, "… more customers")
+            self._last_cust_results.append({"action":"more","offset": offset + len(results)})
+
+    @staticmethod
+    def _drop_more_row(listbox, metas):
+        if metas and metas[-1].get("action") == "more":
+            listbox.delete(len(metas) - 1)
+            metas.pop()
 
     def _on_cust_suggestion_select(self, _evt):
         sel = self.cust_suggestions.curselection()
@@ -271,6 +335,9 @@ class InvoiceWindow(tk.Toplevel):
             # open add dialog
             self._on_add_customer(prefill_name=meta.get("label"))
             return
+        if meta.get("action") == "more":
+            self._start_cust_search(offset=meta["offset"])
+            return
         # populate customer
         self.customer.update({
             "id": meta.get("id",""),
@@ -280,8 +347,8 @@ class InvoiceWindow(tk.Toplevel):
             "type": meta.get("type","retail")
         })
         # reflect selection in search entry
-        self.cust_search_var.set(self.customer.get("name",""))
-        self.cust_suggestions.delete(0, tk.END)
+        self._set_customer_text(self.customer.get("name",""))
+        self._on_customer_changed()
 
     def _on_add_customer(self, prefill_name=""):
         dlg = None
@@ -325,35 +392,90 @@ class InvoiceWindow(tk.Toplevel):
             "address": new.get("address",""),
             "type": new.get("type","retail")
         })
-        self.cust_search_var.set(self.customer.get("name",""))
+        self._set_customer_text(self.customer.get("name",""))
+        self._on_customer_changed()
+
+    def _set_customer_text(self, text):
+        # show the chosen customer without triggering a search for it
+        self._cust_debounce.cancel()
+        self._cust_search_seq += 1
+        self._cust_query = text.strip()
+        self.cust_search_var.set(text)
         self.cust_suggestions.delete(0, tk.END)
+        self._last_cust_results = []
+
+    def _on_customer_changed(self):
+        # lines and suggestions follow the customer's price list (retail/wholesale)
+        self._reprice_lines()
+        self._start_prod_search()
+
+    def _reprice_lines(self):
+        """Re-price the invoice lines for the current customer, one bulk lookup; hand-edited prices are kept."""
+        lines = [it for it in self.items if str(it.get("pid") or "").isdigit() and not it.get("manual")]
+        if not (lines and pricing):
+            return
+        try:
+            resolver = pricing.PriceResolver(self.customer.get("type", "retail"), self.customer.get("id"))
+            prices = resolver.resolve(int(it["pid"]) for it in lines)
+        except Exception:
+            return
+        for it in lines:
+            price = prices.get(int(it["pid"]))
+            if price is not None:
+                it["unit"] = float(price)
+        self._refresh_tree_rows()
+        self._update_totals()
 
     # -------- product handlers ----------
     def _on_prod_search_key(self, _evt):
+        self._prod_debounce()
+
+    def _start_prod_search(self, offset=0):
         q = (self.prod_search_var.get() or "").strip()
-        self.prod_suggestions.delete(0, tk.END)
-        self._last_prod_results = []
+        # display price according to selected customer type
+        ctype = self.customer.get("type","retail")
+        if offset == 0:
+            if (q, ctype) == self._prod_query:
+                return
+            self._prod_query = (q, ctype)
+        self._prod_search_seq += 1
+        seq = self._prod_search_seq
+        if self._prod_future is not None:
+            self._prod_future.cancel()
+            self._prod_future = None
+        if offset == 0:
+            self.prod_suggestions.delete(0, tk.END)
+            self._last_prod_results = []
         if not q:
             return
-        try:
-            results = repo.search_products(q) if repo and hasattr(repo, "search_products") else []
-        except Exception:
-            results = []
+        self._prod_future = self._prod_runner.submit(
+            self._fetch_products, q, ctype, self.customer.get("id"), offset, self.SEARCH_PAGE_SIZE,
+            on_done=lambda res: self._show_prod_results(seq, offset, res),
+            on_error=lambda _ex: self._show_prod_results(seq, offset, ([], False)),
+        )
+
+    @staticmethod
+    def _fetch_products(q, ctype, customer_id, offset, limit):
+        # runs on the search worker: query and format rows, no widget access here
+        if not (repo and hasattr(repo, "search_products")):
+            return [], False
+        results = repo.search_products(q, limit=limit + 1, offset=offset)
+        more = len(results) > limit
+        results = results[:limit]
+        prices = {}
+        if pricing:
+            try:
+                prices = pricing.PriceResolver(ctype, customer_id).resolve_rows(results)
+            except Exception:
+                prices = {}
+        rows = []
         for p in results:
-            # display price according to selected customer type
-            ctype = self.customer.get("type","retail")
-            price = p.get("retail_price",0.0)
-            if repo and hasattr(repo, "get_product_price"):
-                try:
-                    price = repo.get_product_price(p.get("id"), ctype)
-                except Exception:
-                    price = price
+            price = prices.get(p.get("id"), p.get("retail_price",0.0))
             # show available qty and extra spacing for readability
             qty_avail = p.get("quantity", 0)
             label = f"{p.get('name')}   |   {p.get('size') or ''}   |   {p.get('color') or ''}   ${price:.2f}   [{qty_avail}]   [{p.get('id')}]"
-            self.prod_suggestions.insert(tk.END, label)
             # store full meta including id and both prices
-            self._last_prod_results.append({
+            rows.append((label, {
                 "id": p.get("id"),
                 "name": p.get("name"),
                 "size": p.get("size"),
@@ -361,7 +483,21 @@ class InvoiceWindow(tk.Toplevel):
                 "retail_price": float(p.get("retail_price") or 0.0),
                 "wholesale_price": float(p.get("wholesale_price") or 0.0),
                 "quantity": int(p.get("quantity") or 0),
-            })
+            }))
+        return rows, more
+
+    def _show_prod_results(self, seq, offset, res):
+        if seq != self._prod_search_seq:
+            return  # a newer query has been started since
+        rows, more = res
+        self._drop_more_row(self.prod_suggestions, self._last_prod_results)
+        for label, meta in rows:
+            self.prod_suggestions.insert(tk.END, label)
+            self._last_prod_results.append(meta)
+        if more:
+            self.prod_suggestions.insert(tk.END, "… more results (double-click to load)")
+            self._last_prod_results.append({"action":"more","offset": offset + len(rows)})
+
     def _add_selected_product(self):
         sel = self.prod_suggestions.curselection()
         if not sel:
@@ -369,12 +505,15 @@ class InvoiceWindow(tk.Toplevel):
             return
         idx = sel[0]
         meta = self._last_prod_results[idx]
+        if meta.get("action") == "more":
+            self._start_prod_search(offset=meta["offset"])
+            return
         # determine unit price using customer type
         ctype = self.customer.get("type","retail")
         unit = meta.get("retail_price",0.0)
-        if repo and hasattr(repo, "get_product_price"):
+        if pricing:
             try:
-                unit = repo.get_product_price(meta.get("id"), ctype)
+                unit = pricing.PriceResolver(ctype, self.customer.get("id")).resolve_rows([meta]).get(meta.get("id"), unit)
             except Exception:
                 unit = unit
         # ask qty
@@ -391,7 +530,8 @@ class InvoiceWindow(tk.Toplevel):
         })
         # clear search
         self.prod_search_var.set("")
-        self.prod_suggestions.delete(0, tk.END)
+        self._prod_debounce.cancel()
+        self._start_prod_search()
 
     # -------- tree / editing ----------
     def _append_item(self, it):
@@ -455,9 +595,23 @@ class InvoiceWindow(tk.Toplevel):
                 if new_unit is None:
                     return
                 cur["unit"] = float(new_unit)
+                cur["manual"] = True   # keep it when the customer (and so the price list) changes
             self._refresh_tree_rows()
             self._update_totals()
 
+    def _remove_selected(self):
+        sel = self.tree.selection()
+        if not sel:
+            messagebox.showinfo("Remove", "Select a line to remove.", parent=self)
+            return
+        # tree rows and self.items share positions; drop from the end so earlier positions stay valid
+        for idx in sorted((self.tree.index(iid) for iid in sel), reverse=True):
+            if idx < len(self.items):
+                del self.items[idx]
+        self.tree.delete(*sel)
+        self._refresh_tree_rows()
+        self._update_totals()
+
     # -------- totals / tax ----------
     def _on_tax_change(self):
         try:
@@ -479,106 +633,61 @@ class InvoiceWindow(tk.Toplevel):
         self.tax_var.set(f"{tax_amt:.2f}")
         self.grand_var.set(f"{grand:.2f}")
 
-    # -------- save/export (unchanged idea) ----------
+    # -------- save/export ----------
     def _save_invoice(self):
-        exports_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "exports"))
-        os.makedirs(exports_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        fname = f"invoice_{self.invoice_no.get()}_{timestamp}"
-        pdf_path = os.path.join(exports_dir, f"{fname}.pdf")
-        txt_path = os.path.join(exports_dir, f"{fname}.txt")
-
-        branding = self.branding
+        if not self.items:
+            messagebox.showinfo("Save", "Add at least one product to the invoice.", parent=self)
+            return
+        if not (repo and hasattr(repo, "create_invoice")):
+            messagebox.showerror("Save failed", "Database is not available.", parent=self)
+            return
+        if any(not str(it.get("pid") or "").isdigit() for it in self.items):
+            messagebox.showerror("Save failed", "Some lines are not linked to a product; remove and re-add them.", parent=self)
+            return
         customer = self.customer.copy()
-        items = list(self.items)
-        subtotal = float(self.subtotal_var.get()); tax_amt = float(self.tax_var.get()); grand = float(self.grand_var.get())
-
-        if _HAS_RL:
-            try:
-                c = canvas.Canvas(pdf_path, pagesize=A4)
-                w, h = A4
-                margin = 20 * mm
-                y = h - margin
-                # logo / business on PDF
-                logo = branding.get("logo")
-                if logo and os.path.exists(logo):
-                    try:
-                        c.drawImage(logo, margin, y - 30*mm, width=40*mm, preserveAspectRatio=True, mask='auto')
-                    except Exception:
-                        c.setFont("Helvetica-Bold", 14); c.drawString(margin, y-10, branding.get("business_name"))
-                else:
-                    c.setFont("Helvetica-Bold", 14); c.drawString(margin, y-10, branding.get("business_name"))
-                c.setFont("Helvetica", 9)
-                bx = w - margin - 220; by = y - 6
-                lines = [branding.get("business_name"), branding.get("address"), f"Phone: {branding.get('phone')}", f"Email: {branding.get('email')}"]
-                for ln in lines:
-                    c.drawRightString(w - margin, by, ln)
-                    by -= 10
-                # invoice meta
-                meta_y = y - 40
-                c.setFont("Helvetica-Bold", 10)
-                c.drawString(margin, meta_y, f"Invoice #: {self.invoice_no.get()}")
-                c.drawString(margin, meta_y - 12, f"Date: {self.date_var.get()}")
-                # customer (include address)
-                cy = meta_y
-                c.setFont("Helvetica-Bold", 10); c.drawString(w - margin - 220, cy, "Billed To:")
-                c.setFont("Helvetica", 9)
-                c.drawRightString(w - margin, cy - 12, customer.get("name",""))
-                c.drawRightString(w - margin, cy - 24, customer.get("address",""))
-                c.drawRightString(w - margin, cy - 36, f"Phone: {customer.get('phone','')}")
-                # table
-                table_y = cy - 60
-                c.setFont("Helvetica-Bold",9)
-                c.drawString(margin, table_y, "Item")
-                c.drawString(margin + 300, table_y, "Size")
-                c.drawString(margin + 380, table_y, "Color")
-                c.drawRightString(margin + 460 + 20, table_y, "Qty")
-                c.drawRightString(margin + 520 + 60, table_y, "Unit")
-                c.drawRightString(w - margin, table_y, "Total")
-                c.line(margin, table_y-4, w - margin, table_y-4)
-                ry = table_y - 18
-                c.setFont("Helvetica",9)
-                for it in items:
-                    if ry < margin + 40:
-                        c.showPage()
-                        ry = h - margin - 40
-                    c.drawString(margin, ry, str(it.get("item","")))
-                    c.drawString(margin + 300, ry, str(it.get("size","")))
-                    c.drawString(margin + 380, ry, str(it.get("color","")))
-                    c.drawRightString(margin + 460 + 20, ry, str(it.get("qty","")))
-                    c.drawRightString(margin + 520 + 60, ry, f"{float(it.get('unit',0.0)):.2f}")
-                    total = int(it.get("qty",0)) * float(it.get("unit",0.0))
-                    c.drawRightString(w - margin, ry, f"{total:.2f}")
-                    ry -= 16
-                # totals
-                c.setFont("Helvetica",9)
-                c.drawRightString(w - margin, ry - 10, f"Subtotal: {subtotal:.2f}")
-                c.drawRightString(w - margin, ry - 26, f"Tax ({self.tax_percent}%): {tax_amt:.2f}")
-                c.setFont("Helvetica-Bold",11)
-                c.drawRightString(w - margin, ry - 46, f"Grand Total: {grand:.2f}")
-                c.setFont("Helvetica",8)
-                c.drawString(margin, margin + 10, "Payment terms: Due within 30 days.")
-                c.save()
-                messagebox.showinfo("Saved", f"Invoice exported to PDF:\n{pdf_path}")
-                return
-            except Exception as ex:
-                print("PDF export failed:", ex)
+        ctype = customer.get("type") if customer.get("type") in ("retail", "wholesale") else "retail"
+        lines = [{"variant_id": int(it["pid"]), "quantity": int(it["qty"]), "unit_price": float(it["unit"])} for it in self.items]
+        try:
+            invoice_id = repo.create_invoice(
+                customer.get("name") or "", customer.get("phone") or "", ctype, self.tax_percent, lines,
+                customer_id=customer.get("id") or None, invoice_no=self.invoice_no.get(),
+            )
+        except repo.InsufficientStockError as ex:
+            short = "\n".join(f"{s['label']}: requested {s['requested']}, in stock {s['available']}" for s in ex.shortages)
+            messagebox.showerror("Not enough stock", f"The invoice was not saved:\n\n{short}", parent=self)
+            return
+        except Exception as ex:
+            messagebox.showerror("Save failed", str(ex), parent=self)
+            return
 
-        # fallback text export
+        invoice_no = self.invoice_no.get()
+        self._reset_invoice()
+        # render in the background so the next sale can start right away
+        exports_dir = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "exports"))
         try:
-            with open(txt_path, "w", encoding="utf-8") as f:
-                f.write(f"{branding.get('business_name')}\n{branding.get('address')}\nPhone: {branding.get('phone')}\nEmail: {branding.get('email')}\n\n")
-                f.write(f"Invoice: {self.invoice_no.get()}\nDate: {self.date_var.get()}\n\n")
-                f.write("Billed To:\n")
-                f.write(f"{customer.get('name','')}\n{customer.get('address','')}\nPhone: {customer.get('phone','')}\n\n")
-                f.write(f"{'Item':40}{'Size':10}{'Color':10}{'Qty':6}{'Unit':12}{'Total':12}\n")
-                f.write("-"*100 + "\n")
-                for it in items:
-                    qty = int(it.get("qty",0)); unit = float(it.get("unit",0.0)); total = qty*unit
-                    f.write(f"{it.get('item','')[:40]:40}{it.get('size','')[:10]:10}{it.get('color','')[:10]:10}{qty:6}{unit:12.2f}{total:12.2f}\n")
-                f.write("-"*100 + "\n")
-                f.write(f"Subtotal: {subtotal:.2f}\nTax ({self.tax_percent}%): {tax_amt:.2f}\nGrand Total: {grand:.2f}\n")
-            messagebox.showinfo("Saved", f"Invoice exported to:\n{txt_path}")
+            invoice, items = repo.get_invoice(invoice_id)
+            future = _get_export_queue().submit(invoice, items, exports_dir, branding=self.branding)
         except Exception as ex:
-            messagebox.showerror("Export failed", str(ex))
-# ...existing code...
\ No newline at end of file
+            self._on_export_failed(invoice_no, ex)
+            return
+        self.export_status.set(f"Invoice {invoice_no} saved, exporting…")
+        self._export_runner.watch(
+            future,
+            on_done=lambda path: self.export_status.set(f"Invoice {invoice_no} exported to {path}"),
+            on_error=lambda ex: self._on_export_failed(invoice_no, ex),
+        )
+
+    def _on_export_failed(self, invoice_no, ex):
+        self.export_status.set(f"Invoice {invoice_no} saved, export failed")
+        messagebox.showerror("Export failed", f"Invoice {invoice_no} was saved, but exporting it failed:\n{ex}", parent=self)
+
+    def _reset_invoice(self):
+        # start the next sale: new number, no lines, no customer
+        for iid in self.tree.get_children():
+            self.tree.delete(iid)
+        self.items = []
+        self.customer = {"id":"", "name":"", "phone":"", "address":"", "type":"retail"}
+        self._set_customer_text("")
+        self.invoice_no.set(f"INV{datetime.now().strftime('%Y%m%d%H%M%S')}")
+        self.date_var.set(datetime.now().strftime("%Y-%m-%d %H:%M"))
+        self._update_totals()
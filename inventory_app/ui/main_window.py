@@ -1,20 +1,43 @@
 # ...existing code...
+import importlib
+import sys
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox
 
 # try package imports first, fall back to script-style imports
 try:
     from .. import repository as repo
-    from .dialogs import AddColorDialog, AddSizeDialog, AddProductDialog, AddVariantDialog
-    from .invoice_window import InvoiceWindow
 except Exception:
     try:
         import repository as repo
-        from ui.dialogs import AddColorDialog, AddSizeDialog, AddProductDialog, AddVariantDialog
-        from ui.invoice_window import InvoiceWindow
     except Exception:
         repo = None
-        AddColorDialog = AddSizeDialog = AddProductDialog = AddVariantDialog = InvoiceWindow = None
+
+try:
+    from .virtual_tree import VirtualTreeview
+    from .async_tasks import BackgroundRunner
+    from ..inventory_index import InventoryIndex
+except Exception:
+    from ui.virtual_tree import VirtualTreeview
+    from ui.async_tasks import BackgroundRunner
+    from inventory_index import InventoryIndex
+
+
+def _lazy(module, name):
+    """
+    A class from one of the secondary windows (dialogs, invoice_window, ...), imported
+    on first use so startup doesn't pay for them (or for PIL); None when the module or
+    one of its dependencies can't be imported. Any other error is a bug and propagates.
+    """
+    try:
+        if __package__:
+            mod = importlib.import_module(f".{module}", __package__)
+        else:
+            mod = importlib.import_module(f"ui.{module}")
+    except ImportError as ex:
+        print(f"{module}.{name} not available: {ex}", file=sys.stderr)
+        return None
+    return getattr(mod, name)
 
 # Sample data
 SAMPLE_VARIANTS = [
@@ -44,22 +67,62 @@ class CollapsibleSection(ttk.Frame):
         else:
             self.body.grid_remove()
 
+LOW_STOCK_LIMIT = 5
+
 class InventoryUI(tk.Tk):
-    def __init__(self):
+    PAGE_SIZE = 500          # variants per page while the user is only scrolling
+    BULK_PAGE_SIZE = 5000    # variants per page once a filter needs the whole catalog
+
+    def __init__(self, prepare=None):
+        """
+        prepare: optional callable run on a worker before the first page is requested
+        (database migrations, cache warm-up), so the window paints while it runs.
+        """
         super().__init__()
         self.title("Inventory - Beta UI")
         self.geometry("1100x700")
         self.configure(bg="#f3f4f6")
         self.style = ttk.Style(self)
         self._setup_styles()
-        self.data = SAMPLE_VARIANTS.copy()
-        self.filtered = list(self.data)
+        # columnar index over the loaded variants; self.filtered is a lazy view of the rows the filters keep.
+        # With a repository the grid starts empty and fills page by page (see _reload_from_repo).
+        has_repo = bool(repo and hasattr(repo, "list_variants"))
+        self.index = InventoryIndex(() if has_repo else SAMPLE_VARIANTS, low_limit=LOW_STOCK_LIMIT)
+        self.filtered = self.index.filter()
+        self._loader = BackgroundRunner(self, name="inventory-pages")
+        # one worker, so edits reach the database in the order they were made
+        self._writer = BackgroundRunner(self, name="inventory-writes")
+        self._load_gen = 0
+        self._load_future = None
+        self._load_cursor = None
+        self._load_total = None
+        self._load_done = not has_repo
+        self._next_index = None
         self._last_action = ""
         self._build_ui()
-        # attempt to load real data if repo available
-        self._reload_from_repo()
+        self.bind("<Destroy>", self._on_destroy, add="+")
+        # Ctrl+Shift+Q: the uppercase keysym is what Shift (or Caps Lock) produces
+        self.bind("<Control-Q>", lambda e: self._open_query_stats())
         self._refresh_tree()
-        self._update_status_bar("Ready")
+        if not has_repo:
+            self._update_status_bar("Ready")
+        elif prepare is None:
+            self._reload_from_repo()
+            self._update_status_bar("Loading inventory…")
+        else:
+            self._update_status_bar("Starting…")
+            self._loader.submit(prepare, on_done=lambda _: self._on_prepared(),
+                                on_error=lambda ex: self._update_status_bar(f"Database not ready: {ex}"))
+
+    def _on_prepared(self):
+        self._reload_from_repo()
+        self._update_status_bar("Loading inventory…")
+
+    def _on_destroy(self, evt):
+        if evt.widget is self:
+            self._loader.shutdown()
+            # let queued edits reach the database rather than dropping them
+            self._writer.shutdown(wait=True)
 
     def _setup_styles(self):
         # General
@@ -136,11 +199,12 @@ class InventoryUI(tk.Tk):
         ttk.Radiobutton(cs_stock.body, text="Low (<5)", variable=self.stock_filter, value="low", command=self._apply_filters).pack(anchor="w")
         ttk.Radiobutton(cs_stock.body, text="Out of Stock", variable=self.stock_filter, value="out", command=self._apply_filters).pack(anchor="w")
 
-        # Center - Treeview
-        tree_frame = ttk.Frame(center)
-        tree_frame.pack(fill="both", expand=True)
+        # Center - Treeview (virtual: only the visible rows exist as Tk items)
         columns = ("product", "color", "size", "rack", "stock", "price", "variant_id")
-        self.tree = ttk.Treeview(tree_frame, columns=columns, show="headings", selectmode="browse")
+        self.grid_view = VirtualTreeview(center, columns, self._format_row)
+        self.grid_view.pack(fill="both", expand=True)
+        self.grid_view.bind("<<ViewChanged>>", lambda e: self._on_view_changed())
+        self.tree = self.grid_view.tree
         for col, hd in zip(columns, ("Product", "Color", "Size", "Rack", "Stock", "Price", "variant_id")):
             self.tree.heading(col, text=hd)
             if col == "variant_id":
@@ -149,7 +213,6 @@ class InventoryUI(tk.Tk):
                 self.tree.column(col, width=220)
             else:
                 self.tree.column(col, width=100, anchor="center")
-        self.tree.pack(fill="both", expand=True, side="left")
         self.tree.bind("<Button-3>", self._on_right_click)
         self.tree.tag_configure('odd', background='#ffffff')
         self.tree.tag_configure('even', background='#f7fafc')
@@ -169,7 +232,8 @@ class InventoryUI(tk.Tk):
             ("➕  Add Variant", self._add_variant),
             ("🔄  Restock", self._restock_prompt),
             ("💲  Update Price", self._update_price_prompt),
-            ("🗑️  Delete Variant", self._delete_prompt)
+            ("🗑️  Delete Variant", self._delete_prompt),
+            ("📥  Import Stock CSV", self._import_stock),
         ]
         for text, cmd in act_buttons:
             b = ttk.Button(actions_card, text=text, command=cmd)
@@ -181,90 +245,185 @@ class InventoryUI(tk.Tk):
         self.status_label = ttk.Label(status, text="", style="Status.TLabel", padding=6)
         self.status_label.pack(side="left")
 
-    # attempt to load data from repo; return True if loaded
+    # -- loading: variants arrive from repo.list_variants one keyset page at a time, in display order
     def _reload_from_repo(self):
+        """Start (re)loading variants from the repository; returns False when there is none."""
         if not repo or not hasattr(repo, "list_variants"):
             return False
-        try:
-            rows = repo.list_variants({})
-            if not rows:
-                return False
-            new = []
-            first = rows[0]
-            if isinstance(first, dict):
-                for r in rows:
-                    new.append({
-                        "variant_id": str(r.get("variant_id") or r.get("vid") or r.get("id")),
-                        "product": r.get("product") or r.get("name") or "",
-                        "color": r.get("color") or "",
-                        "size": r.get("size") or "",
-                        "rack": r.get("rack") or "",
-                        "stock": int(r.get("qty") or r.get("stock") or 0),
-                        "price": float(r.get("price") or r.get("retail_price") or 0.0)
-                    })
-            else:
-                for r in rows:
-                    try:
-                        prod = r[0]; rack = r[1]; size = r[2]; color = r[3]; qty = int(r[4]); price = float(r[5])
-                        vid = str(r[7]) if len(r) > 7 else str(r[-1])
-                    except Exception:
-                        continue
-                    new.append({"variant_id": vid, "product": prod, "color": color, "size": size, "rack": rack, "stock": qty, "price": price})
-            if new:
-                self.data = new
-                self.filtered = list(self.data)
-                return True
-        except Exception:
-            return False
-        return False
+        self._load_gen += 1
+        self._load_future = None
+        self._load_cursor = None
+        self._load_done = False
+        # filled by the first page, so the current rows stay on screen until then
+        self._next_index = InventoryIndex(low_limit=LOW_STOCK_LIMIT)
+        self._fetch_next_page()
+        return True
+
+    def _fetch_next_page(self):
+        if self._load_done or (self._load_future is not None and not self._load_future.done()):
+            return
+        limit = self.BULK_PAGE_SIZE if self._filters_active() else self.PAGE_SIZE
+        gen = self._load_gen
+        self._load_future = self._loader.submit(
+            self._fetch_page, self._load_cursor, limit, self._load_cursor is None,
+            on_done=lambda res: self._on_page(gen, res),
+            on_error=lambda ex: self._on_page_failed(gen, ex),
+        )
+
+    @staticmethod
+    def _fetch_page(after, limit, with_count):
+        """Worker thread: one page of variants (plus the catalog size with the first page)."""
+        rows = repo.list_variants({}, limit=limit, after=after)
+        total = repo.count_variants() if with_count else None
+        return rows, total, limit
+
+    @staticmethod
+    def _variant_from_row(r):
+        # list_variants rows: (product, rack, size, color, qty, retail, wholesale, vid)
+        return {"variant_id": str(r[7]), "product": r[0], "color": r[3], "size": r[2], "rack": r[1] or "",
+                "stock": int(r[4]), "price": float(r[5])}
+
+    def _on_page(self, gen, result):
+        if gen != self._load_gen:
+            return  # a newer reload started
+        rows, total, limit = result
+        self._load_future = None
+        first = self._next_index is not None
+        if first:
+            self.index, self._next_index = self._next_index, None
+            self._load_total = total
+        self.index.extend(self._variant_from_row(r) for r in rows)
+        if rows:
+            self._load_cursor = repo.variant_cursor(rows[-1])
+        self._load_done = len(rows) < limit
+        # pages append in display order, so rows already on screen keep their positions
+        self.filtered = self.index.filter(**self._query())
+        self.grid_view.set_rows(self.filtered, keep_position=not first)
+        self._update_summary()
+        if first:
+            if self._last_action == "Loading inventory…":
+                self._update_status_bar("Ready")
+            self.event_generate("<<InventoryShown>>", when="tail")
+        if self._load_done:
+            self.event_generate("<<InventoryLoaded>>", when="tail")
+        if self._filters_active() or self._near_end():
+            self._fetch_next_page()
+
+    def _on_page_failed(self, gen, ex):
+        if gen == self._load_gen:
+            self._update_status_bar(f"Loading inventory failed: {ex}")
+
+    def _filters_active(self):
+        q = self._query()
+        return q["stock"] != "all" or any(q[k].strip() for k in ("product", "rack", "color", "size"))
+
+    def _near_end(self):
+        _, last = self.grid_view.visible_range()
+        return last + self.PAGE_SIZE // 2 >= len(self.filtered)
+
+    def _on_view_changed(self):
+        if not self._load_done and self._near_end():
+            self._fetch_next_page()
 
     # -- Data & UI operations
+    @staticmethod
+    def _format_row(item, idx):
+        tag = 'even' if idx % 2 == 0 else 'odd'
+        return (item["product"], item["color"], item["size"], item["rack"], item["stock"], f'{item["price"]:.2f}', item["variant_id"]), (tag,)
+
     def _refresh_tree(self):
-        for r in self.tree.get_children():
-            self.tree.delete(r)
-        for idx, item in enumerate(self.filtered):
-            tag = 'even' if idx % 2 == 0 else 'odd'
-            self.tree.insert("", "end", values=(item["product"], item["color"], item["size"], item["rack"], item["stock"], f'{item["price"]:.2f}', item["variant_id"]), tags=(tag,))
+        self.grid_view.set_rows(self.filtered)
         self._update_summary()
 
+    def _query(self):
+        return {
+            "product": self.search_name.get(),
+            "rack": self.search_rack.get(),
+            "color": self.search_color.get(),
+            "size": self.search_size.get(),
+            "stock": self.stock_filter.get(),
+        }
+
     def _apply_filters(self):
-        q_name = self.search_name.get().strip().lower()
-        q_rack = self.search_rack.get().strip().lower()
-        q_color = self.search_color.get().strip().lower()
-        q_size = self.search_size.get().strip().lower()
-        sf = self.stock_filter.get()
-        def keep(v):
-            if q_name and q_name not in v["product"].lower():
-                return False
-            if q_rack and q_rack not in v["rack"].lower():
-                return False
-            if q_color and q_color not in v["color"].lower():
-                return False
-            if q_size and q_size not in v["size"].lower():
-                return False
-            if sf == "low" and not (0 < v["stock"] < 5):
-                return False
-            if sf == "out" and v["stock"] != 0:
-                return False
-            return True
-        self.filtered = [v for v in self.data if keep(v)]
+        self.filtered = self.index.filter(**self._query())
         self._refresh_tree()
+        if self._filters_active():
+            # filtering is client-side, so it needs the rest of the catalog
+            self._fetch_next_page()
+
+    # -- incremental updates: touch only the changed row and the counters
+    def _update_row(self, variant, **changes):
+        """Apply field changes to one variant, then repaint just that row (or drop it if it no longer matches the filters)."""
+        pos = variant["_pos"]
+        self.index.update(pos, **changes)
+        variant.update(changes)
+        self._sync_row(pos)
+
+    def _sync_row(self, pos):
+        if self.index.matches(pos, **self._query()):
+            if pos in self.filtered:
+                self.grid_view.refresh_index(self.filtered.rank(pos))
+            else:
+                # now matches (e.g. restocked while showing out of stock only): slot it back in order
+                self.filtered.add(pos)
+                self.grid_view.set_rows(self.filtered, keep_position=True)
+        elif pos in self.filtered:
+            self._drop_filtered(pos)
+        self._update_summary()
+
+    def _remove_row(self, variant):
+        pos = variant["_pos"]
+        self.index.remove(pos)
+        if pos in self.filtered:
+            self._drop_filtered(pos)
+        self._update_summary()
+
+    # -- write-through: the grid changes at once, the repository write runs on a worker and is undone if it fails
+    def _persist(self, variant, what, fn, *args, undo):
+        """
+        Run fn(*args) (a repository write returning a rowcount) in the background. If it
+        fails or touches no row, undo(pos) is called with the variant's position in the
+        current index and the user is told; a reload in the meantime already shows the database state, so no undo.
+        """
+        try:
+            variant_id = int(variant["variant_id"])
+        except ValueError:
+            return  # sample rows have no database id
+        index, pos = self.index, variant["_pos"]
+
+        def failed(reason):
+            if index is self.index:
+                try:
+                    undo(pos)
+                except KeyError:
+                    pass  # deleted locally since
+            self._update_status_bar(f"{what} failed: {reason}")
+            messagebox.showerror("Inventory", f"{what} was not saved and has been undone.\n\n{reason}")
+
+        def done(count):
+            if not count:
+                failed("the variant no longer exists")
+
+        self._writer.submit(fn, variant_id, *args, on_done=done, on_error=lambda ex: failed(ex))
+
+    def _drop_filtered(self, pos):
+        selected = self.grid_view.selected_index()
+        rank = self.filtered.rank(pos)
+        self.filtered.discard(pos)
+        self.grid_view.set_rows(self.filtered, keep_position=True)
+        if selected is not None and selected >= rank:
+            self.grid_view.select_index(None if selected == rank else selected - 1)
 
     def _get_selected_variant(self):
-        sel = self.tree.selection()
-        if not sel:
+        idx = self.grid_view.selected_index()
+        if idx is None or idx >= len(self.filtered):
             return None
-        vals = self.tree.item(sel[0])["values"]
-        variant_id = vals[-1]
-        for v in self.data:
-            if v["variant_id"] == variant_id:
-                return v
-        return None
+        return self.filtered[idx]
 
     def _on_right_click(self, event):
         iid = self.tree.identify_row(event.y)
         if iid:
-            self.tree.selection_set(iid)
+            self.grid_view.select_item(iid)
             self.ctx_menu.tk_popup(event.x_root, event.y_root)
 
     def _ctx_restock(self):
@@ -287,10 +446,11 @@ class InventoryUI(tk.Tk):
 
     # -- Actions used by buttons
     def _add_product(self):
+        AddProductDialog = _lazy("dialogs", "AddProductDialog")
         if AddProductDialog:
             try:
                 AddProductDialog(self)
-                self.after(200, lambda: (self._reload_from_repo() and self._apply_filters()))
+                self.after(200, self._reload_from_repo)
                 self._update_status_bar("Opened Add Product")
             except Exception as e:
                 self._update_status_bar(f"AddProduct failed: {e}")
@@ -298,28 +458,58 @@ class InventoryUI(tk.Tk):
             self._update_status_bar("Add Product not available")
 
     def _add_attributes(self):
+        AddColorDialog, AddSizeDialog = _lazy("dialogs", "AddColorDialog"), _lazy("dialogs", "AddSizeDialog")
         if AddColorDialog and AddSizeDialog:
             top = tk.Toplevel(self)
             top.title("Add Attributes")
             top.transient(self)
             ttk.Label(top, text="Choose attribute to add:").pack(padx=12, pady=(12,6))
             btn_frame = ttk.Frame(top); btn_frame.pack(padx=12, pady=8)
-            ttk.Button(btn_frame, text="Add Color", command=lambda: (AddColorDialog(self), top.destroy(), self.after(200, lambda: (self._reload_from_repo() and self._apply_filters())))).pack(side="left", padx=6)
-            ttk.Button(btn_frame, text="Add Size", command=lambda: (AddSizeDialog(self), top.destroy(), self.after(200, lambda: (self._reload_from_repo() and self._apply_filters())))).pack(side="left", padx=6)
+            ttk.Button(btn_frame, text="Add Color", command=lambda: (AddColorDialog(self), top.destroy(), self.after(200, self._reload_from_repo))).pack(side="left", padx=6)
+            ttk.Button(btn_frame, text="Add Size", command=lambda: (AddSizeDialog(self), top.destroy(), self.after(200, self._reload_from_repo))).pack(side="left", padx=6)
             self._update_status_bar("Opened Add Attributes")
         else:
             self._update_status_bar("Add Attributes not available")
 
     def _add_variant(self):
+        AddVariantDialog, AddProductDialog = _lazy("dialogs", "AddVariantDialog"), _lazy("dialogs", "AddProductDialog")
+        if AddVariantDialog and AddProductDialog:
+            # new variant of the selected row's product, or a new product when nothing is selected
+            v = self._get_selected_variant()
+            product_id = None
+            if v is not None and str(v["variant_id"]).isdigit():
+                product_id = repo.get_product_id_from_variant(int(v["variant_id"]))
+            dlg = AddVariantDialog(self, product_id) if product_id else AddProductDialog(self)
+            dlg.transient(self)
+            self.wait_window(dlg)
+            self._reload_from_repo()
+            self._update_status_bar(f"Closed Add Variant for {v['product']}" if product_id else "Closed Add Product")
+            return
         name = simpledialog.askstring("Add Variant", "Product name:")
         if not name:
             return
-        vid = f"v{len(self.data)+1}"
+        vid = f"v{len(self.index)+1}"
         new = {"variant_id": vid, "product": name, "color": "N/A", "size": "N/A", "rack": "Unknown", "stock": 0, "price": 0.0}
-        self.data.append(new)
+        self.index.append(new)
         self._apply_filters()
         self._update_status_bar(f"Added variant {name} ({vid})")
 
+    def _restore_row(self, pos):
+        self.index.restore(pos)
+        self._sync_row(pos)
+
+    def _import_stock(self):
+        StockImportDialog = _lazy("dialogs", "StockImportDialog")
+        if not StockImportDialog:
+            self._update_status_bar("Import not available")
+            return
+        StockImportDialog(self, on_finished=self._on_import_finished).transient(self)
+        self._update_status_bar("Opened Import Stock")
+
+    def _on_import_finished(self, report):
+        self._reload_from_repo()
+        self._update_status_bar(f"Import: {report.summary()}" if report else "Import failed")
+
     def _restock_prompt(self):
         v = self._get_selected_variant()
         if not v:
@@ -330,8 +520,9 @@ class InventoryUI(tk.Tk):
     def _restock_variant(self, variant):
         amount = simpledialog.askinteger("Restock", f"Units to add to {variant['product']} ({variant['size']}):", minvalue=1)
         if amount:
-            variant["stock"] += amount
-            self._apply_filters()
+            self._update_row(variant, stock=variant["stock"] + amount)
+            self._persist(variant, "Restock", repo.restock_units, amount,
+                          undo=lambda pos: self._update_row(self.index.row(pos), stock=self.index.stock[pos] - amount))
             self._update_status_bar(f"Restocked {amount} units of {variant['product']} ({variant['size']})")
 
     def _update_price_prompt(self):
@@ -344,8 +535,10 @@ class InventoryUI(tk.Tk):
     def _update_price_variant(self, variant):
         price = simpledialog.askfloat("Update Price", f"New price for {variant['product']} ({variant['size']}):", minvalue=0.0)
         if price is not None:
-            variant["price"] = price
-            self._apply_filters()
+            old = variant["price"]
+            self._update_row(variant, price=price)
+            self._persist(variant, "Price update", repo.update_prices, price,
+                          undo=lambda pos: self._update_row(self.index.row(pos), price=old))
             self._update_status_bar(f"Updated price of {variant['product']} ({variant['size']}) to ${price:.2f}")
 
     def _delete_prompt(self):
@@ -357,23 +550,22 @@ class InventoryUI(tk.Tk):
 
     def _delete_variant(self, variant):
         if messagebox.askyesno("Delete Variant", f"Delete {variant['product']} ({variant['size']})?"):
-            self.data = [d for d in self.data if d["variant_id"] != variant["variant_id"]]
-            self._apply_filters()
+            self._remove_row(variant)
+            self._persist(variant, "Delete", repo.delete_variant, undo=self._restore_row)
             self._update_status_bar(f"Deleted variant {variant['product']} ({variant['size']})")
 
     # ribbon extra handlers
     def _open_inventory(self):
-        # reload from repo if possible and refresh
-        loaded = self._reload_from_repo()
-        if loaded:
-            self._apply_filters()
+        # reload from repo if possible; pages refresh the grid as they arrive
+        self._reload_from_repo()
         self._update_status_bar("Opened Inventory")
 
     def _open_invoices(self):
+        InvoiceWindow = _lazy("invoice_window", "InvoiceWindow")
         if InvoiceWindow:
             try:
                 InvoiceWindow(self)
-                self.after(300, lambda: (self._reload_from_repo() and self._apply_filters()))
+                self.after(300, self._reload_from_repo)
                 self._update_status_bar("Opened Invoices")
             except Exception as e:
                 self._update_status_bar(f"Open invoices failed: {e}")
@@ -381,15 +573,20 @@ class InventoryUI(tk.Tk):
             self._update_status_bar("Invoices not available")
 
     def _open_reports(self):
-        top = tk.Toplevel(self)
-        top.title("Reports")
-        top.transient(self)
-        ttk.Label(top, text="Reports").pack(padx=12, pady=(12,6))
-        ttk.Button(top, text="Low Stock (<=5)", command=lambda: (self._set_stock_filter_and_apply("low"), top.destroy())).pack(fill="x", padx=12, pady=6)
-        ttk.Button(top, text="Out of Stock", command=lambda: (self._set_stock_filter_and_apply("out"), top.destroy())).pack(fill="x", padx=12, pady=6)
-        ttk.Button(top, text="All", command=lambda: (self._set_stock_filter_and_apply("all"), top.destroy())).pack(fill="x", padx=12, pady=6)
+        ReportsWindow = _lazy("reports_window", "ReportsWindow")
+        if not ReportsWindow:
+            self._update_status_bar("Reports not available")
+            return
+        ReportsWindow(self, on_stock_filter=self._set_stock_filter_and_apply).transient(self)
         self._update_status_bar("Opened Reports")
 
+    def _open_query_stats(self):
+        QueryStatsWindow = _lazy("query_stats_window", "QueryStatsWindow")
+        if not QueryStatsWindow:
+            self._update_status_bar("Query statistics not available")
+            return
+        QueryStatsWindow(self).transient(self)
+
     def _set_stock_filter_and_apply(self, mode):
         self.stock_filter.set(mode)
         self._apply_filters()
@@ -397,12 +594,10 @@ class InventoryUI(tk.Tk):
 
     # -- UI helpers
     def _update_summary(self):
-        total_products = len({d["product"] for d in self.data})
-        variants = len(self.data)
-        low_stock = sum(1 for d in self.data if 0 < d["stock"] < 5)
-        out_stock = sum(1 for d in self.data if d["stock"] == 0)
-        summary = f"Total Products: {total_products} | Variants: {variants} | Low Stock: {low_stock} | Out of Stock: {out_stock}"
-        self._summary_text = summary
+        c = self.index.summary()
+        self._summary_text = f"Total Products: {c['products']} | Variants: {c['variants']} | Low Stock: {c['low']} | Out of Stock: {c['out']}"
+        if not self._load_done and self._load_total:
+            self._summary_text += f" (loaded {len(self.index)} of {self._load_total})"
         self._compose_status()
 
     def _update_status_bar(self, last_action):
@@ -0,0 +1,102 @@
+"""
+Query statistics window (Ctrl+Shift+Q): the statements recorded by instrumentation,
+heaviest first, with their callers and the latest slow statements.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+try:
+    from .. import instrumentation
+except Exception:
+    import instrumentation
+
+
+class QueryStatsWindow(tk.Toplevel):
+    REFRESH_MS = 2000
+    COLUMNS = (("sql", "Statement", 420, "w"), ("calls", "Calls", 70, "e"), ("total_ms", "Total ms", 90, "e"),
+               ("avg_ms", "Avg ms", 80, "e"), ("max_ms", "Max ms", 80, "e"), ("rows", "Rows", 80, "e"))
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Query statistics")
+        self.geometry("960x600")
+        self._rows = []
+        self._after_id = None
+
+        top = ttk.Frame(self, padding=8)
+        top.pack(fill="x")
+        ttk.Label(top, text="Sort by").pack(side="left")
+        self.sort = tk.StringVar(value="total")
+        sort_cb = ttk.Combobox(top, textvariable=self.sort, state="readonly", width=8,
+                               values=("total", "calls", "avg", "max", "rows"))
+        sort_cb.pack(side="left", padx=(4, 12))
+        sort_cb.bind("<<ComboboxSelected>>", lambda e: self.refresh())
+        ttk.Button(top, text="Refresh", command=self.refresh).pack(side="left", padx=4)
+        ttk.Button(top, text="Reset", command=self._reset).pack(side="left", padx=4)
+        self.info = ttk.Label(top, text="")
+        self.info.pack(side="left", padx=12)
+
+        panes = ttk.PanedWindow(self, orient="vertical")
+        panes.pack(fill="both", expand=True, padx=8, pady=(0, 8))
+        table = ttk.Frame(panes)
+        self.tree = ttk.Treeview(table, columns=[c[0] for c in self.COLUMNS], show="headings", selectmode="browse")
+        for cid, title, width, anchor in self.COLUMNS:
+            self.tree.heading(cid, text=title)
+            self.tree.column(cid, width=width, anchor=anchor, stretch=cid == "sql")
+        vsb = ttk.Scrollbar(table, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        vsb.pack(side="right", fill="y")
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._show_detail())
+        panes.add(table, weight=3)
+
+        self.detail = tk.Text(panes, height=10, wrap="word")
+        panes.add(self.detail, weight=1)
+
+        self.refresh()
+        self.bind("<Destroy>", self._on_destroy, add="+")
+
+    def _on_destroy(self, evt):
+        if evt.widget is self and self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+
+    def refresh(self):
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+        cfg = instrumentation.settings()
+        if not cfg["enabled"]:
+            self.info.config(text="Instrumentation is off: set INVENTORY_SLOW_QUERY_MS or "
+                                  "\"query_stats\": {\"enabled\": true} in config.json and restart.")
+        else:
+            log = f", log: {cfg['log']}" if cfg["log"] else ""
+            self.info.config(text=f"Slow threshold {cfg['slow_ms']:g} ms{log}")
+        selected = self.tree.selection()
+        self._rows = instrumentation.stats(sort=self.sort.get(), limit=500)
+        self.tree.delete(*self.tree.get_children())
+        for i, r in enumerate(self._rows):
+            self.tree.insert("", "end", iid=str(i), values=[r[c[0]] for c in self.COLUMNS])
+        if selected and self.tree.exists(selected[0]):
+            self.tree.selection_set(selected[0])
+        else:
+            self._show_detail()
+        self._after_id = self.after(self.REFRESH_MS, self.refresh)
+
+    def _reset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    def _show_detail(self):
+        self.detail.delete("1.0", tk.END)
+        sel = self.tree.selection()
+        if sel:
+            r = self._rows[int(sel[0])]
+            callers = "\n".join(f"  {name}: {calls}" for name, calls in r["callers"])
+            self.detail.insert(tk.END, f"{r['sql']}\n\nCallers:\n{callers}\n")
+            if r["errors"]:
+                self.detail.insert(tk.END, f"Errors: {r['errors']}\n")
+            return
+        slow = instrumentation.recent_slow()[-20:]
+        self.detail.insert(tk.END, "Latest slow statements:\n" if slow else "No slow statements recorded.\n")
+        for s in reversed(slow):
+            self.detail.insert(tk.END, f"{s['at']}  {s['ms']:.1f} ms  {s['caller']}  {s['sql'][:200]}\n")
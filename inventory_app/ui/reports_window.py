@@ -0,0 +1,127 @@
+"""
+Reports window: pick a report and a date range, the query runs on a worker thread
+and the result is shown in a virtual grid or streamed to a CSV file.
+"""
+import tkinter as tk
+from datetime import date, timedelta
+from tkinter import ttk, messagebox, filedialog
+
+try:
+    from .. import reports
+    from .async_tasks import BackgroundRunner
+    from .virtual_tree import VirtualTreeview
+except Exception:
+    import reports
+    from ui.async_tasks import BackgroundRunner
+    from ui.virtual_tree import VirtualTreeview
+
+
+class ReportsWindow(tk.Toplevel):
+    MAX_ROWS = 5000
+
+    def __init__(self, master, on_stock_filter=None):
+        """on_stock_filter(mode) applies the main grid's low/out/all stock filter (the old Reports buttons)."""
+        super().__init__(master)
+        self.title("Reports")
+        self.geometry("820x520")
+        self.on_stock_filter = on_stock_filter
+        self._runner = BackgroundRunner(self, name="reports")
+        self._seq = 0
+        self.bind("<Destroy>", self._on_destroy, add="+")
+
+        top = ttk.Frame(self, padding=8)
+        top.pack(fill="x")
+        self._names = list(reports.REPORTS)
+        ttk.Label(top, text="Report").pack(side="left")
+        self.report_cb = ttk.Combobox(top, state="readonly", width=22,
+                                      values=[reports.REPORTS[n][0] for n in self._names])
+        self.report_cb.current(0)
+        self.report_cb.pack(side="left", padx=(4, 12))
+        today = date.today()
+        self.date_from = tk.StringVar(value=today.replace(day=1).isoformat())
+        self.date_to = tk.StringVar(value=today.isoformat())
+        ttk.Label(top, text="From").pack(side="left")
+        ttk.Entry(top, textvariable=self.date_from, width=11).pack(side="left", padx=4)
+        ttk.Label(top, text="To").pack(side="left")
+        ttk.Entry(top, textvariable=self.date_to, width=11).pack(side="left", padx=4)
+        ttk.Button(top, text="Run", command=self._run).pack(side="left", padx=(12, 4))
+        ttk.Button(top, text="Export CSV…", command=self._export).pack(side="left", padx=4)
+
+        if on_stock_filter:
+            stock = ttk.Frame(self, padding=(8, 0))
+            stock.pack(fill="x")
+            ttk.Label(stock, text="Inventory grid:").pack(side="left")
+            for text, mode in (("Low Stock (<5)", "low"), ("Out of Stock", "out"), ("All", "all")):
+                ttk.Button(stock, text=text, command=lambda m=mode: self.on_stock_filter(m)).pack(side="left", padx=4)
+
+        self.body = ttk.Frame(self, padding=8)
+        self.body.pack(fill="both", expand=True)
+        self.grid_view = None
+        self.status = ttk.Label(self, text="", padding=(8, 4))
+        self.status.pack(fill="x")
+
+    def _on_destroy(self, evt):
+        if evt.widget is self:
+            self._runner.shutdown()
+
+    def _selection(self):
+        """(report name, start, end) with the To date made inclusive; raises ValueError on bad dates."""
+        name = self._names[self.report_cb.current()]
+        start = end = None
+        if reports.REPORTS[name][2]:
+            if self.date_from.get().strip():
+                start = date.fromisoformat(self.date_from.get().strip()).isoformat()
+            if self.date_to.get().strip():
+                end = (date.fromisoformat(self.date_to.get().strip()) + timedelta(days=1)).isoformat()
+        return name, start, end
+
+    def _run(self):
+        try:
+            name, start, end = self._selection()
+        except ValueError:
+            messagebox.showerror("Reports", "Dates must be YYYY-MM-DD", parent=self)
+            return
+        self._seq += 1
+        seq = self._seq
+        self.status.config(text="Running…")
+        self._runner.submit(reports.fetch, name, start, end, max_rows=self.MAX_ROWS,
+                            on_done=lambda res: self._show(seq, name, res),
+                            on_error=lambda ex: self.status.config(text=f"Report failed: {ex}"))
+
+    def _show(self, seq, name, result):
+        if seq != self._seq:
+            return
+        columns, rows, truncated = result
+        if self.grid_view is not None:
+            self.grid_view.destroy()
+        ids = [f"c{i}" for i in range(len(columns))]
+        self.grid_view = VirtualTreeview(self.body, ids, self._format_row)
+        self.grid_view.tree.tag_configure("odd", background="#ffffff")
+        self.grid_view.tree.tag_configure("even", background="#f7fafc")
+        for cid, title in zip(ids, columns):
+            self.grid_view.tree.heading(cid, text=title)
+            self.grid_view.tree.column(cid, width=200 if cid == "c0" else 110, anchor="w" if cid == "c0" else "e")
+        self.grid_view.pack(fill="both", expand=True)
+        self.grid_view.set_rows(rows)
+        note = f" (first {self.MAX_ROWS}; export for all)" if truncated else ""
+        self.status.config(text=f"{reports.REPORTS[name][0]}: {len(rows)} row(s){note}")
+
+    @staticmethod
+    def _format_row(row, idx):
+        values = ["" if v is None else (f"{v:.2f}" if isinstance(v, float) else v) for v in row]
+        return values, ("even" if idx % 2 == 0 else "odd",)
+
+    def _export(self):
+        try:
+            name, start, end = self._selection()
+        except ValueError:
+            messagebox.showerror("Reports", "Dates must be YYYY-MM-DD", parent=self)
+            return
+        path = filedialog.asksaveasfilename(parent=self, defaultextension=".csv", initialfile=f"{name}.csv",
+                                            filetypes=[("CSV files", "*.csv")])
+        if not path:
+            return
+        self.status.config(text="Exporting…")
+        self._runner.submit(reports.export_csv, name, path, start, end,
+                            on_done=lambda n: self.status.config(text=f"Exported {n} row(s) to {path}"),
+                            on_error=lambda ex: self.status.config(text=f"Export failed: {ex}"))
@@ -0,0 +1,200 @@
+"""
+Virtual-scrolling wrapper around ttk.Treeview.
+
+A plain Treeview needs one Tk item per row, so showing 50k variants means 50k
+insert calls on every filter change. VirtualTreeview keeps only as many items as fit
+on screen ("slots") and re-fills them from a backing sequence when the user scrolls,
+so the cost of set_rows() or a scroll step is one update per visible row whatever
+the size of the data.
+
+Every repaint generates <<ViewChanged>> on the frame; visible_range() then tells
+owners that load rows lazily whether the user is getting close to the end.
+"""
+from tkinter import ttk
+
+
+class VirtualTreeview(ttk.Frame):
+    def __init__(self, parent, columns, formatter, **tree_kw):
+        """
+        formatter(row, index) -> (values, tags) turns one backing row into Treeview values.
+        Extra keyword arguments go to the inner ttk.Treeview (exposed as .tree).
+        """
+        super().__init__(parent)
+        self.formatter = formatter
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse", **tree_kw)
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vsb.grid(row=0, column=1, sticky="ns")
+        self.rowconfigure(0, weight=1)
+        self.columnconfigure(0, weight=1)
+
+        self._rows = []
+        self._top = 0            # backing index shown in the first slot
+        self._slots = []         # reused Treeview item ids, top to bottom
+        self._capacity = 1       # how many rows fit on screen
+        self._selected = None    # backing index of the selected row
+
+        self.tree.bind("<Configure>", self._on_resize, add="+")
+        self.tree.bind("<Button-1>", self._on_click, add="+")
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_by(3))
+        for key, step in (("<Up>", -1), ("<Down>", 1)):
+            self.tree.bind(key, lambda e, s=step: self._move_selection(s))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-max(1, self._capacity - 1)))
+        self.tree.bind("<Next>", lambda e: self._move_selection(max(1, self._capacity - 1)))
+        self.tree.bind("<Home>", lambda e: self._move_selection(-len(self._rows)))
+        self.tree.bind("<End>", lambda e: self._move_selection(len(self._rows)))
+
+    # ---- data
+    def set_rows(self, rows, keep_position: bool = False):
+        """Show a new backing sequence (anything with len() and indexing)."""
+        self._rows = rows
+        if not keep_position:
+            self._top = 0
+            self._selected = None
+        elif self._selected is not None and self._selected >= len(rows):
+            self._selected = None
+        self.refresh()
+
+    @property
+    def rows(self):
+        return self._rows
+
+    def refresh(self):
+        """Re-fill the on-screen slots from the backing rows (call after rows changed in place)."""
+        total = len(self._rows)
+        self._top = max(0, min(self._top, total - self._capacity))
+        wanted = min(self._capacity, total - self._top)
+        while len(self._slots) < wanted:
+            self._slots.append(self.tree.insert("", "end"))
+        while len(self._slots) > wanted:
+            self.tree.delete(self._slots.pop())
+        for i, iid in enumerate(self._slots):
+            idx = self._top + i
+            values, tags = self.formatter(self._rows[idx], idx)
+            self.tree.item(iid, values=values, tags=tags)
+        # the slots must never scroll inside the Treeview itself
+        self.tree.yview_moveto(0)
+        self._sync_selection()
+        self._update_scrollbar()
+        self.event_generate("<<ViewChanged>>")
+
+    def visible_range(self):
+        """(first, last + 1) backing indexes currently on screen."""
+        return self._top, self._top + len(self._slots)
+
+    def refresh_index(self, index: int):
+        """Update a single backing row if it is on screen; O(1)."""
+        slot = index - self._top
+        if 0 <= slot < len(self._slots):
+            values, tags = self.formatter(self._rows[index], index)
+            self.tree.item(self._slots[slot], values=values, tags=tags)
+
+    # ---- selection
+    def selected_index(self):
+        return self._selected
+
+    def index_of_item(self, iid):
+        try:
+            return self._top + self._slots.index(iid)
+        except ValueError:
+            return None
+
+    def select_item(self, iid):
+        """Select the row shown in slot `iid` (e.g. from identify_row on a right-click)."""
+        self.select_index(self.index_of_item(iid))
+
+    def select_index(self, index):
+        if index is None or not (0 <= index < len(self._rows)):
+            self._selected = None
+        else:
+            self._selected = index
+            self.see(index)
+        self._sync_selection()
+
+    def see(self, index: int):
+        if index < self._top:
+            self._top = index
+            self.refresh()
+        elif index >= self._top + self._capacity:
+            self._top = index - self._capacity + 1
+            self.refresh()
+
+    def _sync_selection(self):
+        slot = None if self._selected is None else self._selected - self._top
+        if slot is not None and 0 <= slot < len(self._slots):
+            iid = self._slots[slot]
+            if self.tree.selection() != (iid,):
+                self.tree.selection_set(iid)
+            self.tree.focus(iid)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+    def _on_click(self, event):
+        iid = self.tree.identify_row(event.y)
+        if iid:
+            self._selected = self.index_of_item(iid)
+
+    def _move_selection(self, step: int):
+        if not self._rows:
+            return "break"
+        if self._selected is None:
+            index = self._top if step > 0 else self._top + len(self._slots) - 1
+        else:
+            index = self._selected + step
+        self.select_index(max(0, min(len(self._rows) - 1, index)))
+        return "break"
+
+    # ---- scrolling
+    def _scroll_by(self, rows: int):
+        top = max(0, min(self._top + rows, len(self._rows) - self._capacity))
+        if top != self._top:
+            self._top = top
+            self.refresh()
+        return "break"
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        if not event.delta:
+            return "break"
+        notches = int(event.delta / 120) or (1 if event.delta > 0 else -1)
+        return self._scroll_by(-notches * 3)
+
+    def _on_scrollbar(self, *args):
+        total = len(self._rows)
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * total)
+            self.refresh()
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self._scroll_by(amount * max(1, self._capacity - 1) if args[2] == "pages" else amount)
+
+    def _update_scrollbar(self):
+        total = len(self._rows)
+        if total <= self._capacity or total == 0:
+            self.vsb.set(0.0, 1.0)
+        else:
+            self.vsb.set(self._top / total, (self._top + self._capacity) / total)
+
+    def _on_resize(self, event):
+        self._apply_capacity(event.height, retry=True)
+
+    def _apply_capacity(self, height: int, retry: bool = False):
+        capacity, measured = self._fit_rows(height)
+        if capacity != self._capacity:
+            self._capacity = capacity
+            self.refresh()
+        if not measured and retry and self._slots:
+            # first layout: rows only have a bbox once drawn, so measure again when idle
+            self.after_idle(lambda: self._apply_capacity(self.tree.winfo_height()))
+
+    def _fit_rows(self, height: int):
+        """(rows that fit in `height`, whether it was measured from a drawn row or estimated)"""
+        bbox = self.tree.bbox(self._slots[0]) if self._slots else ""
+        if bbox:
+            heading, row_h = bbox[1], bbox[3]
+        else:
+            row_h = int(ttk.Style(self).lookup("Treeview", "rowheight") or 20)
+            heading = row_h + 4
+        return max(1, (height - heading) // max(1, row_h)), bool(bbox)
@@ -0,0 +1,78 @@
+"""
+Background invoice export.
+
+Rendering a PDF with reportlab takes long enough on big invoices to freeze the Tk
+window, so exports are queued on a small process pool. Workers are separate processes
+(not threads) so rendering never competes with the UI for the GIL, and each worker
+keeps its decoded logo between jobs (see pdf_export._LOGO_CACHE).
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from . import pdf_export
+
+
+class ExportQueue:
+    def __init__(self, max_workers: int = None, use_processes: bool = True):
+        self.max_workers = max_workers or max(1, min(2, (os.cpu_count() or 1) - 1))
+        self.use_processes = use_processes
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    try:
+                        # spawn: never fork a process that is running Tk
+                        ctx = multiprocessing.get_context("spawn")
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx)
+                    except (OSError, NotImplementedError, ValueError):
+                        self._executor = None
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+            return self._executor
+
+    def submit(self, invoice, items, out_dir, branding: dict = None, callback=None):
+        """
+        Queue one invoice (header + lines from repository.get_invoice) for export.
+        Returns a Future whose result is the output path. callback(future) runs on a
+        pool thread when done; UI code should use BackgroundRunner.watch() instead.
+        """
+        future = self._get_executor().submit(
+            pdf_export.render_invoice_job,
+            dict(invoice), [dict(it) for it in items], str(Path(out_dir)), dict(branding or {}),
+        )
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_export_queue() -> ExportQueue:
+    """Application-wide queue, so closing a window does not cancel its pending exports."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = ExportQueue()
+        return _queue
+
+
+def shutdown_export_queue(wait: bool = True):
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.shutdown(wait=wait)
@@ -1,84 +1,178 @@
+import os
+from html import escape
 from pathlib import Path
 
-def export_invoice(invoice, items, out_dir: Path) -> Path:
+
+# decoded logos, kept for the life of the process so queued exports don't re-read
+# and re-decode the image for every invoice: {(path, mtime): ImageReader}
+_LOGO_CACHE = {}
+
+
+def _logo_reader(path: str):
+    try:
+        key = (path, os.path.getmtime(path))
+    except OSError:
+        return None
+    reader = _LOGO_CACHE.get(key)
+    if reader is None:
+        from reportlab.lib.utils import ImageReader
+        try:
+            reader = ImageReader(path)
+        except Exception:
+            reader = path  # let drawImage try the file itself
+        _LOGO_CACHE.clear()
+        _LOGO_CACHE[key] = reader
+    return reader
+
+
+def render_invoice_job(invoice: dict, items: list, out_dir: str, branding: dict = None, fmt: str = "pdf") -> str:
+    """Process-pool entry point (see export_queue): plain dicts in, output path as str out."""
+    return str(export_invoice(invoice, items, Path(out_dir), branding, fmt=fmt))
+
+
+def _invoice_label(invoice) -> str:
+    return invoice.get("invoice_no") or str(invoice["id"])
+
+
+def _totals(invoice, items):
+    subtotal = sum([it["line_total"] for it in items])
+    tax = subtotal * (float(invoice["tax_rate"]) / 100.0)
+    return subtotal, tax, subtotal + tax
+
+
+def export_invoice(invoice, items, out_dir: Path, branding: dict = None, fmt: str = "pdf") -> Path:
+    """
+    Render a persisted invoice (as returned by repository.get_invoice) to PDF, or to
+    HTML when reportlab is missing or the PDF fails. fmt="html" skips the PDF attempt.
+    `branding` (business_name, address, phone, email, logo) adds the letterhead.
+    """
+    if fmt not in ("pdf", "html"):
+        raise ValueError(f"Unknown export format '{fmt}'")
+    out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
+    invoice = dict(invoice)
+    items = [dict(it) for it in items]
+    branding = branding or {}
     fname_base = f"invoice_{invoice['id']}"
+    if fmt == "html":
+        return _export_html(invoice, items, out_dir / f"{fname_base}.html", branding)
     try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.units import mm
+        return _export_pdf(invoice, items, out_dir / f"{fname_base}.pdf", branding)
+    except Exception:
+        return _export_html(invoice, items, out_dir / f"{fname_base}.html", branding)
+
+
+def _export_pdf(invoice, items, pdf_path: Path, branding: dict) -> Path:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import mm
+
+    c = canvas.Canvas(str(pdf_path), pagesize=A4)
+    width, height = A4
+
+    y = height - 20*mm
+    if branding:
+        logo = _logo_reader(branding["logo"]) if branding.get("logo") else None
+        drawn = False
+        if logo is not None:
+            try:
+                c.drawImage(logo, 20*mm, y - 25*mm, width=40*mm, height=25*mm, preserveAspectRatio=True, mask='auto')
+                drawn = True
+            except Exception:
+                drawn = False
+        if not drawn:
+            c.setFont("Helvetica-Bold", 14)
+            c.drawString(20*mm, y - 6*mm, branding.get("business_name") or "")
+        c.setFont("Helvetica", 9)
+        by = y - 2*mm
+        for ln in (branding.get("business_name"), branding.get("address"),
+                   f"Phone: {branding.get('phone') or ''}", f"Email: {branding.get('email') or ''}"):
+            c.drawRightString(190*mm, by, ln or "")
+            by -= 4*mm
+        y -= 32*mm
+
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(20*mm, y, "INVOICE")
+    y -= 8*mm
 
-        pdf_path = out_dir / f"{fname_base}.pdf"
-        c = canvas.Canvas(str(pdf_path), pagesize=A4)
-        width, height = A4
+    c.setFont("Helvetica", 10)
+    c.drawString(20*mm, y, f"Invoice #: {_invoice_label(invoice)}"); y -= 6*mm
+    c.drawString(20*mm, y, f"Date: {invoice['created_at']}"); y -= 6*mm
+    c.drawString(20*mm, y, f"Customer: {invoice['customer_name'] or ''}   Phone: {invoice['customer_phone'] or ''}"); y -= 6*mm
+    if invoice.get("customer_address"):
+        c.drawString(20*mm, y, f"Address: {invoice['customer_address']}"); y -= 6*mm
+    c.drawString(20*mm, y, f"Pricing: {invoice['pricing_type'].title()}   Tax: {invoice['tax_rate']}%"); y -= 10*mm
 
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(20*mm, y, "Product")
+    c.drawString(80*mm, y, "Size/Color")
+    c.drawString(120*mm, y, "Qty")
+    c.drawString(140*mm, y, "Unit")
+    c.drawString(165*mm, y, "Line Total")
+    y -= 5*mm
+    c.line(20*mm, y, 190*mm, y)
+    y -= 5*mm
+    c.setFont("Helvetica", 10)
+
+    for it in items:
+        if y < 30*mm:
+            c.showPage()
+            c.setFont("Helvetica", 10)
+            y = height - 30*mm
+        unit = it["unit_price"]; line = it["line_total"]
+        c.drawString(20*mm, y, it["product"])
+        c.drawString(80*mm, y, f"{it['size']} / {it['color']}")
+        c.drawRightString(135*mm, y, str(it["quantity"]))
+        c.drawRightString(160*mm, y, f"{unit:.2f}")
+        c.drawRightString(190*mm, y, f"{line:.2f}")
+        y -= 6*mm
+
+    subtotal, tax, total = _totals(invoice, items)
+    if y < 50*mm:
+        c.showPage()
         y = height - 30*mm
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(20*mm, y, "INVOICE")
-        y -= 8*mm
-
-        c.setFont("Helvetica", 10)
-        c.drawString(20*mm, y, f"Invoice ID: {invoice['id']}"); y -= 6*mm
-        c.drawString(20*mm, y, f"Date: {invoice['created_at']}"); y -= 6*mm
-        c.drawString(20*mm, y, f"Customer: {invoice['customer_name']}   Phone: {invoice['customer_phone']}"); y -= 6*mm
-        c.drawString(20*mm, y, f"Pricing: {invoice['pricing_type'].title()}   Tax: {invoice['tax_rate']}%"); y -= 10*mm
-
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(20*mm, y, "Product")
-        c.drawString(80*mm, y, "Size/Color")
-        c.drawString(120*mm, y, "Qty")
-        c.drawString(140*mm, y, "Unit")
-        c.drawString(165*mm, y, "Line Total")
-        y -= 5*mm
-        c.line(20*mm, y, 190*mm, y)
-        y -= 5*mm
-        c.setFont("Helvetica", 10)
-
-        subtotal = 0.0
-        for it in items:
-            if y < 30*mm:
-                c.showPage()
-                y = height - 30*mm
-            unit = it["unit_price"]; line = it["line_total"]; subtotal += line
-            c.drawString(20*mm, y, it["product"])
-            c.drawString(80*mm, y, f"{it['size']} / {it['color']}")
-            c.drawRightString(135*mm, y, str(it["quantity"]))
-            c.drawRightString(160*mm, y, f"{unit:.2f}")
-            c.drawRightString(190*mm, y, f"{line:.2f}")
-            y -= 6*mm
-
-        tax = subtotal * (float(invoice["tax_rate"]) / 100.0)
-        total = subtotal + tax
-        y -= 6*mm; c.line(120*mm, y, 190*mm, y); y -= 6*mm
-        c.drawRightString(160*mm, y, "Subtotal:"); c.drawRightString(190*mm, y, f"{subtotal:.2f}"); y -= 6*mm
-        c.drawRightString(160*mm, y, "Tax:"); c.drawRightString(190*mm, y, f"{tax:.2f}"); y -= 6*mm
-        c.setFont("Helvetica-Bold", 11)
-        c.drawRightString(160*mm, y, "TOTAL:"); c.drawRightString(190*mm, y, f"{total:.2f}")
-
-        c.save()
-        return pdf_path
-    except Exception:
-        html_path = out_dir / f"{fname_base}.html"
-        subtotal = sum([it["line_total"] for it in items])
-        tax = subtotal * (float(invoice["tax_rate"]) / 100.0)
-        total = subtotal + tax
-        rows = ""
-        for it in items:
-            rows += f"<tr><td>{it['product']}</td><td>{it['size']} / {it['color']}</td><td style='text-align:right'>{it['quantity']}</td><td style='text-align:right'>{it['unit_price']:.2f}</td><td style='text-align:right'>{it['line_total']:.2f}</td></tr>"
-        html = f"""<!doctype html>
-<html><head><meta charset="utf-8"><title>Invoice {invoice['id']}</title>
+    c.setFont("Helvetica", 10)
+    y -= 6*mm; c.line(120*mm, y, 190*mm, y); y -= 6*mm
+    c.drawRightString(160*mm, y, "Subtotal:"); c.drawRightString(190*mm, y, f"{subtotal:.2f}"); y -= 6*mm
+    c.drawRightString(160*mm, y, "Tax:"); c.drawRightString(190*mm, y, f"{tax:.2f}"); y -= 6*mm
+    c.setFont("Helvetica-Bold", 11)
+    c.drawRightString(160*mm, y, "TOTAL:"); c.drawRightString(190*mm, y, f"{total:.2f}")
+    if branding:
+        c.setFont("Helvetica", 8)
+        c.drawString(20*mm, 15*mm, "Payment terms: Due within 30 days.")
+
+    c.save()
+    return pdf_path
+
+
+def _export_html(invoice, items, html_path: Path, branding: dict) -> Path:
+    subtotal, tax, total = _totals(invoice, items)
+    rows = ""
+    for it in items:
+        rows += f"<tr><td>{escape(it['product'])}</td><td>{escape(it['size'])} / {escape(it['color'])}</td><td style='text-align:right'>{it['quantity']}</td><td style='text-align:right'>{it['unit_price']:.2f}</td><td style='text-align:right'>{it['line_total']:.2f}</td></tr>"
+    letterhead = ""
+    if branding:
+        letterhead = (f"<p style='text-align:right'><b>{escape(branding.get('business_name') or '')}</b><br>"
+                      f"{escape(branding.get('address') or '')}<br>Phone: {escape(branding.get('phone') or '')}<br>"
+                      f"Email: {escape(branding.get('email') or '')}</p>")
+    address = ""
+    if invoice.get("customer_address"):
+        address = f"<b>Address:</b> {escape(invoice['customer_address'])}<br>\n"
+    html = f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>Invoice {escape(_invoice_label(invoice))}</title>
 <style>body{{font-family:Arial,sans-serif}} table{{width:100%;border-collapse:collapse}} th,td{{border:1px solid #ddd;padding:8px}} th{{background:#f5f5f5}}</style></head>
 <body>
+{letterhead}
 <h2>INVOICE</h2>
-<p><b>Invoice ID:</b> {invoice['id']}<br>
+<p><b>Invoice #:</b> {escape(_invoice_label(invoice))}<br>
 <b>Date:</b> {invoice['created_at']}<br>
-<b>Customer:</b> {invoice['customer_name']} &nbsp; <b>Phone:</b> {invoice['customer_phone']}<br>
-<b>Pricing:</b> {invoice['pricing_type'].title()} &nbsp; <b>Tax:</b> {invoice['tax_rate']}%</p>
+<b>Customer:</b> {escape(invoice['customer_name'] or '')} &nbsp; <b>Phone:</b> {escape(invoice['customer_phone'] or '')}<br>
+{address}<b>Pricing:</b> {invoice['pricing_type'].title()} &nbsp; <b>Tax:</b> {invoice['tax_rate']}%</p>
 <table>
 <thead><tr><th>Product</th><th>Size/Color</th><th>Qty</th><th>Unit</th><th>Line Total</th></tr></thead>
 <tbody>{rows}</tbody>
 </table>
 <h3 style="text-align:right">Subtotal: {subtotal:.2f}<br>Tax: {tax:.2f}<br>Total: {total:.2f}</h3>
 </body></html>"""
-        html_path.write_text(html, encoding="utf-8")
-        return html_path
+    html_path.write_text(html, encoding="utf-8")
+    return html_path
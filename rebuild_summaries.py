@@ -0,0 +1,3 @@
+from inventory_app.summary_cli import main
+if __name__ == "__main__":
+    raise SystemExit(main())